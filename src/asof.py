@@ -0,0 +1,117 @@
+"""Interval index over SCD2 versions for as-of (time-travel) queries."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+LOGGER = logging.getLogger(__name__)
+
+SG_TZ = "Asia/Singapore"
+SCD2_KEYS = {"dim_taxpayer": "taxpayer_id", "fact_tax_returns": "return_key"}
+_NAT = np.iinfo(np.int64).min
+
+
+def _to_ns(values: Any) -> np.ndarray:
+    """Timestamps as int64 UTC nanoseconds (NaT -> int64 min); naive values are Asia/Singapore."""
+    index = pd.DatetimeIndex(pd.to_datetime(pd.Series(values).reset_index(drop=True)))
+    if index.tz is None:
+        index = index.tz_localize(SG_TZ)
+    return index.tz_convert("UTC").as_unit("ns").asi8
+
+
+def _keys(values: Any) -> np.ndarray:
+    keys = np.asarray(values)
+    return keys.astype(object) if keys.dtype.kind == "U" else keys
+
+
+class IntervalIndex:
+    """Per-key ``[effective_start, effective_end)`` intervals of an SCD2 table."""
+
+    def __init__(self, keys: Any, starts: Any, ends: Any) -> None:
+        keys = _keys(keys)
+        starts, ends = _to_ns(starts), _to_ns(ends)
+        valid = pd.notna(keys) & (starts != _NAT)
+        positions = np.flatnonzero(valid)
+        self.unique_keys, codes = np.unique(keys[valid], return_inverse=True)
+        self.unique_starts, ranks = np.unique(starts[valid], return_inverse=True)
+        self._stride = len(self.unique_starts) + 1
+        # Ranks are 1-based so that rank 0 sorts before every version of a key.
+        composite = codes.astype(np.int64) * self._stride + ranks + 1
+        order = np.argsort(composite, kind="stable")
+        self._composite = composite[order]
+        self._codes = codes[order]
+        self._ends = ends[valid][order]
+        self._positions = positions[order]
+        self._first = np.searchsorted(self._composite, np.arange(len(self.unique_keys)) * self._stride, side="right")
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, key: str) -> "IntervalIndex":
+        return cls(frame[key].to_numpy(), frame["effective_start"], frame["effective_end"])
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def lookup(self, keys: Any, moments: Any, extend_first: bool = False) -> np.ndarray:
+        """Row position of the version of ``keys[i]`` valid at ``moments[i]``, or -1.
+
+        With ``extend_first`` a moment before a key's first version resolves to that first
+        version, for dimensions whose versions start at load time rather than business time.
+        """
+        return self._lookup(_keys(keys), _to_ns(moments), extend_first)
+
+    def _lookup(self, keys: np.ndarray, moments: np.ndarray, extend_first: bool) -> np.ndarray:
+        result = np.full(len(keys), -1, dtype=np.int64)
+        candidates = np.flatnonzero(pd.notna(keys) & (moments != _NAT))
+        if not len(candidates) or not len(self):
+            return result
+
+        wanted = keys[candidates]
+        code = np.clip(np.searchsorted(self.unique_keys, wanted), 0, len(self.unique_keys) - 1)
+        known = self.unique_keys[code] == wanted
+        moment = moments[candidates]
+        rank = np.searchsorted(self.unique_starts, moment, side="right")
+        row = np.searchsorted(self._composite, code * self._stride + rank, side="right") - 1
+        safe_row = np.clip(row, 0, len(self) - 1)
+        started = known & (row >= 0) & (self._codes[safe_row] == code)
+        found = started & (self._ends[safe_row] > moment)
+        if extend_first:
+            early = known & ~started
+            safe_row = np.where(early, self._first[code], safe_row)
+            found |= early
+        result[candidates[found]] = self._positions[safe_row[found]]
+        return result
+
+    def as_of(self, moment: Any, keys: Any = None) -> np.ndarray:
+        """Row positions (ascending) of the version valid at ``moment`` for ``keys`` (default: all)."""
+        keys = self.unique_keys if keys is None else _keys(keys)
+        moments = np.full(len(keys), _to_ns([moment])[0], dtype=np.int64)
+        rows = self._lookup(keys, moments, extend_first=False)
+        return np.sort(rows[rows >= 0])
+
+
+def point_in_time_join(
+    facts: pd.DataFrame,
+    taxpayers: pd.DataFrame,
+    dim_geo: pd.DataFrame,
+    index: Optional[IntervalIndex] = None,
+    extend_first: bool = True,
+) -> pd.DataFrame:
+    """Join each fact to the ``dim_taxpayer`` version valid at its filing date, then to ``dim_geo``.
+
+    ``taxpayers`` holds all versions; ``index`` must be built from that same frame.
+    Facts without a filing date use their ``effective_start``.
+    """
+    if index is None:
+        index = IntervalIndex.from_frame(taxpayers, "taxpayer_id")
+    moments = facts["filing_date"]
+    if "effective_start" in facts.columns:
+        moments = moments.fillna(facts["effective_start"])
+    rows = index.lookup(facts["taxpayer_id"].to_numpy(), moments, extend_first=extend_first)
+    dims = taxpayers.drop(columns=["taxpayer_id"]).assign(_dim_row=np.arange(len(taxpayers)))
+    mart = facts.assign(_dim_row=rows).merge(dims, on="_dim_row", how="left", suffixes=("", "_taxpayer"))
+    mart = mart.drop(columns=["_dim_row"])
+    return mart.merge(dim_geo, on="geo_id", how="left", suffixes=("", "_geo"))
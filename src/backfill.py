@@ -0,0 +1,381 @@
+"""Partition-scoped backfill with per-partition checkpoints and one commit."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import replace
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.locks import LOCK_DIR_NAME, lock_dir, lock_timeout, table_locks
+from src.pipeline.base import PipelineContext
+from src.pipeline.ingest import ArrowCsvIngestStage, CsvIngestStage, text_columns
+from src.pipeline.write import WriteStage
+from src.utils.categorical import categorical_columns
+from src.state import input_files, read_state, source_file_id, write_state
+
+LOGGER = logging.getLogger(__name__)
+
+SG_TZ = ZoneInfo("Asia/Singapore")
+ARTIFACTS = (
+    "raw",
+    "validated",
+    "staging",
+    "quarantine",
+    "quality_metrics",
+    "dim_geo",
+    "dim_taxpayer",
+    "fact_tax_returns",
+)
+# Frames in both engines; the other artifacts are Arrow tables under the arrow engine.
+PANDAS_ARTIFACTS = ("quality_metrics",)
+COMMITTED_ZONES = ("curated_dir", "datamart_dir")
+# Every table lock WriteStage takes, held on the live zones from staging to swap.
+COMMIT_LOCKS = ("dim_geo", "dim_taxpayer", "fact_tax_returns", "rollups", "datamart_tax_returns", "quality")
+_STAGED_MTIME_NS = 0
+SCD2_COLUMNS = ("version", "effective_start", "effective_end", "is_current")
+
+
+def _engine(config) -> str:
+    return (config.execution or {}).get("engine", "pandas")
+
+
+def _write_table(value, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(value, pa.Table):
+        pq.write_table(value, path)
+    else:
+        value.to_parquet(path, index=False)
+
+
+def _stage_copy(source: str, target: str) -> str:
+    # An epoch mtime marks an untouched copy: anything WriteStage rewrites gets a real one.
+    shutil.copyfile(source, target)
+    os.utime(target, ns=(_STAGED_MTIME_NS, _STAGED_MTIME_NS))
+    return target
+
+
+def _read_table(path: Path, engine: str):
+    return pq.read_table(path) if engine == "arrow" else pd.read_parquet(path)
+
+
+def _partition_id(year, source_file: Optional[str]) -> str:
+    label = f"ay{int(year)}" if pd.notna(year) else "ay_unknown"
+    if source_file is not None:
+        label += "_" + re.sub(r"[^A-Za-z0-9]+", "_", Path(source_file).stem).strip("_")
+    return label
+
+
+def _transform_partition(config, partition_dir: str, run_id: str, run_timestamp: str) -> Dict[str, Any]:
+    """Validate and transform one partition, checkpointing its artifacts (worker process)."""
+    from src.main import build_stages
+
+    partition_dir = Path(partition_dir)
+    engine = _engine(config)
+    started = time.perf_counter()
+    config = replace(config, execution={**(config.execution or {}), "shards": 1})
+    # By name: build_stages may append post-write stages such as the export.
+    stages = {stage.name: stage for stage in build_stages(config)}
+    validate, transform = stages["validate"], stages["transform"]
+    raw = _read_table(partition_dir / "input.parquet", engine)
+    context = PipelineContext(config=config, artifacts={"run_id": run_id, "run_timestamp": run_timestamp})
+    context.artifacts["raw"] = raw
+    data = validate.run(context, raw)
+    transform.run(context, data)
+    for key in ARTIFACTS:
+        _write_table(context.artifacts[key], partition_dir / "artifacts" / f"{key}.parquet")
+    marker = {"run_id": run_id, "seconds": round(time.perf_counter() - started, 3)}
+    write_state(partition_dir / "transformed.json", marker)
+    return marker
+
+
+class BackfillRunner:
+    """Runs a backfill as ``assessment_year`` partitions, transformed independently and committed together."""
+
+    def __init__(
+        self,
+        config,
+        workers: Optional[int] = None,
+        by_file: bool = False,
+        years: Optional[Sequence[int]] = None,
+        work_dir: Optional[Path] = None,
+    ) -> None:
+        settings = config.backfill or {}
+        self.config = config
+        self.by_file = by_file or bool(settings.get("by_file", False))
+        self.years = sorted(set(years)) if years else None
+        self.workers = workers or settings.get("workers") or os.cpu_count() or 1
+        self.work_dir = Path(
+            work_dir or settings.get("work_dir") or Path(config.output_dir) / "metadata" / "backfill"
+        )
+        self.manifest_path = self.work_dir / "manifest.json"
+        output_dir = Path(config.output_dir)
+        layers = config.layers or {}
+        self.zones = {
+            "curated_dir": Path(layers.get("curated_dir", output_dir / "curated")),
+            "datamart_dir": Path(layers.get("datamart_dir", output_dir / "datamart")),
+        }
+
+    # Planning -----------------------------------------------------------------
+
+    def _input_ids(self) -> List[str]:
+        return [source_file_id(path) for path in input_files(Path(self.config.input_path))]
+
+    def prepare(self, restart: bool = False) -> Dict[str, Any]:
+        """Load the manifest of an unfinished backfill, or split the input into a new one."""
+        if self.manifest_path.exists() and not restart:
+            manifest = read_state(self.manifest_path)
+            if manifest.get("input_files") != self._input_ids() or manifest.get("by_file") != self.by_file:
+                raise RuntimeError(
+                    f"Input files changed since the backfill in {self.work_dir} started; rerun with --restart."
+                )
+            LOGGER.info("Resuming backfill %s (%s committed)", manifest["backfill_id"], len(manifest["committed"]))
+            return manifest
+        if self.work_dir.exists():
+            shutil.rmtree(self.work_dir)
+
+        engine = _engine(self.config)
+        ingest = ArrowCsvIngestStage() if engine == "arrow" else CsvIngestStage()
+        prefetch_depth = (self.config.execution or {}).get("prefetch_depth", 2)
+        raw, file_ids, _, _ = ingest._read_input(
+            Path(self.config.input_path), {}, prefetch_depth=prefetch_depth, text_columns=text_columns(self.config)
+        )
+        rename_map = {
+            ingest._normalize_column(source): target
+            for target, source in self.config.columns.items()
+            if source
+        }
+        raw = ingest._rename_columns(raw, rename_map)
+        raw = ingest._encode_columns(raw, categorical_columns(self.config))
+        columns = raw.column_names if isinstance(raw, pa.Table) else list(raw.columns)
+        if "assessment_year" not in columns:
+            raise ValueError("Backfill needs an assessment_year column to partition on.")
+
+        def column(name: str) -> pd.Series:
+            values = raw[name].to_pandas() if isinstance(raw, pa.Table) else raw[name]
+            return values.reset_index(drop=True)
+
+        keys = pd.DataFrame({"year": pd.to_numeric(column("assessment_year"), errors="coerce")})
+        if self.by_file:
+            keys["file"] = column("source_file")
+        if self.years:
+            keys = keys[keys["year"].isin(self.years)]
+
+        now = datetime.now(tz=SG_TZ)
+        backfill_id = now.strftime("%Y%m%dT%H%M%S")
+        partitions = []
+        groups = keys.groupby(["year", "file"] if self.by_file else ["year"], dropna=False, sort=True).indices
+        for group, positions in groups.items():
+            group = group if isinstance(group, tuple) else (group,)
+            year, source_file = group[0], group[1] if self.by_file else None
+            rows = keys.index.to_numpy()[positions]
+            partition_id = _partition_id(year, source_file)
+            part = raw.take(pa.array(rows)) if isinstance(raw, pa.Table) else raw.iloc[rows].reset_index(drop=True)
+            _write_table(part, self.work_dir / "partitions" / partition_id / "input.parquet")
+            partitions.append(
+                {
+                    "id": partition_id,
+                    "assessment_year": int(year) if pd.notna(year) else None,
+                    "source_file": source_file,
+                    "rows": int(len(rows)),
+                    "run_id": f"backfill_{backfill_id}_{partition_id}",
+                    # Spaced apart so SCD2 versions order by partition, whatever order workers finish in.
+                    "run_timestamp": (now + timedelta(milliseconds=len(partitions))).isoformat(),
+                }
+            )
+        manifest = {
+            "backfill_id": backfill_id,
+            "created_at": now.isoformat(),
+            "input_files": file_ids,
+            "by_file": self.by_file,
+            "years": self.years,
+            "partitions": partitions,
+            "committed": [],
+        }
+        write_state(self.manifest_path, manifest)
+        LOGGER.info("Backfill %s split into %s partitions", backfill_id, len(partitions))
+        return manifest
+
+    # Execution ----------------------------------------------------------------
+
+    def _partition_dir(self, partition: Dict[str, Any]) -> Path:
+        return self.work_dir / "partitions" / partition["id"]
+
+    def run(self, restart: bool = False) -> Dict[str, Any]:
+        manifest = self.prepare(restart=restart)
+        self._replay_commit(manifest)
+        committed = set(manifest["committed"])
+        pending = [partition for partition in manifest["partitions"] if partition["id"] not in committed]
+
+        summary = {"backfill_id": manifest["backfill_id"], "resumed": sorted(committed), "committed": []}
+        transform = [p for p in pending if not (self._partition_dir(p) / "transformed.json").exists()]
+        workers = max(1, min(self.workers, len(transform) or 1))
+        LOGGER.info("Transforming %s partitions on %s workers", len(transform), workers)
+        if workers == 1:
+            for partition in transform:
+                task, *args = self._task(partition)
+                task(*args)
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                futures: List[Future] = [executor.submit(*self._task(p)) for p in transform]
+                for future in futures:
+                    future.result()
+            finally:
+                executor.shutdown(cancel_futures=True)
+
+        if pending:
+            self._commit(manifest, pending)
+            summary["committed"] = [partition["id"] for partition in pending]
+        self._finish(manifest)
+        return summary
+
+    def _task(self, partition: Dict[str, Any]) -> tuple:
+        return (
+            _transform_partition,
+            self.config,
+            str(self._partition_dir(partition)),
+            partition["run_id"],
+            partition["run_timestamp"],
+        )
+
+    def _live_locks(self):
+        return table_locks(lock_dir(self.config), COMMIT_LOCKS, lock_timeout(self.config))
+
+    def _commit(self, manifest: Dict[str, Any], partitions: List[Dict[str, Any]]) -> None:
+        """Write every partition into one staged copy of the committed zones, then swap it in."""
+        # No other run may commit between the copy and the swap, or the swap would undo it.
+        with self._live_locks():
+            self._stage_and_swap(manifest, partitions)
+
+    def _stage_and_swap(self, manifest: Dict[str, Any], partitions: List[Dict[str, Any]]) -> None:
+        stage_root = self.work_dir / "commit"
+        if stage_root.exists():
+            shutil.rmtree(stage_root)
+        staged = {key: stage_root / key for key in COMMITTED_ZONES}
+        # One copy for the whole backfill: the partitions are written into it in order.
+        for key, target in staged.items():
+            if self.zones[key].exists():
+                # Lock files belong to the live zone, and the append-only DQ history only
+                # gains new run partitions, so neither is copied.
+                shutil.copytree(
+                    self.zones[key],
+                    target,
+                    ignore=shutil.ignore_patterns(LOCK_DIR_NAME, "dq_history"),
+                    copy_function=_stage_copy,
+                )
+            else:
+                target.mkdir(parents=True)
+
+        config = replace(
+            self.config,
+            layers={**(self.config.layers or {}), **{key: str(path) for key, path in staged.items()}},
+            incremental={**(self.config.incremental or {}), "enabled": False},
+        )
+        engine = _engine(self.config)
+        for partition in partitions:
+            partition_dir = self._partition_dir(partition)
+            artifacts = {
+                key: _read_table(
+                    partition_dir / "artifacts" / f"{key}.parquet", "pandas" if key in PANDAS_ARTIFACTS else engine
+                )
+                for key in ARTIFACTS
+            }
+            artifacts.update({"run_id": partition["run_id"], "run_timestamp": partition["run_timestamp"]})
+            context = PipelineContext(config=config, artifacts=artifacts)
+            WriteStage().run(context, artifacts["validated"])
+            LOGGER.info("Wrote backfill partition %s", partition["id"])
+        self._rebuild_datamart(manifest, staged)
+
+        # Only the files the backfill wrote go back; untouched copies are dropped.
+        moves = [
+            [str(path), str(self.zones[key] / path.relative_to(staged[key]))]
+            for key in COMMITTED_ZONES
+            for path in sorted(staged[key].rglob("*"))
+            if path.is_file()
+            and LOCK_DIR_NAME not in path.relative_to(staged[key]).parts
+            and path.stat().st_mtime_ns != _STAGED_MTIME_NS
+        ]
+        write_state(self.work_dir / "commit.json", {"partitions": [p["id"] for p in partitions], "moves": moves})
+        self._apply_commit(manifest)
+
+    def _replay_commit(self, manifest: Dict[str, Any]) -> None:
+        """Finish a swap whose commit intent outlived its process."""
+        if (self.work_dir / "commit.json").exists():
+            with self._live_locks():
+                self._apply_commit(manifest)
+
+    def _apply_commit(self, manifest: Dict[str, Any]) -> None:
+        intent_path = self.work_dir / "commit.json"
+        intent = read_state(intent_path)
+        for source, target in intent["moves"]:
+            if Path(source).exists():
+                Path(target).parent.mkdir(parents=True, exist_ok=True)
+                os.replace(source, target)
+        manifest["committed"].extend(intent["partitions"])
+        write_state(self.manifest_path, manifest)
+        intent_path.unlink()
+        shutil.rmtree(self.work_dir / "commit", ignore_errors=True)
+        LOGGER.info("Committed backfill partitions %s", ", ".join(intent["partitions"]))
+
+    def _rebuild_datamart(self, manifest: Dict[str, Any], zones: Dict[str, Path]) -> None:
+        """Join every current fact the backfill wrote to ``zones``, as one run over the whole input would."""
+        curated = zones["curated_dir"]
+        paths = {name: curated / f"{name}.parquet" for name in ["fact_tax_returns", "dim_taxpayer", "dim_geo"]}
+        if not all(path.exists() for path in paths.values()):
+            return
+        engine = _engine(self.config)
+        run_ids = [partition["run_id"] for partition in manifest["partitions"]]
+        facts = pq.read_table(
+            paths["fact_tax_returns"],
+            filters=[("is_current", "=", True), ("last_seen_run_id", "in", run_ids)],
+        )
+        # A run joins its facts before they gain SCD2 columns; the taxpayer's come from the dim.
+        facts = facts.drop_columns([name for name in SCD2_COLUMNS if name in facts.column_names])
+        dim_geo = pq.read_table(paths["dim_geo"])
+        dim_taxpayer = _read_table(paths["dim_taxpayer"], engine)
+        # Runs join filing_date as parsed, naive UTC; the SCD2 upsert localised it.
+        if engine == "arrow":
+            index = facts.schema.get_field_index("filing_date")
+            naive = pa.timestamp(facts.schema.field(index).type.unit)
+            facts = facts.set_column(index, "filing_date", facts["filing_date"].cast(naive))
+            facts = facts.replace_schema_metadata(None)
+        else:
+            facts, dim_geo = facts.to_pandas(), dim_geo.to_pandas()
+            facts["filing_date"] = facts["filing_date"].dt.tz_convert(None)
+        WriteStage._write_datamart(
+            curated, zones["datamart_dir"], dim_taxpayer, dim_geo, facts, self.config.source_name
+        )
+        LOGGER.info("Rebuilt the datamart from %s backfilled facts", len(facts))
+
+    def _finish(self, manifest: Dict[str, Any]) -> None:
+        """Advance the state store past the backfilled files and drop the work directory."""
+        if (self.config.export or {}).get("enabled"):
+            # The backfill's writes bypass ExportStage; one sync picks them all up.
+            from src.export import TableExporter
+
+            TableExporter(self.config).run()
+        incremental = self.config.incremental or {}
+        if incremental.get("enabled"):
+            state_path = Path(incremental.get("state_path", "outputs/metadata/state.json"))
+            state = read_state(state_path)
+            years = [p["assessment_year"] for p in manifest["partitions"] if p["assessment_year"] is not None]
+            last_year = state.get("last_assessment_year")
+            state["last_assessment_year"] = max([year for year in [last_year] + years if year is not None], default=None)
+            if incremental.get("track_files"):
+                state["processed_files"] = sorted(set(state.get("processed_files", [])) | set(manifest["input_files"]))
+            write_state(state_path, state)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        LOGGER.info("Backfill %s finished: %s partitions", manifest["backfill_id"], len(manifest["partitions"]))
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields, replace
+from pathlib import Path
+from typing import Any, Dict, List
+
+from src.bench.synthetic import SyntheticSpec, write_tax_returns_csv
+from src.config import PipelineConfig, load_config
+from src.main import build_pipeline
+from src.utils.logging import setup_logging
+from src.utils.profiling import RunProfiler, peak_rss_mb
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+DEFAULT_ERROR_RATES = {
+    "rule_nric_format": 0.01,
+    "rule_postal_code": 0.01,
+    "rule_filing_date_after_assessment": 0.01,
+    "rule_chargeable_income": 0.01,
+    "rule_cpf_residency": 0.01,
+}
+
+
+def _relocate(value: Any, source: Path, target: Path) -> Any:
+    """``value`` with any path under ``source`` moved under ``target``, recursing into dicts."""
+    if isinstance(value, dict):
+        return {key: _relocate(item, source, target) for key, item in value.items()}
+    if isinstance(value, str) and value:
+        path = Path(value)
+        if path == source or source in path.parents:
+            return str(target / path.relative_to(source))
+    return value
+
+
+def _bench_config(base: PipelineConfig, workdir: Path, engine: str = "pandas") -> PipelineConfig:
+    output_dir = workdir / "outputs"
+    # Every section is kept; only the paths under the configured output_dir move.
+    sections = {
+        item.name: _relocate(getattr(base, item.name), Path(base.output_dir), output_dir)
+        for item in fields(base)
+        if isinstance(getattr(base, item.name), dict)
+    }
+    sections["profiling"] = {**sections["profiling"], "enabled": True}
+    sections["execution"] = {**sections["execution"], "engine": engine}
+    return replace(
+        base,
+        **sections,
+        input_path=str(workdir / "input" / "synthetic_tax_returns.csv"),
+        output_dir=str(output_dir),
+        archive_dir=str(workdir / "archive"),
+    )
+
+
+def run_benchmark(config_path: str, rows: int, seed: int, engine: str = "pandas") -> Dict[str, Any]:
+    """Generate ``rows`` synthetic returns and time each stage of one pipeline run."""
+    base = load_config(Path(config_path))
+    with tempfile.TemporaryDirectory(prefix="tax_bench_") as tmp:
+        workdir = Path(tmp)
+        config = _bench_config(base, workdir, engine)
+        spec = SyntheticSpec(rows=rows, seed=seed, error_rates=DEFAULT_ERROR_RATES)
+        write_tax_returns_csv(spec, Path(config.input_path))
+
+        pipeline, context = build_pipeline(config)
+        context.profiler = RunProfiler(context.artifacts["run_id"])
+        started = time.perf_counter()
+        pipeline.run(context)
+        total_wall = time.perf_counter() - started
+
+    stages = {}
+    for record in context.profiler.records:
+        if record["kind"] != "stage":
+            continue
+        wall = record["wall_s"]
+        stages[record["name"]] = {
+            "wall_s": round(wall, 4),
+            "rows_per_s": round(rows / wall, 1) if wall else None,
+        }
+    return {
+        "rows": rows,
+        "engine": engine,
+        "total_wall_s": round(total_wall, 4),
+        "rows_per_s": round(rows / total_wall, 1) if total_wall else None,
+        "peak_rss_mb": round(peak_rss_mb() or 0.0, 1),
+        "stages": stages,
+    }
+
+
+def result_key(rows: int, engine: str) -> str:
+    return str(rows) if engine == "pandas" else f"{engine}:{rows}"
+
+
+def run_suite(
+    config_path: str, sizes: List[int], seed: int, engines: List[str] = ("pandas",)
+) -> Dict[str, Any]:
+    results = {}
+    # A fresh process per run keeps the peak RSS reading specific to that run.
+    context = multiprocessing.get_context("spawn")
+    for rows in sizes:
+        for engine in engines:
+            LOGGER.info("Benchmarking %s rows with the %s engine", rows, engine)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results[result_key(rows, engine)] = executor.submit(
+                    run_benchmark, config_path, rows, seed, engine
+                ).result()
+    return results
+
+
+def compare_to_baseline(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    regressions = []
+    for size, result in results.items():
+        reference = baseline.get(size)
+        if not reference:
+            continue
+        checks = [("total_wall_s", result["total_wall_s"], reference["total_wall_s"])]
+        checks.append(("peak_rss_mb", result["peak_rss_mb"], reference["peak_rss_mb"]))
+        for stage, stage_result in result["stages"].items():
+            stage_reference = reference.get("stages", {}).get(stage)
+            if stage_reference:
+                checks.append((f"{stage}.wall_s", stage_result["wall_s"], stage_reference["wall_s"]))
+        for name, current, expected in checks:
+            if expected and current > expected * (1 + threshold):
+                regressions.append(
+                    f"{size} rows: {name} {current} exceeds baseline {expected} by more than {threshold:.0%}"
+                )
+    return regressions
+
+
+def format_engine_comparison(results: Dict[str, Any], sizes: List[int], engines: List[str]) -> str:
+    """Render per-stage wall times of each engine side by side, relative to the first engine."""
+    reference_engine = engines[0]
+    lines = []
+    for rows in sizes:
+        reference = results[result_key(rows, reference_engine)]
+        lines.append(f"{rows} rows")
+        header = f"  {'stage':<12}" + "".join(f"{engine:>12}" for engine in engines) + f"{'speedup':>10}"
+        lines.append(header)
+        stage_names = list(reference["stages"]) + ["total"]
+        for stage in stage_names:
+            walls = []
+            for engine in engines:
+                result = results[result_key(rows, engine)]
+                wall = result["total_wall_s"] if stage == "total" else result["stages"].get(stage, {}).get("wall_s")
+                walls.append(wall)
+            speedup = walls[0] / walls[-1] if walls[0] and walls[-1] else float("nan")
+            cells = "".join(f"{wall:>12.3f}" if wall is not None else f"{'-':>12}" for wall in walls)
+            lines.append(f"  {stage:<12}{cells}{speedup:>9.2f}x")
+        peaks = "".join(
+            f"{results[result_key(rows, engine)]['peak_rss_mb']:>12.1f}" for engine in engines
+        )
+        lines.append(f"  {'peak_rss_mb':<12}{peaks}")
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the tax pipeline on synthetic data.")
+    parser.add_argument("--config", default="configs/pipeline.yaml")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        choices=["pandas", "arrow"],
+        default=["pandas"],
+        help="Execution engines to benchmark on the same generated input.",
+    )
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    parser.add_argument("--baseline", default="benchmarks/baseline.json")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed relative slowdown or memory growth before flagging a regression.",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Merge these results into the baseline file instead of comparing.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    setup_logging()
+    args = parse_args()
+    results = run_suite(args.config, args.sizes, args.seed, args.engines)
+    print(json.dumps(results, indent=2))
+    if len(args.engines) > 1:
+        print(format_engine_comparison(results, args.sizes, args.engines))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+    if args.update_baseline:
+        baseline.update(results)
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+        LOGGER.info("Baseline updated at %s", baseline_path)
+        return
+
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    for regression in regressions:
+        LOGGER.warning("Regression: %s", regression)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
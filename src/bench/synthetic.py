@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+SOURCE_COLUMNS = [
+    "taxpayer_id",
+    "nric",
+    "full_name",
+    "filing_status",
+    "assessment_year",
+    "filing_date",
+    "annual_income_sgd",
+    "chargeable_income_sgd",
+    "tax_payable_sgd",
+    "tax_paid_sgd",
+    "total_reliefs_sgd",
+    "number_of_dependents",
+    "occupation",
+    "residential_status",
+    "postal_code",
+    "housing_type",
+    "cpf_contributions_sgd",
+    "foreign_income_sgd",
+]
+
+# Postal sectors 01-82 that map to a district (sector 74 is unassigned).
+POSTAL_SECTORS = [sector for sector in range(1, 83) if sector != 74]
+
+RULE_NAMES = [
+    "rule_nric_format",
+    "rule_postal_code",
+    "rule_filing_date_after_assessment",
+    "rule_chargeable_income",
+    "rule_cpf_residency",
+]
+
+_SURNAMES = ["Tan", "Lim", "Lee", "Ng", "Ong", "Wong", "Goh", "Chua", "Chan", "Koh", "Teo", "Ang"]
+_GIVEN_NAMES = [
+    "Wei Ming", "Hui Ling", "Jun Jie", "Mei Fen", "Kai Wen", "Xin Yi",
+    "Ahmad", "Siti", "Ravi", "Priya", "Daniel", "Rachel",
+]
+_FILING_STATUSES = ["Single", "Married"]
+_OCCUPATIONS = [
+    "Manager", "Consultant", "Engineer", "Director", "Analyst", "Developer",
+    "Designer", "Writer", "Accountant", "Software Engineer", "Project Manager",
+]
+_HOUSING_TYPES = [
+    "Private Condo", "HDB 4-room", "HDB 3-room", "HDB 2-room",
+    "HDB 5-room", "Landed Property", "CBD Office",
+]
+_NRIC_PREFIXES = np.array(["S", "T", "F", "G"])
+_NRIC_WEIGHTS = np.array([2, 7, 6, 5, 4, 3, 2])
+_NRIC_CHECK_SG = np.array(list("JZIHGFEDCBA"))
+_NRIC_CHECK_FG = np.array(list("XWUTRQPNMLK"))
+_SERIAL_SPACE = 10_000_000
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+@dataclass
+class SyntheticSpec:
+    rows: int
+    seed: int = 42
+    years: List[int] = field(default_factory=lambda: [2019, 2020, 2021, 2022, 2023])
+    error_rates: Dict[str, float] = field(default_factory=dict)
+    non_resident_rate: float = 0.05
+
+    def __post_init__(self) -> None:
+        unknown = set(self.error_rates) - set(RULE_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown rules in error_rates: {sorted(unknown)}")
+
+
+def _serials(seed: int, first: int, count: int) -> np.ndarray:
+    # An affine bijection of the 7-digit serials: taxpayers in different chunks never share one.
+    if first + count > _SERIAL_SPACE:
+        raise ValueError(f"At most {_SERIAL_SPACE} taxpayers fit the 7-digit NRIC serials")
+    multiplier, offset = np.random.default_rng(seed).integers(1, _SERIAL_SPACE, size=2)
+    while multiplier % 2 == 0 or multiplier % 5 == 0:
+        multiplier += 1
+    return (multiplier * np.arange(first, first + count, dtype=np.int64) + offset) % _SERIAL_SPACE
+
+
+def _nric_numbers(rng: np.random.Generator, serials: np.ndarray) -> np.ndarray:
+    count = len(serials)
+    prefixes = _NRIC_PREFIXES[rng.integers(0, len(_NRIC_PREFIXES), size=count)]
+    digits = (serials[:, None] // (10 ** np.arange(6, -1, -1))) % 10
+    checksum = (digits * _NRIC_WEIGHTS).sum(axis=1)
+    checksum = checksum + np.where(np.isin(prefixes, ["T", "G"]), 4, 0)
+    is_sg = np.isin(prefixes, ["S", "T"])
+    letters = np.where(is_sg, _NRIC_CHECK_SG[checksum % 11], _NRIC_CHECK_FG[checksum % 11])
+    return np.char.add(
+        np.char.add(prefixes, np.char.zfill(serials.astype(str), 7)), letters
+    )
+
+
+def iter_tax_returns(spec: SyntheticSpec, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield the batch in chunks of whole taxpayers, each drawn from a seed derived from ``spec.seed``."""
+    per_chunk = max(len(spec.years), chunk_rows - chunk_rows % len(spec.years))
+    for index, start in enumerate(range(0, spec.rows, per_chunk)):
+        rng = np.random.default_rng(np.random.SeedSequence(spec.seed, spawn_key=(index,)))
+        yield _generate_chunk(spec, rng, start, min(per_chunk, spec.rows - start))
+
+
+def generate_tax_returns(spec: SyntheticSpec, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> pd.DataFrame:
+    """Build a deterministic batch of tax returns shaped like the source CSV."""
+    return pd.concat(iter_tax_returns(spec, chunk_rows), ignore_index=True)
+
+
+def _generate_chunk(spec: SyntheticSpec, rng: np.random.Generator, start: int, rows: int) -> pd.DataFrame:
+    years = np.array(sorted(spec.years))
+    taxpayer_count = max(1, -(-rows // len(years)))
+
+    serials = _serials(spec.seed, start // len(years), taxpayer_count)
+    nrics = _nric_numbers(rng, serials)
+    sectors = np.array(POSTAL_SECTORS)[rng.integers(0, len(POSTAL_SECTORS), size=taxpayer_count)]
+    postal_codes = np.char.add(
+        np.char.zfill(sectors.astype(str), 2),
+        np.char.zfill(rng.integers(0, 10_000, size=taxpayer_count).astype(str), 4),
+    )
+    is_resident = rng.random(taxpayer_count) >= spec.non_resident_rate
+    names = np.char.add(
+        np.char.add(np.array(_SURNAMES)[rng.integers(0, len(_SURNAMES), size=taxpayer_count)], " "),
+        np.array(_GIVEN_NAMES)[rng.integers(0, len(_GIVEN_NAMES), size=taxpayer_count)],
+    )
+    base_income = np.round(rng.lognormal(mean=11.1, sigma=0.4, size=taxpayer_count), -2)
+
+    # Each taxpayer files once per assessment year, giving a multi-year history.
+    row_index = np.arange(rows)
+    taxpayer = row_index // len(years)
+    assessment_year = years[row_index % len(years)]
+
+    growth = 1 + 0.03 * (assessment_year - years[0])
+    annual_income = np.round(base_income[taxpayer] * growth, -2).astype(np.int64)
+    total_reliefs = np.round(annual_income * rng.uniform(0.08, 0.2, size=rows)).astype(np.int64)
+    chargeable_income = annual_income - total_reliefs
+    resident = is_resident[taxpayer]
+    cpf = np.where(resident, np.minimum(annual_income * 0.2, 20_400), 0).astype(np.int64)
+    tax_payable = np.round(np.maximum(chargeable_income - 20_000, 0) * 0.11).astype(np.int64)
+    tax_paid = np.round(tax_payable * rng.uniform(0.9, 1.1, size=rows)).astype(np.int64)
+    foreign_income = np.where(rng.random(rows) < 0.05, rng.integers(1, 50, size=rows) * 500, 0)
+    filing_dates = (
+        pd.to_datetime((assessment_year + 1).astype(str), format="%Y")
+        + pd.to_timedelta(rng.integers(0, 181, size=rows), unit="D")
+    )
+
+    frame = pd.DataFrame(
+        {
+            "taxpayer_id": np.char.add("SG", np.char.zfill(serials[taxpayer].astype(str), 7)),
+            "nric": nrics[taxpayer],
+            "full_name": names[taxpayer],
+            "filing_status": np.array(_FILING_STATUSES)[rng.integers(0, 2, size=rows)],
+            "assessment_year": assessment_year,
+            "filing_date": filing_dates.strftime("%Y-%m-%d"),
+            "annual_income_sgd": annual_income,
+            "chargeable_income_sgd": chargeable_income,
+            "tax_payable_sgd": tax_payable,
+            "tax_paid_sgd": tax_paid,
+            "total_reliefs_sgd": total_reliefs,
+            "number_of_dependents": rng.integers(0, 4, size=rows),
+            "occupation": np.array(_OCCUPATIONS)[rng.integers(0, len(_OCCUPATIONS), size=rows)],
+            "residential_status": np.where(resident, "Resident", "Non-Resident"),
+            "postal_code": postal_codes[taxpayer],
+            "housing_type": np.array(_HOUSING_TYPES)[rng.integers(0, len(_HOUSING_TYPES), size=rows)],
+            "cpf_contributions_sgd": cpf,
+            "foreign_income_sgd": foreign_income,
+        },
+        columns=SOURCE_COLUMNS,
+    )
+    _inject_errors(frame, spec.error_rates, rng)
+    return frame
+
+
+def _inject_errors(frame: pd.DataFrame, error_rates: Dict[str, float], rng: np.random.Generator) -> None:
+    rows = len(frame)
+    for rule in RULE_NAMES:
+        rate = error_rates.get(rule, 0.0)
+        if not rate:
+            continue
+        mask = rng.random(rows) < rate
+        if rule == "rule_nric_format":
+            frame.loc[mask, "nric"] = frame.loc[mask, "nric"].str[:-1]
+        elif rule == "rule_postal_code":
+            frame.loc[mask, "postal_code"] = frame.loc[mask, "postal_code"].str[:5]
+        elif rule == "rule_filing_date_after_assessment":
+            frame.loc[mask, "filing_date"] = (
+                frame.loc[mask, "assessment_year"].astype(str) + "-06-30"
+            )
+        elif rule == "rule_chargeable_income":
+            frame.loc[mask, "chargeable_income_sgd"] += 1_000
+        elif rule == "rule_cpf_residency":
+            frame.loc[mask, "residential_status"] = "Resident"
+            frame.loc[mask, "cpf_contributions_sgd"] = 0
+
+
+def write_tax_returns_csv(spec: SyntheticSpec, path: Path, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Path:
+    """Append the batch to ``path`` one chunk at a time, so memory stays bounded by ``chunk_rows``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for index, chunk in enumerate(iter_tax_returns(spec, chunk_rows)):
+        chunk.to_csv(path, index=False, mode="w" if index == 0 else "a", header=index == 0)
+    return path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate synthetic tax returns.")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", required=True, help="Destination CSV path.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--years", type=int, nargs="+", default=[2019, 2020, 2021, 2022, 2023])
+    parser.add_argument(
+        "--error-rate",
+        action="append",
+        default=[],
+        metavar="RULE=RATE",
+        help="Fraction of rows violating a rule, e.g. rule_postal_code=0.02.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    error_rates = {}
+    for item in args.error_rate:
+        rule, rate = item.split("=", 1)
+        error_rates[rule] = float(rate)
+    spec = SyntheticSpec(rows=args.rows, seed=args.seed, years=args.years, error_rates=error_rates)
+    write_tax_returns_csv(spec, Path(args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Metadata-only subcommands; they must not import pandas, pyarrow or the pipeline stages."""
+
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+from src.config import PipelineConfig, load_config
+from src.state import input_files, parse_file_id, read_state, source_file_id
+
+ENGINES = {"pandas", "arrow"}
+WATCH_BACKENDS = {"auto", "inotify", "polling"}
+COMPACTION_ZONES = {"raw", "staging", "quarantine"}
+SINK_TYPES = {"local", "s3"}
+EXPORT_BACKENDS = {"sqlite", "duckdb"}
+EXPORT_TABLES = {"dim_geo", "dim_taxpayer", "fact_tax_returns", "datamart_tax_returns"}
+LAYER_KEYS = {"landing_dir", "raw_dir", "staging_dir", "curated_dir", "datamart_dir"}
+# Columns a rollup can group by: the fact's assessment_year, taxpayer attributes and region.
+ROLLUP_COLUMNS = {
+    "assessment_year",
+    "region",
+    "residential_status",
+    "housing_type",
+    "filing_status",
+    "occupation",
+    "number_of_dependents",
+    "geo_id",
+}
+
+
+def _state_path(config: PipelineConfig) -> Path:
+    return Path((config.incremental or {}).get("state_path", "outputs/metadata/state.json"))
+
+
+def _ledger_path(config: PipelineConfig) -> Path:
+    return Path(
+        (config.incremental or {}).get("ledger_path") or Path(config.output_dir) / "metadata" / "processed_files.csv"
+    )
+
+
+def _print(payload: Any, as_json: bool, lines: List[str]) -> None:
+    if as_json:
+        print(json.dumps(payload, indent=2, default=str))
+    else:
+        print("\n".join(lines))
+
+
+def build_plan(config: PipelineConfig) -> Dict[str, Any]:
+    incremental = config.incremental or {}
+    track_files = incremental.get("enabled") and incremental.get("track_files", False)
+    processed = set(read_state(_state_path(config)).get("processed_files", [])) if track_files else set()
+    files = []
+    for path in input_files(Path(config.input_path)):
+        file_id = source_file_id(path)
+        files.append(
+            {
+                "path": str(path),
+                "file_id": file_id,
+                "bytes": path.stat().st_size,
+                "action": "skip (already processed)" if file_id in processed else "ingest",
+            }
+        )
+    ingest = [item for item in files if item["action"] == "ingest"]
+    return {
+        "input_path": config.input_path,
+        "files": files,
+        "ingest_files": len(ingest),
+        "ingest_bytes": sum(item["bytes"] for item in ingest),
+    }
+
+
+def status(config: PipelineConfig, as_json: bool = False) -> int:
+    incremental = config.incremental or {}
+    state_path = _state_path(config)
+    state = read_state(state_path)
+    plan = build_plan(config)
+    payload = {
+        "state_path": str(state_path),
+        "state_exists": state_path.exists(),
+        "incremental_enabled": bool(incremental.get("enabled")),
+        "watermark_key": incremental.get("key", "assessment_year"),
+        "last_assessment_year": state.get("last_assessment_year"),
+        "allow_backfill": bool(incremental.get("allow_backfill", False)),
+        "processed_files": len(state.get("processed_files", [])),
+        "pending_files": plan["ingest_files"],
+        "pending_bytes": plan["ingest_bytes"],
+    }
+    lines = [f"{key}: {value}" for key, value in payload.items()]
+    _print(payload, as_json, lines)
+    return 0
+
+
+def ledger(config: PipelineConfig, as_json: bool = False) -> int:
+    ledger_path = _ledger_path(config)
+    if ledger_path.exists():
+        with ledger_path.open("r", encoding="utf-8", newline="") as handle:
+            rows = list(csv.DictReader(handle))
+    else:
+        # Older runs may only have recorded file ids in the state store.
+        rows = [
+            {"file_id": file_id, **parse_file_id(file_id)}
+            for file_id in read_state(_state_path(config)).get("processed_files", [])
+        ]
+    lines = [
+        f"{row.get('file_name')}\t{row.get('file_size')} bytes\tmtime={row.get('file_mtime')}"
+        f"\tprocessed_at={row.get('processed_at', '')}"
+        for row in rows
+    ] or ["No processed files recorded."]
+    _print(rows, as_json, lines)
+    return 0
+
+
+def plan(config: PipelineConfig, as_json: bool = False) -> int:
+    payload = build_plan(config)
+    state = read_state(_state_path(config))
+    incremental = config.incremental or {}
+    lines = [f"{item['action']}\t{item['bytes']} bytes\t{item['path']}" for item in payload["files"]]
+    if not lines:
+        lines.append(f"No input files found at {config.input_path}")
+    lines.append(f"Would ingest {payload['ingest_files']} file(s), {payload['ingest_bytes']} bytes.")
+    if incremental.get("enabled") and state.get("last_assessment_year") is not None:
+        backfill = "allowed" if incremental.get("allow_backfill") else "dropped"
+        lines.append(
+            f"Rows with {incremental.get('key', 'assessment_year')} < "
+            f"{state['last_assessment_year']} are {backfill}."
+        )
+    _print(payload, as_json, lines)
+    return 0
+
+
+def config_errors(config: PipelineConfig) -> List[str]:
+    errors = []
+    unknown_layers = set(config.layers or {}) - LAYER_KEYS
+    if unknown_layers:
+        errors.append(f"layers: unknown keys {sorted(unknown_layers)}")
+    for target, source in (config.columns or {}).items():
+        if source is not None and not isinstance(source, str):
+            errors.append(f"columns.{target}: expected a source column name, got {source!r}")
+    missing = [col for col in config.required_columns if col not in (config.columns or {})]
+    if missing:
+        errors.append(f"required_columns not mapped under columns: {missing}")
+
+    tolerance = (config.quality_tolerance or {}).get("income_diff", 0.01)
+    if not isinstance(tolerance, (int, float)) or tolerance < 0:
+        errors.append("quality_tolerance.income_diff must be a non-negative number")
+
+    incremental = config.incremental or {}
+    if incremental.get("enabled") and incremental.get("key", "assessment_year") not in (config.columns or {}):
+        errors.append(f"incremental.key {incremental.get('key')!r} is not a mapped column")
+
+    execution = config.execution or {}
+    if execution.get("engine", "pandas") not in ENGINES:
+        errors.append(f"execution.engine must be one of {sorted(ENGINES)}")
+    for key in ["shards", "workers"]:
+        value = execution.get(key)
+        if value is not None and (not isinstance(value, int) or value < 1):
+            errors.append(f"execution.{key} must be a positive integer")
+    prefetch_depth = execution.get("prefetch_depth")
+    if prefetch_depth is not None and (not isinstance(prefetch_depth, int) or prefetch_depth < 0):
+        errors.append("execution.prefetch_depth must be a non-negative integer")
+
+    budget = (config.artifact_store or {}).get("memory_budget_mb")
+    if budget is not None and (not isinstance(budget, (int, float)) or budget <= 0):
+        errors.append("artifact_store.memory_budget_mb must be a positive number or empty")
+
+    watch = config.watch or {}
+    if watch.get("backend", "auto") not in WATCH_BACKENDS:
+        errors.append(f"watch.backend must be one of {sorted(WATCH_BACKENDS)}")
+    for key in ["debounce_seconds", "max_batch_wait_seconds", "poll_interval_seconds"]:
+        value = watch.get(key)
+        if value is not None and (not isinstance(value, (int, float)) or value < 0):
+            errors.append(f"watch.{key} must be a non-negative number")
+
+    row_group_size = (config.lookup_index or {}).get("row_group_size")
+    if row_group_size is not None and (not isinstance(row_group_size, int) or row_group_size < 1):
+        errors.append("lookup_index.row_group_size must be a positive integer or empty")
+
+    max_segments = (config.dedup or {}).get("max_segments")
+    if max_segments is not None and (not isinstance(max_segments, int) or max_segments < 1):
+        errors.append("dedup.max_segments must be a positive integer or empty")
+
+    categorical_cols = (config.categorical or {}).get("columns")
+    if categorical_cols is not None and (
+        not isinstance(categorical_cols, list) or not all(isinstance(col, str) for col in categorical_cols)
+    ):
+        errors.append("categorical.columns must be a list of column names or empty")
+
+    lock_timeout = (config.locking or {}).get("timeout_seconds")
+    if lock_timeout is not None and (not isinstance(lock_timeout, (int, float)) or lock_timeout <= 0):
+        errors.append("locking.timeout_seconds must be a positive number or empty")
+
+    sink = config.sink or {}
+    sink_type = sink.get("type") or "local"
+    if sink_type not in SINK_TYPES:
+        errors.append(f"sink.type must be one of {sorted(SINK_TYPES)}")
+    elif sink_type == "s3" and not str(sink.get("uri") or "").startswith("s3://"):
+        errors.append("sink.uri must be an s3:// URI when sink.type is s3")
+    io_threads = sink.get("io_threads")
+    if io_threads is not None and (not isinstance(io_threads, int) or io_threads < 1):
+        errors.append("sink.io_threads must be a positive integer or empty")
+
+    export = config.export or {}
+    if (export.get("backend") or "sqlite") not in EXPORT_BACKENDS:
+        errors.append(f"export.backend must be one of {sorted(EXPORT_BACKENDS)}")
+    export_tables = export.get("tables")
+    if export_tables is not None and (not isinstance(export_tables, list) or set(export_tables) - EXPORT_TABLES):
+        errors.append(f"export.tables must be a list drawn from {sorted(EXPORT_TABLES)} or empty")
+
+    sample_rate = (config.quality_history or {}).get("results_sample_rate")
+    if sample_rate is not None and (not isinstance(sample_rate, (int, float)) or not 0 <= sample_rate <= 1):
+        errors.append("quality_history.results_sample_rate must be between 0 and 1 or empty")
+
+    compaction = config.compaction or {}
+    target_file_mb = compaction.get("target_file_mb")
+    if target_file_mb is not None and (not isinstance(target_file_mb, (int, float)) or target_file_mb <= 0):
+        errors.append("compaction.target_file_mb must be a positive number or empty")
+    retention = compaction.get("retention_days") or {}
+    if not isinstance(retention, dict):
+        errors.append("compaction.retention_days must map zones to a number of days")
+        retention = {}
+    for zone, days in retention.items():
+        if zone not in COMPACTION_ZONES:
+            errors.append(f"compaction.retention_days: unknown zone {zone}")
+        elif days is not None and (not isinstance(days, int) or days < 0):
+            errors.append(f"compaction.retention_days.{zone} must be a non-negative integer or empty")
+
+    grains = (config.rollups or {}).get("grains") or {}
+    if not isinstance(grains, dict):
+        errors.append("rollups.grains must map rollup names to column lists")
+        grains = {}
+    for name, grain in grains.items():
+        if not isinstance(grain, list) or not grain:
+            errors.append(f"rollups.grains.{name} must be a non-empty list of columns")
+            continue
+        unknown = [col for col in grain if col not in ROLLUP_COLUMNS]
+        if unknown:
+            errors.append(f"rollups.grains.{name}: unknown columns {unknown}")
+    return errors
+
+
+def validate_config(config_path: Path, as_json: bool = False) -> int:
+    try:
+        config = load_config(config_path)
+    except (OSError, KeyError, TypeError, AttributeError, ValueError, yaml.YAMLError) as exc:
+        errors = [f"cannot load {config_path}: {exc!r}"]
+        warnings = []
+    else:
+        errors = config_errors(config)
+        warnings = []
+        if not Path(config.input_path).exists():
+            warnings.append(f"input_path {config.input_path} does not exist yet")
+
+    payload = {"config": str(config_path), "valid": not errors, "errors": errors, "warnings": warnings}
+    lines = [f"ERROR: {error}" for error in errors] + [f"WARNING: {warning}" for warning in warnings]
+    lines.append(f"{config_path}: {'OK' if not errors else 'INVALID'}")
+    _print(payload, as_json, lines)
+    return 0 if not errors else 1
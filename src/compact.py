@@ -0,0 +1,289 @@
+"""Small-file compaction and retention for the raw, staging and quarantine zones."""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+import re
+import shutil
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.sinks import require_local_zones
+
+LOGGER = logging.getLogger(__name__)
+
+SG_TZ = ZoneInfo("Asia/Singapore")
+INTENT_FILE = "_compaction.json"
+LOG_COLUMNS = [
+    "compaction_id",
+    "action",
+    "zone",
+    "partition",
+    "input_files",
+    "output_files",
+    "rows",
+    "bytes_before",
+    "bytes_after",
+    "at",
+]
+DEFAULT_TARGET_FILE_MB = 128
+# File prefixes per zone; the longest prefix wins, so reports are not taken as snapshots.
+ZONE_PREFIXES = {
+    "raw": ("raw",),
+    "staging": ("staging",),
+    "quarantine": ("quarantine", "quarantine_breakdown", "quarantine_samples"),
+}
+_PARTITION = re.compile(r"^ingest_date=(\d{4}-\d{2}-\d{2})$")
+
+
+@dataclass
+class Partition:
+    zone: str
+    path: Path
+
+    @property
+    def ingest_date(self) -> Optional[date]:
+        match = _PARTITION.match(self.path.name)
+        return date.fromisoformat(match.group(1)) if match else None
+
+
+def _prefix(zone: str, path: Path) -> Optional[str]:
+    matches = [prefix for prefix in ZONE_PREFIXES[zone] if path.name.startswith(prefix + "_")]
+    return max(matches, key=len) if matches else None
+
+
+def _run_id(prefix: str, path: Path) -> str:
+    return path.name[len(prefix) + 1 : -len(".parquet")]
+
+
+def _merge(tables: List[pa.Table]) -> pa.Table:
+    """Concatenate snapshots written by different runs, engines and schema versions."""
+    types: Dict[str, set] = {}
+    for table in tables:
+        for field in table.schema:
+            types.setdefault(field.name, set()).add(field.type)
+    aligned = []
+    for table in tables:
+        # Pandas metadata describes one file's columns only; Arrow types carry the rest.
+        table = table.replace_schema_metadata(None)
+        for index, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type) and len(types[field.name]) > 1:
+                table = table.set_column(index, field.name, table[field.name].cast(field.type.value_type))
+        aligned.append(table)
+    return pa.concat_tables(aligned, promote_options="permissive").unify_dictionaries()
+
+
+def _append_log(path: Path, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not path.exists()
+    with path.open("a", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=LOG_COLUMNS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+class ZoneCompactor:
+    def __init__(self, config, today: Optional[date] = None) -> None:
+        require_local_zones(config, "compact")
+        self.config = config
+        settings = config.compaction or {}
+        output_dir = Path(config.output_dir)
+        layers = config.layers or {}
+        staging_zone = Path(layers.get("staging_dir", output_dir / "staging"))
+        self.roots = {
+            "raw": Path(layers.get("raw_dir", output_dir / "raw")) / config.source_name,
+            "staging": staging_zone / config.source_name,
+            "quarantine": staging_zone / "quarantine" / config.source_name,
+        }
+        self.target_bytes = int(float(settings.get("target_file_mb") or DEFAULT_TARGET_FILE_MB) * 1024 * 1024)
+        self.retention_days = {zone: days for zone, days in (settings.get("retention_days") or {}).items()}
+        self.skip_current = settings.get("skip_current_partition", True)
+        self.today = today or datetime.now(tz=SG_TZ).date()
+        self.log_path = output_dir / "metadata" / "compaction_log.csv"
+
+    def partitions(self) -> List[Partition]:
+        found = []
+        for zone, root in self.roots.items():
+            if root.exists():
+                found.extend(Partition(zone, path) for path in sorted(root.glob("ingest_date=*")) if path.is_dir())
+        return found
+
+    def expired(self, partition: Partition) -> bool:
+        days = self.retention_days.get(partition.zone)
+        if days is None or partition.ingest_date is None:
+            return False
+        return partition.ingest_date < self.today - timedelta(days=int(days))
+
+    def small_files(self, partition: Partition) -> Dict[str, List[Path]]:
+        """Files under the target size per file prefix, for prefixes with two or more of them."""
+        groups: Dict[str, List[Path]] = {}
+        for path in sorted(partition.path.glob("*.parquet")):
+            prefix = _prefix(partition.zone, path)
+            if prefix is not None and path.stat().st_size < self.target_bytes:
+                groups.setdefault(prefix, []).append(path)
+        return {prefix: paths for prefix, paths in groups.items() if len(paths) > 1}
+
+    def run(self, dry_run: bool = False) -> Dict[str, Any]:
+        now = datetime.now(tz=SG_TZ)
+        compaction_id = now.strftime("%Y%m%dT%H%M%S")
+        summary: Dict[str, Any] = {
+            "compaction_id": compaction_id,
+            "dry_run": dry_run,
+            "recovered": 0,
+            "compacted": [],
+            "expired": [],
+        }
+        log: List[Dict[str, Any]] = []
+        base = {"compaction_id": compaction_id, "at": now.isoformat()}
+        for partition in self.partitions():
+            if not dry_run and self._recover(partition.path):
+                summary["recovered"] += 1
+            if self.expired(partition):
+                files = list(partition.path.glob("*.parquet"))
+                size = sum(path.stat().st_size for path in files)
+                entry = {"zone": partition.zone, "partition": partition.path.name, "files": len(files), "bytes": size}
+                summary["expired"].append(entry)
+                if not dry_run:
+                    shutil.rmtree(partition.path)
+                    LOGGER.info("Dropped %s partition %s (%s files)", partition.zone, partition.path.name, len(files))
+                log.append(
+                    {
+                        **base,
+                        "action": "expire",
+                        "zone": partition.zone,
+                        "partition": partition.path.name,
+                        "input_files": len(files),
+                        "output_files": 0,
+                        "rows": None,
+                        "bytes_before": size,
+                        "bytes_after": 0,
+                    }
+                )
+                continue
+            if self.skip_current and partition.ingest_date == self.today:
+                continue
+            for prefix, paths in self.small_files(partition).items():
+                result = self._compact(partition, prefix, paths, compaction_id, dry_run)
+                summary["compacted"].append(result)
+                log.append(
+                    {
+                        **base,
+                        "action": "compact",
+                        "zone": partition.zone,
+                        "partition": f"{partition.path.name}/{prefix}",
+                        "input_files": result["input_files"],
+                        "output_files": result["output_files"],
+                        "rows": result["rows"],
+                        "bytes_before": result["bytes_before"],
+                        "bytes_after": result["bytes_after"],
+                    }
+                )
+        if not dry_run:
+            _append_log(self.log_path, log)
+        return summary
+
+    def _compact(
+        self, partition: Partition, prefix: str, paths: List[Path], compaction_id: str, dry_run: bool
+    ) -> Dict[str, Any]:
+        bytes_before = sum(path.stat().st_size for path in paths)
+        tables = []
+        for path in paths:
+            # ParquetFile, not read_table: the hive path must not add an ingest_date column.
+            table = pq.ParquetFile(path).read()
+            if "created_run_id" not in table.column_names:
+                # Report files carry their run id in the name only.
+                table = table.append_column(
+                    "created_run_id", pa.array([_run_id(prefix, path)] * table.num_rows, pa.string())
+                )
+            tables.append(table)
+        merged = _merge(tables)
+        rows_per_file = max(1, int(self.target_bytes * merged.num_rows / max(bytes_before, 1)))
+        chunks = [merged.slice(start, rows_per_file) for start in range(0, merged.num_rows, rows_per_file)] or [merged]
+        outputs = [
+            partition.path / f"{prefix}_compacted_{compaction_id}_{index:04d}.parquet" for index in range(len(chunks))
+        ]
+        result = {
+            "zone": partition.zone,
+            "partition": partition.path.name,
+            "prefix": prefix,
+            "input_files": len(paths),
+            "output_files": len(outputs),
+            "rows": merged.num_rows,
+            "bytes_before": bytes_before,
+            "bytes_after": None,
+        }
+        if dry_run:
+            return result
+
+        for chunk, output in zip(chunks, outputs):
+            pq.write_table(chunk, output.with_name(output.name + ".tmp"))
+        intent = {"inputs": [path.name for path in paths], "outputs": [path.name for path in outputs]}
+        intent_path = partition.path / INTENT_FILE
+        staged = intent_path.with_name(INTENT_FILE + ".tmp")
+        staged.write_text(json.dumps(intent), encoding="utf-8")
+        os.replace(staged, intent_path)
+        self._finish(partition.path, intent)
+        result["bytes_after"] = sum(path.stat().st_size for path in outputs)
+        LOGGER.info(
+            "Compacted %s %s files in %s into %s (%s rows)",
+            len(paths),
+            prefix,
+            partition.path.name,
+            len(outputs),
+            merged.num_rows,
+        )
+        return result
+
+    @staticmethod
+    def _finish(directory: Path, intent: Dict[str, List[str]]) -> None:
+        for name in intent["outputs"]:
+            staged = directory / (name + ".tmp")
+            if staged.exists():
+                os.replace(staged, directory / name)
+        for name in intent["inputs"]:
+            (directory / name).unlink(missing_ok=True)
+        (directory / INTENT_FILE).unlink()
+
+    def _recover(self, directory: Path) -> bool:
+        """Finish a compaction whose intent was written; drop staged files of one that was not."""
+        intent_path = directory / INTENT_FILE
+        recovered = False
+        if intent_path.exists():
+            LOGGER.warning("Finishing an interrupted compaction in %s", directory)
+            self._finish(directory, json.loads(intent_path.read_text(encoding="utf-8")))
+            recovered = True
+        for staged in directory.glob("*.tmp"):
+            staged.unlink()
+            recovered = True
+        return recovered
+
+
+def compact_command(config, dry_run: bool = False, as_json: bool = False) -> int:
+    summary = ZoneCompactor(config).run(dry_run=dry_run)
+    if as_json:
+        print(json.dumps(summary, indent=2, default=str))
+        return 0
+    verb = "would merge" if dry_run else "merged"
+    for item in summary["compacted"]:
+        print(
+            f"{item['zone']} {item['partition']}: {verb} {item['input_files']} {item['prefix']} file(s) "
+            f"into {item['output_files']} ({item['rows']} rows)"
+        )
+    for item in summary["expired"]:
+        action = "would drop" if dry_run else "dropped"
+        print(f"{item['zone']} {item['partition']}: {action} {item['files']} file(s) past retention")
+    if not summary["compacted"] and not summary["expired"]:
+        print("Nothing to compact or expire.")
+    return 0
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List
 
@@ -16,6 +16,22 @@ class PipelineConfig:
     required_columns: List[str]
     quality_tolerance: Dict[str, float]
     incremental: Dict[str, Any]
+    profiling: Dict[str, Any] = field(default_factory=dict)
+    artifact_store: Dict[str, Any] = field(default_factory=dict)
+    execution: Dict[str, Any] = field(default_factory=dict)
+    watch: Dict[str, Any] = field(default_factory=dict)
+    rollups: Dict[str, Any] = field(default_factory=dict)
+    lookup_index: Dict[str, Any] = field(default_factory=dict)
+    backfill: Dict[str, Any] = field(default_factory=dict)
+    dedup: Dict[str, Any] = field(default_factory=dict)
+    cross_row_rules: Dict[str, Any] = field(default_factory=dict)
+    money: Dict[str, Any] = field(default_factory=dict)
+    categorical: Dict[str, Any] = field(default_factory=dict)
+    compaction: Dict[str, Any] = field(default_factory=dict)
+    locking: Dict[str, Any] = field(default_factory=dict)
+    sink: Dict[str, Any] = field(default_factory=dict)
+    export: Dict[str, Any] = field(default_factory=dict)
+    quality_history: Dict[str, Any] = field(default_factory=dict)
 
 
 def load_config(path: Path) -> PipelineConfig:
@@ -32,4 +48,20 @@ def load_config(path: Path) -> PipelineConfig:
         required_columns=raw.get("required_columns", []),
         quality_tolerance=raw.get("quality_tolerance", {}),
         incremental=raw.get("incremental", {}),
+        profiling=raw.get("profiling", {}),
+        artifact_store=raw.get("artifact_store", {}),
+        execution=raw.get("execution", {}),
+        watch=raw.get("watch", {}),
+        rollups=raw.get("rollups", {}),
+        lookup_index=raw.get("lookup_index", {}),
+        backfill=raw.get("backfill", {}),
+        dedup=raw.get("dedup", {}),
+        cross_row_rules=raw.get("cross_row_rules", {}),
+        money=raw.get("money", {}),
+        categorical=raw.get("categorical", {}),
+        compaction=raw.get("compaction", {}),
+        locking=raw.get("locking", {}),
+        sink=raw.get("sink", {}),
+        export=raw.get("export", {}),
+        quality_history=raw.get("quality_history", {}),
     )
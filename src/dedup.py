@@ -0,0 +1,137 @@
+"""Persistent fingerprint index of ingested rows, for dropping re-sent returns."""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.utils.dates import parse_dates
+
+LOGGER = logging.getLogger(__name__)
+
+KEY_COLUMNS = ("nric", "assessment_year")
+IGNORED_COLUMNS = ("source_file", "source_file_id")
+# Pipeline column names (after the ``columns`` rename) hashed as numbers and as dates.
+NUMERIC_COLUMNS = (
+    "assessment_year",
+    "annual_income",
+    "total_reliefs",
+    "chargeable_income",
+    "cpf_contribution",
+    "foreign_income",
+    "number_of_dependents",
+    "tax_payable",
+    "tax_paid",
+)
+DATE_COLUMNS = ("filing_date",)
+DEFAULT_MAX_SEGMENTS = 8
+
+
+def index_dir(config) -> Path:
+    """``dedup.index_dir``, defaulting to ``output_dir/metadata/dedup``."""
+    return Path((config.dedup or {}).get("index_dir") or Path(config.output_dir) / "metadata" / "dedup")
+
+
+def _canonical(name: str, values: pd.Series) -> pd.Series:
+    """Stripped text, with parseable numbers and dates spelled one way."""
+    text = values.astype("string").str.strip()
+    canonical: Optional[pd.Series] = None
+    if name in NUMERIC_COLUMNS:
+        numbers = pd.to_numeric(text, errors="coerce").astype("float64")
+        canonical = numbers.astype(str).where(numbers.notna())
+    elif name in DATE_COLUMNS:
+        dates = parse_dates(values if pd.api.types.is_datetime64_any_dtype(values) else text)
+        canonical = dates.dt.strftime("%Y-%m-%d").where(dates.notna())
+    if canonical is None:
+        return text
+    # Values that do not parse keep their own text, so distinct bad values stay distinct.
+    return canonical.astype("string").fillna(text)
+
+
+def row_hashes(frame: Any) -> np.ndarray:
+    """uint64 fingerprint per row; the same for either ingest engine and any column order."""
+    names = frame.column_names if isinstance(frame, pa.Table) else list(frame.columns)
+    content = sorted(col for col in names if col not in KEY_COLUMNS + IGNORED_COLUMNS)
+    columns = [col for col in KEY_COLUMNS if col in names] + content
+    if isinstance(frame, pa.Table):
+        frame = frame.select(columns).to_pandas()
+    text = pd.DataFrame({col: _canonical(col, frame[col]).reset_index(drop=True) for col in columns})
+    return pd.util.hash_pandas_object(text, index=False).to_numpy()
+
+
+def _contains(segment: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+    if not len(segment):
+        return np.zeros(len(hashes), dtype=bool)
+    positions = np.minimum(np.searchsorted(segment, hashes), len(segment) - 1)
+    return np.asarray(segment[positions]) == hashes
+
+
+class HashIndex:
+    """Sorted ``uint64`` segments under ``directory``."""
+
+    def __init__(self, directory: Path, max_segments: int = DEFAULT_MAX_SEGMENTS) -> None:
+        self.directory = Path(directory)
+        self.max_segments = max_segments
+
+    @classmethod
+    def from_config(cls, config) -> "HashIndex":
+        settings = config.dedup or {}
+        return cls(
+            index_dir(config),
+            int(settings.get("max_segments") or DEFAULT_MAX_SEGMENTS),
+        )
+
+    def segments(self) -> List[Path]:
+        return sorted(self.directory.glob("segment_*.npy"))
+
+    def __len__(self) -> int:
+        return sum(len(np.load(path, mmap_mode="r")) for path in self.segments())
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """Boolean mask of ``hashes`` already in the index."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        found = np.zeros(len(hashes), dtype=bool)
+        for path in self.segments():
+            pending = np.flatnonzero(~found)
+            if not len(pending):
+                break
+            found[pending] = _contains(np.load(path, mmap_mode="r"), hashes[pending])
+        return found
+
+    def add(self, hashes: np.ndarray) -> int:
+        """Persist the ``hashes`` not yet indexed as a new segment; returns how many were new."""
+        hashes = np.unique(np.asarray(hashes, dtype=np.uint64))
+        hashes = hashes[~self.contains(hashes)]
+        if len(hashes):
+            self._write_segment(hashes)
+            if len(self.segments()) > self.max_segments:
+                self.compact()
+        return len(hashes)
+
+    def compact(self) -> None:
+        """Merge every segment into one."""
+        segments = self.segments()
+        if len(segments) < 2:
+            return
+        merged = np.unique(np.concatenate([np.load(path) for path in segments]))
+        self._write_segment(merged)
+        for path in segments:
+            path.unlink()
+        LOGGER.info("Merged %s dedup segments (%s fingerprints)", len(segments), len(merged))
+
+    def _write_segment(self, hashes: np.ndarray) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = self.segments()
+        sequence = int(segments[-1].stem.split("_")[1]) + 1 if segments else 1
+        path = self.directory / f"segment_{sequence:08d}.npy"
+        staged = path.with_name(path.name + ".tmp")
+        with open(staged, "wb") as handle:
+            np.save(handle, hashes)
+        os.replace(staged, path)
+        return path
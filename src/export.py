@@ -0,0 +1,339 @@
+"""Incremental export of curated and datamart tables to an embedded analytical database."""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.locks import lock_dir, lock_timeout, table_locks
+from src.utils.arrow import decode_dictionaries
+
+LOGGER = logging.getLogger(__name__)
+
+ROW_HASH = "_row_hash"
+# Curated file version each exported table was last synced to.
+VERSIONS_TABLE = "_export_versions"
+BACKENDS = ("sqlite", "duckdb")
+# Written under ``output_dir/exports`` unless ``export.path`` is set.
+DEFAULT_EXPORT_FILES = {"sqlite": "tax_warehouse.sqlite", "duckdb": "tax_warehouse.duckdb"}
+# Table -> (layer holding it, indexed columns).
+EXPORT_TABLES = {
+    "dim_geo": ("curated_dir", ["geo_id", "postal_code"]),
+    "dim_taxpayer": ("curated_dir", ["taxpayer_id", "nric"]),
+    "fact_tax_returns": ("curated_dir", ["return_key", "taxpayer_id"]),
+    "datamart_tax_returns": ("datamart_dir", ["return_key", "taxpayer_id", "geo_id", "source_name"]),
+}
+_BATCH_ROWS = 50_000
+
+
+@dataclass
+class TableDelta:
+    """A run's committed change to one table: ``rows`` replace every exported row with their ``key``."""
+
+    key: str
+    rows: pa.Table
+    base: Optional[str]
+    version: Optional[str]
+
+
+def file_version(path: Path) -> Optional[str]:
+    """Modification time and size of ``path``, or None while it does not exist."""
+    if not Path(path).exists():
+        return None
+    stat = Path(path).stat()
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def table_delta(path: Path, base: Optional[str], frame: pd.DataFrame, key: str, keys) -> TableDelta:
+    """The rows of ``frame``, just written to ``path`` over version ``base``, held for ``keys``."""
+    rows = frame[frame[key].isin(pd.unique(np.asarray(keys, dtype=object)))]
+    # The written file's schema, so the rows hash like the ones a full export reads back.
+    table = pa.Table.from_pandas(rows, schema=pq.read_schema(path), preserve_index=False)
+    return TableDelta(key, table, base, file_version(path))
+
+
+def row_hashes(table: pa.Table) -> np.ndarray:
+    """Signed 64-bit fingerprint per row; identical rows get distinct hashes by occurrence."""
+    frame = table.to_pandas()
+    hashes = pd.util.hash_pandas_object(frame, index=False)
+    occurrence = hashes.groupby(hashes.to_numpy()).cumcount()
+    if occurrence.any():
+        hashes = pd.util.hash_pandas_object(pd.DataFrame({"row": hashes, "n": occurrence}), index=False)
+    return hashes.to_numpy().view(np.int64)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class _Store:
+    connection: Any
+
+    def _versions(self) -> None:
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (name TEXT, version TEXT)")
+
+    def version(self, name: str) -> Optional[str]:
+        self._versions()
+        row = self.connection.execute(f"SELECT version FROM {VERSIONS_TABLE} WHERE name = ?", [name]).fetchone()
+        return row[0] if row else None
+
+    def set_version(self, name: str, version: Optional[str]) -> None:
+        self._versions()
+        self.connection.execute(f"DELETE FROM {VERSIONS_TABLE} WHERE name = ?", [name])
+        self.connection.execute(f"INSERT INTO {VERSIONS_TABLE} VALUES (?, ?)", [name, version])
+
+    def delete(self, name: str, hashes: np.ndarray) -> None:
+        self.delete_keys(name, ROW_HASH, pa.array(hashes, pa.int64()))
+
+
+class _SqliteStore(_Store):
+    def __init__(self, path: Path) -> None:
+        self.connection = sqlite3.connect(path)
+
+    def columns(self, name: str) -> Optional[List[str]]:
+        rows = self.connection.execute(f"PRAGMA table_info({_quote(name)})").fetchall()
+        return [row[1] for row in rows] or None
+
+    @staticmethod
+    def _sql_type(data_type: pa.DataType) -> str:
+        if pa.types.is_uint64(data_type) or pa.types.is_string(data_type) or pa.types.is_timestamp(data_type):
+            return "TEXT"
+        if pa.types.is_integer(data_type) or pa.types.is_boolean(data_type):
+            return "INTEGER"
+        if pa.types.is_floating(data_type):
+            return "REAL"
+        return "TEXT"
+
+    @staticmethod
+    def _values(column) -> list:
+        # Converted by Arrow kernels; only the final hand-off to sqlite3 is per value.
+        if pa.types.is_uint64(column.type):
+            column = column.cast(pa.string())
+        elif pa.types.is_timestamp(column.type):
+            # Microsecond ISO text with offset, which SQLite's date functions accept.
+            text_format = "%Y-%m-%dT%H:%M:%S%Ez" if column.type.tz else "%Y-%m-%dT%H:%M:%S"
+            column = pc.strftime(column.cast(pa.timestamp("us", column.type.tz)), text_format)
+        return column.to_pylist()
+
+    def create(self, name: str, schema: pa.Schema) -> None:
+        columns = ", ".join(f"{_quote(field.name)} {self._sql_type(field.type)}" for field in schema)
+        self.connection.execute(f"CREATE TABLE {_quote(name)} ({columns})")
+
+    def drop(self, name: str) -> None:
+        self.connection.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+
+    def hashes(self, name: str) -> np.ndarray:
+        rows = self.connection.execute(f"SELECT {ROW_HASH} FROM {_quote(name)}")
+        return np.fromiter((row[0] for row in rows), dtype=np.int64)
+
+    def delete_keys(self, name: str, column: str, keys: pa.Array) -> int:
+        # A plain indexed column: a key listed twice must not fail a primary-key constraint.
+        self.connection.execute("CREATE TEMP TABLE _export_gone (key)")
+        self.connection.executemany("INSERT INTO _export_gone VALUES (?)", ((key,) for key in self._values(keys)))
+        self.connection.execute("CREATE INDEX _export_gone_key ON _export_gone (key)")
+        deleted = self.connection.execute(
+            f"DELETE FROM {_quote(name)} WHERE {_quote(column)} IN (SELECT key FROM _export_gone)"
+        ).rowcount
+        self.connection.execute("DROP TABLE _export_gone")
+        return deleted
+
+    def insert(self, name: str, table: pa.Table) -> None:
+        placeholders = ", ".join("?" * table.num_columns)
+        statement = f"INSERT INTO {_quote(name)} VALUES ({placeholders})"
+        for start in range(0, table.num_rows, _BATCH_ROWS):
+            chunk = table.slice(start, _BATCH_ROWS)
+            self.connection.executemany(statement, zip(*(self._values(column) for column in chunk.columns)))
+
+    def index(self, name: str, column: str) -> None:
+        self.connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {_quote(f'ix_{name}_{column}')} ON {_quote(name)} ({_quote(column)})"
+        )
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class _DuckDbStore(_Store):
+    def __init__(self, path: Path) -> None:
+        try:
+            import duckdb
+        except ImportError as exc:
+            raise RuntimeError("duckdb is not installed; install it or set export.backend: sqlite.") from exc
+        self.connection = duckdb.connect(str(path))
+        self.connection.begin()
+
+    def columns(self, name: str) -> Optional[List[str]]:
+        rows = self.connection.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = ? ORDER BY ordinal_position",
+            [name],
+        ).fetchall()
+        return [row[0] for row in rows] or None
+
+    def create(self, name: str, schema: pa.Schema) -> None:
+        self.connection.register("_export_rows", schema.empty_table())
+        self.connection.execute(f"CREATE TABLE {_quote(name)} AS SELECT * FROM _export_rows")
+        self.connection.unregister("_export_rows")
+
+    def drop(self, name: str) -> None:
+        self.connection.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+
+    def hashes(self, name: str) -> np.ndarray:
+        result = self.connection.execute(f"SELECT {ROW_HASH} FROM {_quote(name)}").arrow()
+        return result.column(0).to_numpy()
+
+    def delete_keys(self, name: str, column: str, keys: pa.Array) -> int:
+        self.connection.register("_export_gone", pa.table({"key": keys}))
+        # DuckDB answers a DELETE with the number of rows it removed.
+        deleted = self.connection.execute(
+            f"DELETE FROM {_quote(name)} WHERE {_quote(column)} IN (SELECT key FROM _export_gone)"
+        ).fetchone()[0]
+        self.connection.unregister("_export_gone")
+        return deleted
+
+    def insert(self, name: str, table: pa.Table) -> None:
+        # DuckDB scans the registered Arrow buffers directly.
+        self.connection.register("_export_rows", table)
+        self.connection.execute(f"INSERT INTO {_quote(name)} SELECT * FROM _export_rows")
+        self.connection.unregister("_export_rows")
+
+    def index(self, name: str, column: str) -> None:
+        self.connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {_quote(f'ix_{name}_{column}')} ON {_quote(name)} ({_quote(column)})"
+        )
+
+    def commit(self) -> None:
+        self.connection.commit()
+        self.connection.begin()
+
+    def close(self) -> None:
+        self.connection.rollback()
+        self.connection.close()
+
+
+class TableExporter:
+    """Syncs the committed curated and datamart tables into ``export.path``."""
+
+    def __init__(self, config) -> None:
+        settings = config.export or {}
+        self.config = config
+        self.backend = settings.get("backend") or "sqlite"
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unsupported export backend: {self.backend}")
+        output_dir = Path(config.output_dir)
+        self.path = Path(settings.get("path") or output_dir / "exports" / DEFAULT_EXPORT_FILES[self.backend])
+        self.tables = list(settings.get("tables") or EXPORT_TABLES)
+        layers = config.layers or {}
+        self.layers = {
+            "curated_dir": Path(layers.get("curated_dir", output_dir / "curated")),
+            "datamart_dir": Path(layers.get("datamart_dir", output_dir / "datamart")),
+        }
+
+    def _source(self, name: str) -> Path:
+        layer, _ = EXPORT_TABLES[name]
+        return self.layers[layer] / f"{name}.parquet"
+
+    def _read(self, store, deltas: Dict[str, TableDelta], full: bool) -> Dict[str, Tuple[str, int, Optional[pa.Table]]]:
+        """Version and row count of each table, plus its rows when neither it nor a delta is in sync."""
+        tables = {}
+        # A consistent snapshot: no run may commit these tables while they are read.
+        with table_locks(lock_dir(self.config), self.tables, lock_timeout(self.config)):
+            for name in self.tables:
+                source = self._source(name)
+                if not source.exists():
+                    continue
+                version = file_version(source)
+                metadata = pq.read_metadata(source)
+                synced = None
+                if not full and store.columns(name) == [*metadata.schema.to_arrow_schema().names, ROW_HASH]:
+                    synced = store.version(name)
+                delta = deltas.get(name)
+                if synced is not None and (synced == version or delta is not None and synced == delta.base):
+                    tables[name] = (version, metadata.num_rows, None)
+                else:
+                    tables[name] = (version, metadata.num_rows, pq.ParquetFile(source).read())
+        return tables
+
+    def run(self, deltas: Optional[Dict[str, TableDelta]] = None, full: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Skip tables already synced, apply a run's delta to the version it was computed on, and
+        diff everything else (first export, unknown version, ``full``) against the whole table."""
+        deltas = deltas or {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        summary: Dict[str, Dict[str, Any]] = {}
+        with table_locks(lock_dir(self.config), ["export"], lock_timeout(self.config)):
+            store = _DuckDbStore(self.path) if self.backend == "duckdb" else _SqliteStore(self.path)
+            try:
+                for name, (version, rows, table) in self._read(store, deltas, full).items():
+                    if table is not None:
+                        table = decode_dictionaries(table.replace_schema_metadata(None))
+                        summary[name] = self._sync(store, name, table, version)
+                    elif store.version(name) == version:
+                        summary[name] = {"rows": rows, "inserted": 0, "deleted": 0, "reloaded": False}
+                    else:
+                        summary[name] = {"rows": rows, **self._apply(store, name, deltas[name])}
+                    store.commit()
+            finally:
+                store.close()
+        return summary
+
+    def _apply(self, store, name: str, delta: TableDelta) -> Dict[str, Any]:
+        rows = decode_dictionaries(delta.rows.replace_schema_metadata(None))
+        rows = rows.append_column(ROW_HASH, pa.array(row_hashes(rows), pa.int64()))
+        deleted = store.delete_keys(name, delta.key, pc.unique(rows[delta.key]))
+        if rows.num_rows:
+            store.insert(name, rows)
+        store.set_version(name, delta.version)
+        LOGGER.info("Exported %s delta: %s inserted, %s deleted", name, rows.num_rows, deleted)
+        return {"inserted": rows.num_rows, "deleted": deleted, "reloaded": False}
+
+    def _sync(self, store, name: str, table: pa.Table, version: str) -> Dict[str, Any]:
+        hashes = row_hashes(table)
+        table = table.append_column(ROW_HASH, pa.array(hashes, pa.int64()))
+        existing_columns = store.columns(name)
+        reloaded = existing_columns is not None and existing_columns != table.column_names
+        if reloaded:
+            LOGGER.info("Columns of %s changed; reloading it", name)
+            store.drop(name)
+        if existing_columns is None or reloaded:
+            store.create(name, table.schema)
+            deleted = np.empty(0, dtype=np.int64)
+            inserts = table
+        else:
+            present = store.hashes(name)
+            deleted = present[~np.isin(present, hashes)]
+            inserts = table.filter(pa.array(~np.isin(hashes, present)))
+        if len(deleted):
+            store.delete(name, deleted)
+        if inserts.num_rows:
+            store.insert(name, inserts)
+        for column in [*EXPORT_TABLES[name][1], ROW_HASH]:
+            if column in table.column_names:
+                store.index(name, column)
+        store.set_version(name, version)
+        LOGGER.info("Exported %s: %s inserted, %s deleted", name, inserts.num_rows, len(deleted))
+        return {"rows": table.num_rows, "inserted": inserts.num_rows, "deleted": len(deleted), "reloaded": reloaded}
+
+
+def export_command(config, as_json: bool = False, full: bool = False) -> int:
+    summary = TableExporter(config).run(full=full)
+    if as_json:
+        print(json.dumps(summary, indent=2))
+        return 0
+    if not summary:
+        print("No curated or datamart tables to export.")
+    for name, item in summary.items():
+        action = "reloaded" if item["reloaded"] else f"+{item['inserted']} -{item['deleted']}"
+        print(f"{name}: {item['rows']} rows ({action})")
+    return 0
@@ -0,0 +1,94 @@
+"""Advisory file locks for tables shared by concurrent pipeline runs."""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_SECONDS = 600.0
+LOCK_DIR_NAME = "_locks"
+_POLL_SECONDS = 0.05
+
+
+class LockTimeout(TimeoutError):
+    pass
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:  # pragma: no cover - Windows
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:  # pragma: no cover - Windows
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path: Path, timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS) -> Iterator[None]:
+    """Hold an exclusive lock on ``path``; raises ``LockTimeout`` after ``timeout`` seconds."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        started = time.monotonic()
+        waited = False
+        while not _try_lock(fd):
+            if not waited:
+                LOGGER.info("Waiting for lock %s", path)
+                waited = True
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise LockTimeout(f"Timed out after {timeout}s waiting for {path}")
+            time.sleep(_POLL_SECONDS)
+        if waited:
+            LOGGER.info("Acquired lock %s after %.2fs", path, time.monotonic() - started)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def table_locks(
+    lock_dir: Path, names: Iterable[str], timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS
+) -> Iterator[None]:
+    """Hold the locks of all ``names`` under ``lock_dir``, taken in sorted order."""
+    with ExitStack() as stack:
+        for name in sorted(set(names)):
+            stack.enter_context(file_lock(Path(lock_dir) / f"{name}.lock", timeout))
+        yield
+
+
+def lock_dir(config) -> Path:
+    """``curated_dir/_locks``: shared by every source writing to the same curated layer."""
+    output_dir = Path(config.output_dir)
+    return Path((config.layers or {}).get("curated_dir", output_dir / "curated")) / LOCK_DIR_NAME
+
+
+def lock_timeout(config) -> Optional[float]:
+    settings = getattr(config, "locking", None) or {}
+    value = settings.get("timeout_seconds", DEFAULT_TIMEOUT_SECONDS)
+    return None if value is None else float(value)
@@ -0,0 +1,106 @@
+"""Sidecar point-lookup indexes for the curated SCD2 tables."""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+LOGGER = logging.getLogger(__name__)
+
+INDEXED_COLUMNS = {
+    "dim_taxpayer": ("nric", "taxpayer_id"),
+    "fact_tax_returns": ("return_key", "taxpayer_id"),
+}
+INDEX_DIR = "_index"
+
+
+def index_path(table_path: Path, column: str) -> Path:
+    table_path = Path(table_path)
+    return table_path.parent / INDEX_DIR / f"{table_path.stem}.{column}.parquet"
+
+
+def _source_signature(table_path: Path) -> Dict[bytes, bytes]:
+    stat = Path(table_path).stat()
+    return {b"source_mtime_ns": str(stat.st_mtime_ns).encode(), b"source_size": str(stat.st_size).encode()}
+
+
+def write_indexes(table_path: Path, columns: Iterable[str]) -> List[Path]:
+    """Index ``columns`` of the committed file at ``table_path``.
+
+    Row positions shift whenever an SCD2 upsert rewrites the file, so indexes are rebuilt
+    from the file's key columns after every commit rather than patched.
+    """
+    parquet_file = pq.ParquetFile(table_path)
+    metadata = parquet_file.metadata
+    columns = [col for col in columns if col in parquet_file.schema_arrow.names]
+    keys = parquet_file.read(columns=columns)
+    starts = np.cumsum([0] + [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)])
+    row_group = np.searchsorted(starts, np.arange(metadata.num_rows), side="right") - 1
+    offset = np.arange(metadata.num_rows) - starts[row_group]
+    signature = _source_signature(table_path)
+
+    written = []
+    for column in columns:
+        order = pc.sort_indices(keys[column], null_placement="at_end")
+        order = order[: len(order) - keys[column].null_count]
+        index = pa.table(
+            {
+                "key": keys[column].take(order),
+                "row_group": pa.array(row_group, pa.int32()).take(order),
+                "row_offset": pa.array(offset, pa.int64()).take(order),
+            }
+        ).replace_schema_metadata(signature)
+        path = index_path(table_path, column)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(index, path)
+        written.append(path)
+    return written
+
+
+class LookupIndex:
+    """Sorted keys of one column with the row group and offset of each row."""
+
+    def __init__(self, table_path: Path, column: str, index: pa.Table) -> None:
+        self.table_path = Path(table_path)
+        self.column = column
+        self.keys = index.column("key").to_numpy(zero_copy_only=False)
+        self.row_groups = index.column("row_group").to_numpy()
+        self.row_offsets = index.column("row_offset").to_numpy()
+
+    @classmethod
+    def load(cls, table_path: Path, column: str) -> "LookupIndex":
+        """Load the sidecar for ``column``, rebuilding it if the table was rewritten since."""
+        path = index_path(table_path, column)
+        if path.exists():
+            index = pq.read_table(path)
+            if (index.schema.metadata or {}) == _source_signature(table_path):
+                return cls(table_path, column, index)
+        LOGGER.info("Rebuilding lookup index %s", path)
+        write_indexes(table_path, [column])
+        return cls(table_path, column, pq.read_table(path))
+
+    def locate(self, value: Any) -> List[Tuple[int, int]]:
+        lo = np.searchsorted(self.keys, value, side="left")
+        hi = np.searchsorted(self.keys, value, side="right")
+        return sorted(zip(self.row_groups[lo:hi].tolist(), self.row_offsets[lo:hi].tolist()))
+
+    def fetch(self, value: Any, columns: Optional[Sequence[str]] = None) -> pa.Table:
+        """Rows whose indexed column equals ``value``, in file order."""
+        locations = self.locate(value)
+        parquet_file = pq.ParquetFile(self.table_path)
+        if not locations:
+            return parquet_file.schema_arrow.empty_table().select(list(columns) if columns else parquet_file.schema_arrow.names)
+        by_group: Dict[int, List[int]] = {}
+        for group, offset in locations:
+            by_group.setdefault(group, []).append(offset)
+        parts = [
+            parquet_file.read_row_group(group, columns=list(columns) if columns else None).take(offsets)
+            for group, offsets in sorted(by_group.items())
+        ]
+        return pa.concat_tables(parts)
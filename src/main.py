@@ -1,54 +1,284 @@
+from __future__ import annotations
+
 import argparse
+import sys
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Sequence
 from zoneinfo import ZoneInfo
 
+from src import commands
 from src.config import load_config
-from src.pipeline.base import Pipeline, PipelineContext
-from src.pipeline.ingest import CsvIngestStage
-from src.pipeline.validate import ValidateStage
-from src.pipeline.transform import TransformStage
-from src.pipeline.write import WriteStage
 from src.utils.logging import setup_logging
 
+if TYPE_CHECKING:
+    from src.pipeline.base import Pipeline, PipelineContext
+
+# Metadata subcommands only need the config, the state store and file metadata; pandas,
+# pyarrow and the stages are imported inside the functions that run the pipeline.
+METADATA_COMMANDS = ("status", "ledger", "plan", "validate-config")
+COMMANDS = METADATA_COMMANDS + ("check-rollups", "backfill", "replay-quarantine", "compact", "run-sources", "export", "dq-trends")
 
-def parse_args() -> argparse.Namespace:
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run the tax data pipeline.")
     parser.add_argument(
         "--config",
         default="configs/pipeline.yaml",
         help="Path to pipeline configuration file.",
     )
+    subparsers = parser.add_subparsers(
+        dest="command",
+        metavar="{" + ",".join(COMMANDS) + "}",
+        help="Inspect pipeline metadata or outputs without running it (omit to run the pipeline).",
+    )
+    command_help = {
+        "status": "Show the watermark, ledger size and pending input.",
+        "ledger": "List processed input files.",
+        "plan": "Show which input files the next run would ingest and their size.",
+        "validate-config": "Check the configuration file for errors.",
+        "check-rollups": "Verify the datamart rollups against a full recompute.",
+        "backfill": "Reprocess the input as parallel, resumable assessment_year partitions.",
+        "replay-quarantine": "Re-validate quarantined rows and commit the ones that now pass.",
+        "compact": "Merge small raw/staging/quarantine files per partition and apply retention.",
+        "run-sources": "Run several source configs concurrently against the shared curated layer.",
+        "export": "Sync curated and datamart tables into the embedded analytical database.",
+        "dq-trends": "Show data-quality domain and rule scores over recent runs.",
+    }
+    for command in COMMANDS:
+        subparser = subparsers.add_parser(command, help=command_help[command])
+        subparser.add_argument("--config", default=argparse.SUPPRESS, help="Path to pipeline configuration file.")
+        subparser.add_argument("--json", action="store_true", help="Print JSON instead of text.")
+        if command == "backfill":
+            subparser.add_argument("--workers", type=int, help="Worker processes for partition transforms.")
+            subparser.add_argument("--by-file", action="store_true", help="Also partition by source file.")
+            subparser.add_argument(
+                "--years", help="Only backfill these assessment years, e.g. 2019-2021 or 2019,2021."
+            )
+            subparser.add_argument(
+                "--restart", action="store_true", help="Discard an unfinished backfill instead of resuming it."
+            )
+        if command == "replay-quarantine":
+            subparser.add_argument(
+                "--dry-run", action="store_true", help="Report what would be released without writing anything."
+            )
+        if command == "compact":
+            subparser.add_argument(
+                "--dry-run", action="store_true", help="Report what would be merged or dropped without writing anything."
+            )
+        if command == "export":
+            subparser.add_argument(
+                "--full", action="store_true", help="Diff every table in full instead of trusting recorded versions."
+            )
+        if command == "dq-trends":
+            subparser.add_argument("--runs", type=int, default=10, help="Number of most recent runs (default 10).")
+            subparser.add_argument("--kind", choices=["domain", "rule"], help="Only domain or only rule scores.")
+        if command == "run-sources":
+            subparser.add_argument("sources", nargs="+", help="Config file of each source.")
+            subparser.add_argument("--workers", type=int, help="Worker processes (default: one per source).")
     parser.add_argument(
         "--allow-backfill",
         action="store_true",
         help="Process data older than the current incremental watermark.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--engine",
+        choices=["pandas", "arrow"],
+        help="Override the execution engine from the configuration file.",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        help="Hash-partition rows by NRIC and validate/transform each shard in a worker process.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Stay resident and run the pipeline on micro-batches of files dropped into input_path.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["cprofile", "pyinstrument"],
+        help="Dump a code profile of the run to the configured profile directory.",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="Override the path of the code profile dump.",
+    )
+    return parser.parse_args(argv)
 
 
-def main() -> None:
+def build_stages(config) -> list:
+    from src.pipeline.ingest import ArrowCsvIngestStage, CsvIngestStage
+    from src.pipeline.sharding import ShardedValidateTransformStage
+    from src.pipeline.transform import ArrowTransformStage, TransformStage
+    from src.pipeline.validate import ArrowValidateStage, ValidateStage
+    from src.pipeline.write import WriteStage
+
+    # Runs after the write, on the tables as committed.
+    post_write = []
+    if (config.export or {}).get("enabled"):
+        from src.pipeline.export import ExportStage
+
+        post_write.append(ExportStage())
+
+    execution = config.execution or {}
+    engine = execution.get("engine", "pandas")
+    if engine == "arrow":
+        ingest, validate, transform = ArrowCsvIngestStage(), ArrowValidateStage(), ArrowTransformStage()
+    elif engine == "pandas":
+        ingest, validate, transform = CsvIngestStage(), ValidateStage(), TransformStage()
+    else:
+        raise ValueError(f"Unsupported execution engine: {engine}")
+
+    shards = int(execution.get("shards") or 1)
+    if shards > 1:
+        sharded = ShardedValidateTransformStage(
+            validate, transform, shards=shards, workers=execution.get("workers")
+        )
+        return [ingest, sharded, WriteStage(), *post_write]
+    return [ingest, validate, transform, WriteStage(), *post_write]
+
+
+def build_pipeline(config, run_id: Optional[str] = None) -> tuple[Pipeline, PipelineContext]:
+    from src.pipeline.artifacts import ArtifactStore
+    from src.pipeline.base import Pipeline, PipelineContext
+    from src.utils.profiling import RunProfiler
+
+    pipeline = Pipeline(stages=build_stages(config))
+
+    sg_tz = ZoneInfo("Asia/Singapore")
+    run_timestamp = datetime.now(tz=sg_tz).isoformat()
+    run_id = run_id or f"run_{datetime.now(tz=sg_tz).strftime('%Y%m%dT%H%M%S%z')}"
+    context = PipelineContext(
+        config=config, artifacts=ArtifactStore.from_config(config, run_id)
+    )
+    context.artifacts["run_id"] = run_id
+    context.artifacts["run_timestamp"] = run_timestamp
+    context.profiler = RunProfiler.from_config(config, run_id)
+    return pipeline, context
+
+
+def write_metrics(config, context: PipelineContext, status: str = "succeeded") -> None:
+    if context.profiler is None:
+        return
+    from src.utils.profiling import write_run_metrics
+
+    profiling_cfg = config.profiling or {}
+    metrics_dir = Path(
+        profiling_cfg.get("metrics_dir", Path(config.output_dir) / "metadata" / "run_metrics")
+    )
+    write_run_metrics(context.profiler, metrics_dir, status=status)
+
+
+def parse_years(value: Optional[str]) -> Optional[list]:
+    if not value:
+        return None
+    years = []
+    for part in value.split(","):
+        start, _, end = part.partition("-")
+        years.extend(range(int(start), int(end or start) + 1))
+    return years
+
+
+def run_backfill(config, args: argparse.Namespace) -> int:
+    import json
+
+    from src.backfill import BackfillRunner
+
     setup_logging()
+    runner = BackfillRunner(config, workers=args.workers, by_file=args.by_file, years=parse_years(args.years))
+    summary = runner.run(restart=args.restart)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(
+            f"Backfill {summary['backfill_id']}: committed {len(summary['committed'])} partition(s), "
+            f"{len(summary['resumed'])} already committed before resuming."
+        )
+    return 0
+
+
+def run_command(args: argparse.Namespace) -> int:
+    if args.command == "validate-config":
+        return commands.validate_config(Path(args.config), as_json=args.json)
+    if args.command == "run-sources":
+        from src.multi_source import run_sources_command
+
+        setup_logging()
+        return run_sources_command([Path(path) for path in args.sources], workers=args.workers, as_json=args.json)
+    config = load_config(Path(args.config))
+    if args.command == "backfill":
+        return run_backfill(config, args)
+    if args.command == "check-rollups":
+        from src.transform.rollups import check_rollups_command
+
+        return check_rollups_command(config, as_json=args.json)
+    if args.command == "replay-quarantine":
+        from src.replay import replay_command
+
+        setup_logging()
+        return replay_command(config, dry_run=args.dry_run, as_json=args.json)
+    if args.command == "dq-trends":
+        from src.quality.history import dq_trends_command
+
+        return dq_trends_command(config, runs=args.runs, kind=args.kind, as_json=args.json)
+    if args.command == "export":
+        from src.export import export_command
+
+        setup_logging()
+        return export_command(config, as_json=args.json, full=args.full)
+    if args.command == "compact":
+        from src.compact import compact_command
+
+        setup_logging()
+        return compact_command(config, dry_run=args.dry_run, as_json=args.json)
+    handler = {"status": commands.status, "ledger": commands.ledger, "plan": commands.plan}[args.command]
+    return handler(config, as_json=args.json)
+
+
+def main() -> None:
     args = parse_args()
+    if args.command:
+        sys.exit(run_command(args))
+
+    setup_logging()
     config = load_config(Path(args.config))
     if args.allow_backfill:
         config.incremental["allow_backfill"] = True
+    if args.engine:
+        config.execution["engine"] = args.engine
+    if args.shards:
+        config.execution["shards"] = args.shards
+
+    if args.watch:
+        from src.watch import WatchDaemon
+
+        WatchDaemon(config).serve()
+        return
+
+    pipeline, context = build_pipeline(config)
+    run_id = context.artifacts["run_id"]
 
-    pipeline = Pipeline(
-        stages=[
-            CsvIngestStage(),
-            ValidateStage(),
-            TransformStage(),
-            WriteStage(),
-        ]
+    profiling_cfg = config.profiling or {}
+    output_dir = Path(config.output_dir)
+    profile_ext = "prof" if args.profile == "cprofile" else "html"
+    profile_path = Path(
+        args.profile_output
+        or Path(profiling_cfg.get("profile_dir", output_dir / "metadata" / "profiles"))
+        / f"{run_id}.{profile_ext}"
     )
+    from src.utils.profiling import code_profiler
 
-    context = PipelineContext(config=config)
-    sg_tz = ZoneInfo("Asia/Singapore")
-    run_timestamp = datetime.now(tz=sg_tz).isoformat()
-    context.artifacts["run_id"] = f"run_{datetime.now(tz=sg_tz).strftime('%Y%m%dT%H%M%S%z')}"
-    context.artifacts["run_timestamp"] = run_timestamp
-    pipeline.run(context)
+    status = "failed"
+    try:
+        with code_profiler(args.profile, profile_path):
+            pipeline.run(context)
+        status = "succeeded"
+    finally:
+        context.artifacts.close()
+        # Failed runs keep the stage timings recorded up to the failure.
+        write_metrics(config, context, status=status)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+"""Concurrent runs of several source configs that share the curated layer."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+from src.config import PipelineConfig, load_config
+from src.dedup import index_dir
+
+LOGGER = logging.getLogger(__name__)
+
+SG_TZ = ZoneInfo("Asia/Singapore")
+DEFAULT_STATE_PATH = "outputs/metadata/state.json"
+# File names of the metadata moved under metadata/sources/<source_name>/.
+SOURCE_METADATA = {"state_path": "state.json", "ledger_path": "processed_files.csv", "index_dir": "dedup"}
+
+
+def _metadata_paths(config: PipelineConfig) -> Dict[str, Path]:
+    incremental = config.incremental or {}
+    return {
+        "state_path": Path(incremental.get("state_path") or DEFAULT_STATE_PATH),
+        "ledger_path": Path(
+            incremental.get("ledger_path") or Path(config.output_dir) / "metadata" / "processed_files.csv"
+        ),
+        "index_dir": index_dir(config),
+    }
+
+
+def source_configs(configs: Sequence[PipelineConfig]) -> List[PipelineConfig]:
+    """Give every source its own metadata paths; raises ``ValueError`` for clashing sources."""
+    names = Counter(config.source_name for config in configs)
+    duplicates = sorted(name for name, count in names.items() if count > 1)
+    if duplicates:
+        raise ValueError(f"source_name must differ between sources, repeated: {duplicates}")
+    inputs = Counter(Path(config.input_path).resolve() for config in configs)
+    shared_inputs = sorted(str(path) for path, count in inputs.items() if count > 1)
+    if shared_inputs:
+        raise ValueError(f"input_path must differ between sources, shared: {shared_inputs}")
+
+    paths = [_metadata_paths(config) for config in configs]
+    usage = Counter(path.resolve() for entry in paths for path in entry.values())
+    resolved = []
+    for config, entry in zip(configs, paths):
+        own = Path(config.output_dir) / "metadata" / "sources" / config.source_name
+        moved = {key: str(own / SOURCE_METADATA[key]) for key, path in entry.items() if usage[path.resolve()] > 1}
+        incremental = dict(config.incremental or {})
+        incremental.update({key: value for key, value in moved.items() if key != "index_dir"})
+        dedup = dict(config.dedup or {})
+        if "index_dir" in moved:
+            dedup["index_dir"] = moved["index_dir"]
+        resolved.append(replace(config, incremental=incremental, dedup=dedup))
+    return resolved
+
+
+def _run_source(config: PipelineConfig, run_id: str) -> Dict[str, Any]:
+    from src.main import build_pipeline, write_metrics
+
+    started = time.perf_counter()
+    try:
+        pipeline, context = build_pipeline(config, run_id=run_id)
+        status = "failed"
+        try:
+            pipeline.run(context)
+            status = "succeeded"
+        finally:
+            context.artifacts.close()
+            write_metrics(config, context, status=status)
+    except Exception:
+        return {
+            "source": config.source_name,
+            "run_id": run_id,
+            "status": "failed",
+            "seconds": round(time.perf_counter() - started, 3),
+            "error": traceback.format_exc(),
+        }
+    return {
+        "source": config.source_name,
+        "run_id": run_id,
+        "status": "succeeded",
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+class MultiSourceRunner:
+    """Runs several source configs at once, one worker process per source."""
+
+    def __init__(self, configs: Sequence[PipelineConfig], workers: Optional[int] = None) -> None:
+        self.configs = source_configs(configs)
+        self.workers = max(1, min(workers or len(self.configs), len(self.configs)))
+
+    def run(self) -> List[Dict[str, Any]]:
+        stamp = datetime.now(tz=SG_TZ).strftime("%Y%m%dT%H%M%S%z")
+        jobs = [(config, f"run_{stamp}_{config.source_name}") for config in self.configs]
+        LOGGER.info("Running %s sources on %s workers", len(jobs), self.workers)
+        if self.workers == 1:
+            results = [_run_source(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                futures = [executor.submit(_run_source, *job) for job in jobs]
+                results = [future.result() for future in futures]
+        for result in results:
+            if result["status"] == "failed":
+                LOGGER.error("Source %s failed:\n%s", result["source"], result["error"])
+        return results
+
+
+def run_sources_command(config_paths: Sequence[Path], workers: Optional[int] = None, as_json: bool = False) -> int:
+    import json
+
+    results = MultiSourceRunner([load_config(Path(path)) for path in config_paths], workers=workers).run()
+    if as_json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"{result['source']}: {result['status']} in {result['seconds']}s ({result['run_id']})")
+    return 0 if all(result["status"] == "succeeded" for result in results) else 1
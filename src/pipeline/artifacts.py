@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import logging
+import shutil
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from src.utils.profiling import frame_bytes, row_count
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _is_table(value: Any) -> bool:
+    return isinstance(value, (pd.DataFrame, pa.Table))
+
+
+class ArtifactStore(MutableMapping):
+    """Run artifacts with an optional memory budget for DataFrames and Arrow tables.
+
+    Tables beyond the budget are spilled, least recently used first, to Arrow IPC
+    files in ``scratch_dir`` and memory-mapped back on the next access. Artifacts
+    retained for later consumers are dropped once every consumer has released them.
+    """
+
+    def __init__(
+        self,
+        initial: Optional[Dict[str, Any]] = None,
+        memory_budget_bytes: Optional[int] = None,
+        scratch_dir: Optional[Path] = None,
+    ) -> None:
+        self.memory_budget_bytes = memory_budget_bytes
+        self.scratch_dir = Path(scratch_dir) if scratch_dir else None
+        self._values: Dict[str, Any] = {}
+        self._spilled: Dict[str, Tuple[Path, str]] = {}
+        self._backing_files: Dict[str, Path] = {}
+        self._sizes: Dict[str, int] = {}
+        self._rows: Dict[str, Optional[int]] = {}
+        self._versions: Dict[str, int] = {}
+        self._lru: "OrderedDict[str, None]" = OrderedDict()
+        self._refcounts: Dict[str, int] = {}
+        self._next_version = 0
+        for key, value in (initial or {}).items():
+            self[key] = value
+
+    @classmethod
+    def from_config(cls, config, run_id: str) -> "ArtifactStore":
+        store_cfg = getattr(config, "artifact_store", None) or {}
+        budget_mb = store_cfg.get("memory_budget_mb")
+        if not budget_mb:
+            return cls()
+        scratch_root = Path(
+            store_cfg.get("scratch_dir", Path(config.output_dir) / "scratch")
+        )
+        return cls(
+            memory_budget_bytes=int(budget_mb * 1024 * 1024),
+            scratch_dir=scratch_root / run_id,
+        )
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._drop(key)
+        self._values[key] = value
+        self._next_version += 1
+        self._versions[key] = self._next_version
+        if _is_table(value):
+            self._rows[key] = row_count(value)
+            if self.memory_budget_bytes is not None:
+                self._sizes[key] = frame_bytes(value, deep=True) or 0
+                self._lru[key] = None
+                self._enforce_budget(protect=key)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._spilled:
+            self._load(key)
+        if key not in self._values:
+            raise KeyError(key)
+        if key in self._lru:
+            self._lru.move_to_end(key)
+        return self._values[key]
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._drop(key)
+        self._refcounts.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._values or key in self._spilled
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._versions))
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(self._sizes[key] for key in self._lru if key in self._values)
+
+    def is_spilled(self, key: str) -> bool:
+        return key in self._spilled
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self._versions)
+
+    def stats(self, key: str, deep: bool = False) -> Tuple[Optional[int], Optional[int]]:
+        """Return ``(rows, bytes)`` for a table artifact without loading it back."""
+        if key in self._spilled:
+            return self._rows.get(key), self._sizes.get(key)
+        value = self._values.get(key)
+        if not _is_table(value):
+            return None, None
+        if key in self._sizes and (deep or isinstance(value, pa.Table)):
+            return self._rows.get(key), self._sizes[key]
+        return self._rows.get(key), frame_bytes(value, deep=deep)
+
+    def retain(self, key: str, count: int = 1) -> None:
+        self._refcounts[key] = self._refcounts.get(key, 0) + count
+
+    def release(self, key: str) -> None:
+        if key not in self._refcounts:
+            return
+        self._refcounts[key] -= 1
+        if self._refcounts[key] <= 0:
+            self._refcounts.pop(key)
+            if key in self:
+                LOGGER.debug("Dropping artifact %s; no remaining consumers", key)
+                self._drop(key)
+
+    def close(self) -> None:
+        for key in list(self._versions):
+            self._drop(key)
+        if self.scratch_dir is not None and self.scratch_dir.exists():
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
+    def _drop(self, key: str) -> None:
+        self._values.pop(key, None)
+        self._lru.pop(key, None)
+        self._sizes.pop(key, None)
+        self._rows.pop(key, None)
+        self._versions.pop(key, None)
+        spilled = self._spilled.pop(key, None)
+        if spilled is not None:
+            spilled[0].unlink(missing_ok=True)
+        backing = self._backing_files.pop(key, None)
+        if backing is not None:
+            backing.unlink(missing_ok=True)
+
+    def _enforce_budget(self, protect: str) -> None:
+        resident = self.resident_bytes
+        for candidate in list(self._lru):
+            if resident <= self.memory_budget_bytes:
+                break
+            if candidate == protect or candidate not in self._values:
+                continue
+            if self._spill(candidate):
+                resident -= self._sizes[candidate]
+
+    def _spill(self, key: str) -> bool:
+        value = self._values[key]
+        kind = "pandas" if isinstance(value, pd.DataFrame) else "arrow"
+        backing = self._backing_files.pop(key, None)
+        if backing is not None:
+            # Unchanged memory-mapped table: its IPC file is still on disk.
+            del self._values[key]
+            self._spilled[key] = (backing, kind)
+            return True
+        try:
+            table = pa.Table.from_pandas(value) if kind == "pandas" else value
+        except (pa.ArrowException, TypeError, ValueError) as exc:
+            LOGGER.warning("Artifact %s cannot be spilled (%s); keeping it in memory", key, exc)
+            return False
+
+        self.scratch_dir.mkdir(parents=True, exist_ok=True)
+        path = self.scratch_dir / f"{key}-{self._versions[key]}.arrow"
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        del self._values[key]
+        self._spilled[key] = (path, kind)
+        LOGGER.info("Spilled artifact %s (%s bytes) to %s", key, self._sizes[key], path)
+        return True
+
+    def _load(self, key: str) -> None:
+        path, kind = self._spilled.pop(key)
+        table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        if kind == "pandas":
+            value = table.to_pandas()
+            # The converted frame owns its buffers, so the spill file can go.
+            path.unlink(missing_ok=True)
+        else:
+            # The table stays backed by the memory map and can be re-spilled for free.
+            value = table
+            self._backing_files[key] = path
+        self._values[key] = value
+        self._lru[key] = None
+        self._lru.move_to_end(key)
+        self._enforce_budget(protect=key)
@@ -1,17 +1,32 @@
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, List, Optional, Tuple
+
+from src.pipeline.artifacts import ArtifactStore
+from src.utils.profiling import RunProfiler, row_count
+
+LOGGER = logging.getLogger(__name__)
 
 
 @dataclass
 class PipelineContext:
     config: Any
-    artifacts: Dict[str, Any] = field(default_factory=dict)
+    artifacts: ArtifactStore = field(default_factory=ArtifactStore)
+    profiler: Optional[RunProfiler] = None
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.artifacts, ArtifactStore):
+            self.artifacts = ArtifactStore(initial=self.artifacts)
 
 
 class PipelineStage:
     name = "stage"
+    # Artifacts read by this stage; each is dropped after its last consumer runs.
+    consumes: Tuple[str, ...] = ()
+    # Skipped when the incoming batch has no rows, e.g. every row was already ingested.
+    skip_when_empty = False
 
     def run(self, context: PipelineContext, data: Optional[Any] = None) -> Any:
         raise NotImplementedError
@@ -22,7 +37,43 @@ class Pipeline:
         self.stages = stages
 
     def run(self, context: PipelineContext) -> Any:
-        data = None
+        artifacts = context.artifacts
         for stage in self.stages:
-            data = stage.run(context, data)
+            for key in stage.consumes:
+                artifacts.retain(key)
+
+        profiler = context.profiler
+        if profiler is None:
+            data = None
+            for stage in self.stages:
+                if not self._skipped(stage, data):
+                    data = stage.run(context, data)
+                self._release(artifacts, stage)
+            return data
+
+        data = None
+        with profiler.activate():
+            for stage in self.stages:
+                if self._skipped(stage, data):
+                    self._release(artifacts, stage)
+                    continue
+                before = artifacts.snapshot()
+                with profiler.measure("stage", stage.name) as record:
+                    record["rows_in"] = row_count(data)
+                    data = stage.run(context, data)
+                    record["rows_out"] = row_count(data)
+                profiler.record_artifacts(stage.name, artifacts, before)
+                self._release(artifacts, stage)
         return data
+
+    @staticmethod
+    def _skipped(stage: PipelineStage, data: Any) -> bool:
+        if stage.skip_when_empty and row_count(data) == 0:
+            LOGGER.info("Skipping stage %s: the batch has no rows", stage.name)
+            return True
+        return False
+
+    @staticmethod
+    def _release(artifacts: ArtifactStore, stage: PipelineStage) -> None:
+        for key in stage.consumes:
+            artifacts.release(key)
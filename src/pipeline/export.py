@@ -0,0 +1,20 @@
+import logging
+from typing import Any, Optional
+
+from src.export import TableExporter
+from src.pipeline.base import PipelineContext, PipelineStage
+from src.utils.profiling import span
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ExportStage(PipelineStage):
+    """Apply the run's committed changes to the embedded analytical database."""
+
+    name = "export"
+
+    def run(self, context: PipelineContext, data: Optional[Any] = None) -> Any:
+        with span("export.sync"):
+            summary = TableExporter(context.config).run(context.artifacts.get("export_deltas"))
+        context.artifacts["export_summary"] = summary
+        return data
@@ -1,15 +1,36 @@
+import csv
+import io
 import logging
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 
+from src.dedup import HashIndex, row_hashes
 from src.pipeline.base import PipelineContext, PipelineStage
-from src.state import read_state
+from src.pipeline.prefetch import Prefetcher
+from src.state import read_state, source_file_id
+from src.utils.arrow import coerce_numeric, constant_column, set_or_append
+from src.utils.categorical import categorical_columns, encode_frame, encode_table
+from src.utils.profiling import record_timing
 
 LOGGER = logging.getLogger(__name__)
 
+# Codes that are digits but not numbers: postal sectors 01-09 keep their leading zero.
+TEXT_COLUMNS = ("postal_code",)
+
+
+def text_columns(config) -> frozenset:
+    """Normalised source headers to read as strings instead of inferring a type."""
+    return frozenset(
+        CsvIngestStage._normalize_column(config.columns[name]) for name in TEXT_COLUMNS if config.columns.get(name)
+    )
+
 
 class CsvIngestStage(PipelineStage):
     name = "ingest_csv"
@@ -20,15 +41,17 @@ class CsvIngestStage(PipelineStage):
         df, new_file_ids, processed_files, source_files = self._read_input(
             input_path,
             incremental_cfg,
+            prefetch_depth=(context.config.execution or {}).get("prefetch_depth", 2),
+            text_columns=text_columns(context.config),
         )
 
-        df.columns = [self._normalize_column(col) for col in df.columns]
         rename_map = {
             self._normalize_column(source): target
             for target, source in context.config.columns.items()
             if source
         }
-        df = df.rename(columns=rename_map)
+        df = self._rename_columns(df, rename_map)
+        df = self._encode_columns(df, categorical_columns(context.config))
         context.artifacts["raw"] = df
 
         context.artifacts["source_files"] = source_files
@@ -41,25 +64,41 @@ class CsvIngestStage(PipelineStage):
             last_year = state.get("last_assessment_year")
             allow_backfill = incremental_cfg.get("allow_backfill", False)
 
-            if key not in df.columns:
-                df[key] = pd.NA
-            df[key] = pd.to_numeric(df[key], errors="coerce")
-            if last_year is not None and not allow_backfill:
-                df = df[(df[key].isna()) | (df[key] >= last_year)].copy()
-            current_max = df[key].dropna().max() if key in df.columns else None
+            df, current_max = self._apply_watermark(df, key, last_year, allow_backfill)
             context.artifacts["incremental_state_path"] = state_path
             context.artifacts["incremental_last_year"] = last_year
             context.artifacts["incremental_max_year"] = int(current_max) if pd.notna(current_max) else None
             context.artifacts["incremental_processed_files"] = processed_files
             context.artifacts["incremental_new_files"] = new_file_ids
 
+        if (context.config.dedup or {}).get("enabled") and len(df):
+            df = self._drop_known_rows(context, df)
+
+        return df
+
+    def _drop_known_rows(self, context: PipelineContext, df: Any) -> Any:
+        """Drop rows ingested by an earlier run (or repeated in this batch) before validation."""
+        hashes = row_hashes(df)
+        seen = HashIndex.from_config(context.config).contains(hashes)
+        seen |= pd.Series(hashes).duplicated().to_numpy()
+        # Committed to the index by WriteStage, so a failed run does not hide its rows.
+        context.artifacts["dedup_hashes"] = hashes[~seen]
+        context.artifacts["dedup_dropped"] = int(seen.sum())
+        if seen.any():
+            LOGGER.info("Dropped %s previously ingested rows", int(seen.sum()))
+            df = self._keep_rows(df, ~seen)
         return df
 
+    def _keep_rows(self, df: pd.DataFrame, keep: np.ndarray) -> pd.DataFrame:
+        return df[keep].copy()
+
     def _read_input(
         self,
         input_path: Path,
         incremental_cfg: dict,
-    ) -> tuple[pd.DataFrame, list[str], list[str], list[Path]]:
+        prefetch_depth: int = 0,
+        text_columns: frozenset = frozenset(),
+    ) -> tuple[Any, list[str], list[str], list[Path]]:
         track_files = incremental_cfg.get("track_files", False)
         state_path = Path(incremental_cfg.get("state_path", "outputs/metadata/state.json"))
         state = read_state(state_path) if incremental_cfg.get("enabled") else {}
@@ -68,43 +107,149 @@ class CsvIngestStage(PipelineStage):
         new_file_ids: list[str] = []
         source_files: list[Path] = []
 
-        def file_id(path: Path) -> str:
-            stat = path.stat()
-            return f"{path.name}:{stat.st_size}:{int(stat.st_mtime)}"
-
         if input_path.is_dir():
             csv_files = sorted(input_path.glob("*.csv"))
             if not csv_files:
                 raise FileNotFoundError(f"No CSV files found in {input_path}")
-            frames = []
+            pending = []
             for file_path in csv_files:
-                file_key = file_id(file_path)
+                file_key = source_file_id(file_path)
                 if track_files and file_key in processed_set:
                     continue
+                pending.append((file_path, file_key))
+            # File N+1 is read from disk while file N is parsed.
+            reader = Prefetcher(pending, lambda entry: entry[0].read_bytes(), depth=prefetch_depth or 0)
+            frames = []
+            bytes_read = 0
+            for (file_path, file_key), payload in reader:
                 LOGGER.info("Reading input file: %s", file_path)
-                frame = pd.read_csv(file_path)
-                frame["source_file"] = file_path.name
-                frame["source_file_id"] = file_key
-                frames.append(frame)
+                frames.append(self._read_file(file_path, file_key, payload, text_columns))
                 new_file_ids.append(file_key)
                 source_files.append(file_path)
+                bytes_read += len(payload)
+            self._record_prefetch(reader.stats, bytes_read)
             if not frames:
-                return pd.DataFrame(), new_file_ids, processed_files, source_files
-            return pd.concat(frames, ignore_index=True), new_file_ids, processed_files, source_files
+                return self._empty(), new_file_ids, processed_files, source_files
+            return self._concat(frames), new_file_ids, processed_files, source_files
 
         LOGGER.info("Reading input file: %s", input_path)
-        file_key = file_id(input_path)
+        file_key = source_file_id(input_path)
         if track_files and file_key in processed_set:
-            return pd.DataFrame(), new_file_ids, processed_files, source_files
+            return self._empty(), new_file_ids, processed_files, source_files
         new_file_ids.append(file_key)
-        frame = pd.read_csv(input_path)
-        frame["source_file"] = input_path.name
-        frame["source_file_id"] = file_key
+        frame = self._read_file(input_path, file_key, text_columns=text_columns)
         source_files.append(input_path)
         return frame, new_file_ids, processed_files, source_files
 
+    @staticmethod
+    def _record_prefetch(stats: dict, bytes_read: int) -> None:
+        if not stats["items"]:
+            return
+        record_timing("ingest.prefetch.read", stats["load_s"], bytes_read)
+        record_timing("ingest.prefetch.wait", stats["wait_s"])
+        record_timing("ingest.prefetch.hidden", stats["hidden_s"])
+        LOGGER.info(
+            "Read %s file(s) in %.3fs with prefetch depth %s; %.3fs of reading overlapped parsing",
+            stats["items"],
+            stats["load_s"],
+            stats["depth"],
+            stats["hidden_s"],
+        )
+
+    def _text_headers(self, path: Path, payload: Optional[bytes], text_columns: frozenset) -> list[str]:
+        if not text_columns:
+            return []
+        if payload is None:
+            with open(path, newline="", encoding="utf-8-sig") as handle:
+                first_line = handle.readline()
+        else:
+            first_line = payload.split(b"\n", 1)[0].decode("utf-8-sig")
+        header = next(csv.reader([first_line]), [])
+        return [name for name in header if self._normalize_column(name) in text_columns]
+
+    def _read_file(
+        self, path: Path, file_key: str, payload: Optional[bytes] = None, text_columns: frozenset = frozenset()
+    ) -> pd.DataFrame:
+        text_headers = self._text_headers(path, payload, text_columns)
+        frame = pd.read_csv(path if payload is None else io.BytesIO(payload), dtype=dict.fromkeys(text_headers, str))
+        frame["source_file"] = path.name
+        frame["source_file_id"] = file_key
+        return frame
+
+    def _encode_columns(self, df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+        # After the concat: per-file categoricals with different categories concat to object.
+        return encode_frame(df, columns)
+
+    def _concat(self, frames: list) -> pd.DataFrame:
+        return pd.concat(frames, ignore_index=True)
+
+    def _empty(self) -> pd.DataFrame:
+        return pd.DataFrame()
+
+    def _rename_columns(self, df: pd.DataFrame, rename_map: dict) -> pd.DataFrame:
+        df.columns = [self._normalize_column(col) for col in df.columns]
+        return df.rename(columns=rename_map)
+
+    def _apply_watermark(
+        self, df: pd.DataFrame, key: str, last_year, allow_backfill: bool
+    ) -> tuple[pd.DataFrame, Any]:
+        if key not in df.columns:
+            df[key] = pd.NA
+        df[key] = pd.to_numeric(df[key], errors="coerce")
+        if last_year is not None and not allow_backfill:
+            df = df[(df[key].isna()) | (df[key] >= last_year)].copy()
+        current_max = df[key].dropna().max() if key in df.columns else None
+        return df, current_max
+
     @staticmethod
     def _normalize_column(name: str) -> str:
         normalized = re.sub(r"[^a-z0-9]+", "_", name.strip().lower())
         normalized = re.sub(r"_+", "_", normalized)
         return normalized.strip("_")
+
+
+class ArrowCsvIngestStage(CsvIngestStage):
+    """Reads input CSVs straight into a ``pyarrow.Table`` with the multi-threaded Arrow reader."""
+
+    def _read_file(
+        self, path: Path, file_key: str, payload: Optional[bytes] = None, text_columns: frozenset = frozenset()
+    ) -> pa.Table:
+        # Timestamps are left as strings so the raw zone keeps the source values.
+        text_types = dict.fromkeys(self._text_headers(path, payload, text_columns), pa.string())
+        table = pa_csv.read_csv(
+            path if payload is None else pa.BufferReader(payload),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=text_types, timestamp_parsers=[], strings_can_be_null=True
+            ),
+        )
+        table = table.append_column("source_file", constant_column(path.name, table.num_rows))
+        return table.append_column("source_file_id", constant_column(file_key, table.num_rows))
+
+    def _concat(self, frames: list) -> pa.Table:
+        return pa.concat_tables(frames, promote_options="permissive").unify_dictionaries()
+
+    def _encode_columns(self, df: pa.Table, columns: list[str]) -> pa.Table:
+        return encode_table(df, columns)
+
+    def _empty(self) -> pa.Table:
+        return pa.table({})
+
+    def _keep_rows(self, df: pa.Table, keep: np.ndarray) -> pa.Table:
+        return df.filter(pa.array(keep))
+
+    def _rename_columns(self, df: pa.Table, rename_map: dict) -> pa.Table:
+        names = [self._normalize_column(col) for col in df.column_names]
+        return df.rename_columns([rename_map.get(name, name) for name in names])
+
+    def _apply_watermark(
+        self, df: pa.Table, key: str, last_year, allow_backfill: bool
+    ) -> tuple[pa.Table, Any]:
+        if key not in df.column_names:
+            df = df.append_column(key, pa.nulls(df.num_rows, pa.int64()))
+        values = coerce_numeric(df[key])
+        df = set_or_append(df, key, values)
+        if last_year is not None and not allow_backfill:
+            keep = pc.or_kleene(pc.is_null(values), pc.greater_equal(values, last_year))
+            df = df.filter(keep)
+        current_max = pc.max(df[key]).as_py() if df.num_rows else None
+        return df, current_max
@@ -0,0 +1,94 @@
+"""Bounded read-ahead of input files on a background thread."""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Iterable, Iterator, Tuple, TypeVar
+
+T = TypeVar("T")
+V = TypeVar("V")
+
+_DONE = object()
+
+
+class Prefetcher(Generic[T, V]):
+    """Yields ``(item, loader(item))`` in order, loading ahead on one background thread."""
+
+    def __init__(self, items: Iterable[T], loader: Callable[[T], V], depth: int = 2) -> None:
+        self.items = list(items)
+        self.loader = loader
+        self.depth = max(0, int(depth))
+        self.load_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.loaded = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "items": self.loaded,
+            "depth": self.depth,
+            "load_s": self.load_seconds,
+            "wait_s": self.wait_seconds,
+            # Loading time that overlapped with the consumer's own work.
+            "hidden_s": max(0.0, self.load_seconds - self.wait_seconds),
+        }
+
+    def _load(self, item: T) -> V:
+        started = time.perf_counter()
+        value = self.loader(item)
+        self.load_seconds += time.perf_counter() - started
+        self.loaded += 1
+        return value
+
+    def __iter__(self) -> Iterator[Tuple[T, V]]:
+        if self.depth == 0 or len(self.items) < 2:
+            for item in self.items:
+                started = time.perf_counter()
+                value = self._load(item)
+                self.wait_seconds += time.perf_counter() - started
+                yield item, value
+            return
+
+        slots: "queue.Queue[Any]" = queue.Queue(maxsize=self.depth)
+        stop = threading.Event()
+
+        def produce() -> None:
+            for item in self.items:
+                if stop.is_set():
+                    return
+                try:
+                    entry = (item, self._load(item), None)
+                except BaseException as exc:  # re-raised in the consumer
+                    entry = (item, None, exc)
+                while not stop.is_set():
+                    try:
+                        slots.put(entry, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if entry[2] is not None:
+                    return
+            slots.put(_DONE)
+
+        reader = threading.Thread(target=produce, name="input-prefetch", daemon=True)
+        reader.start()
+        try:
+            while True:
+                started = time.perf_counter()
+                entry = slots.get()
+                self.wait_seconds += time.perf_counter() - started
+                if entry is _DONE:
+                    return
+                item, value, error = entry
+                if error is not None:
+                    raise error
+                yield item, value
+        finally:
+            stop.set()
+            while reader.is_alive():
+                try:
+                    slots.get_nowait()
+                except queue.Empty:
+                    reader.join(timeout=0.1)
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.pipeline.base import PipelineContext, PipelineStage
+from src.quality.metrics import calculate_domain_metrics, calculate_domain_metrics_arrow
+from src.transform.arrow_builders import TAXPAYER_COLUMNS
+from src.utils.profiling import span
+from src.validation.registry import RuleRegistry
+
+LOGGER = logging.getLogger(__name__)
+
+ORDER_COLUMN = "_shard_order"
+ROW_ARTIFACTS = ("validated", "staging", "quarantine")
+# (name, size) of an Arrow IPC stream held in a shared memory block.
+SharedRef = Tuple[str, int]
+
+
+def shard_assignments(nric, shards: int) -> np.ndarray:
+    """Map each row to a shard by a stable hash of its stripped NRIC.
+
+    Every return of a taxpayer lands in the same shard, so dimensions built per shard
+    never split a taxpayer. Null NRICs hash like the empty string.
+    """
+    if isinstance(nric, (pa.Array, pa.ChunkedArray)):
+        nric = nric.to_pandas()
+    keys = pd.Series(nric, dtype="string").str.strip().fillna("")
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    return (hashes % np.uint64(shards)).astype(np.int64)
+
+
+def _to_table(value) -> pa.Table:
+    if isinstance(value, pd.DataFrame):
+        return pa.Table.from_pandas(value, preserve_index=False)
+    return value
+
+
+def _write_shared(table: pa.Table) -> SharedRef:
+    sizer = pa.MockOutputStream()
+    with pa.ipc.new_stream(sizer, table.schema) as writer:
+        writer.write_table(table)
+    size = sizer.size()
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    _write_stream(block.buf, table)
+    block.close()
+    return block.name, size
+
+
+def _write_stream(target: memoryview, table: pa.Table) -> None:
+    # Kept in its own frame so every view of ``target`` is released before close().
+    sink = pa.FixedSizeBufferWriter(pa.py_buffer(target))
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    sink.close()
+
+
+def _read_shared(ref: SharedRef, unlink: bool = True) -> pa.Table:
+    name, size = ref
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        # Copy out of the block so it can be released while the table lives on.
+        payload = pa.py_buffer(bytes(block.buf[:size]))
+    finally:
+        block.close()
+        if unlink:
+            block.unlink()
+    return pa.ipc.open_stream(payload).read_all()
+
+
+def _first_row_ids(valid: pd.DataFrame, dim_geo, dim_taxpayer) -> Dict[str, np.ndarray]:
+    """Row id of the first valid row behind each dimension and fact row.
+
+    The builders keep first-seen order, so these ids reproduce the order an unsharded
+    run would produce once the shard outputs are concatenated and sorted.
+    """
+    postal = valid["postal_code"].astype("string")
+    geo_first = valid["row_id"][~postal.duplicated()].to_numpy()
+    taxpayer_first = valid["row_id"][~valid[TAXPAYER_COLUMNS].duplicated()].to_numpy()
+    lookup = pd.DataFrame({"nric": _to_table(dim_taxpayer)["nric"].to_pandas()})
+    fact_rows = valid[["nric", "row_id"]].merge(lookup, on="nric", how="left")["row_id"].to_numpy()
+    if len(geo_first) != len(dim_geo) or len(taxpayer_first) != len(dim_taxpayer):
+        raise RuntimeError("Shard dimension rows do not line up with their source rows.")
+    return {"dim_geo": geo_first, "dim_taxpayer": taxpayer_first, "fact_tax_returns": fact_rows}
+
+
+def _run_shard(
+    validate_stage: PipelineStage,
+    transform_stage: PipelineStage,
+    config,
+    shared_artifacts: dict,
+    ref: SharedRef,
+    engine: str,
+) -> Dict[str, SharedRef]:
+    table = _read_shared(ref, unlink=False)
+    data = table.to_pandas() if engine == "pandas" else table
+    context = PipelineContext(config=config, artifacts=dict(shared_artifacts))
+    data = validate_stage.run(context, data)
+    transform_stage.run(context, data)
+
+    valid = context.artifacts["valid"]
+    source_cols = ["row_id", "nric", "postal_code"] + TAXPAYER_COLUMNS[1:]
+    if isinstance(valid, pa.Table):
+        valid = valid.select(list(dict.fromkeys(source_cols))).to_pandas()
+    order = _first_row_ids(
+        valid, context.artifacts["dim_geo"], context.artifacts["dim_taxpayer"]
+    )
+
+    refs = {}
+    try:
+        for key in ROW_ARTIFACTS:
+            refs[key] = _write_shared(_to_table(context.artifacts[key]))
+        for key, first_rows in order.items():
+            result = _to_table(context.artifacts[key])
+            refs[key] = _write_shared(result.append_column(ORDER_COLUMN, pa.array(first_rows, pa.int64())))
+    except BaseException:
+        # The parent never learns these names, so they are released here.
+        for ref in refs.values():
+            _release_shared(ref)
+        raise
+    return refs
+
+
+def _concat(tables: List[pa.Table]) -> pa.Table:
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def _sort_by(table: pa.Table, column: str) -> pa.Table:
+    return table.take(pc.sort_indices(table, sort_keys=[(column, "ascending")]))
+
+
+def merge_shard_results(results: List[Dict[str, pa.Table]]) -> Dict[str, pa.Table]:
+    """Combine per-shard outputs into what one unsharded run would have produced."""
+    merged = {}
+    for key in ROW_ARTIFACTS:
+        merged[key] = _sort_by(_concat([result[key] for result in results]), "row_id")
+
+    # A postal code may appear in several shards; keep its earliest occurrence.
+    geo = _sort_by(_concat([result["dim_geo"] for result in results]), ORDER_COLUMN)
+    first_seen = ~pd.Series(geo["postal_code"].to_pandas(), dtype="string").duplicated().to_numpy()
+    merged["dim_geo"] = geo.filter(pa.array(first_seen)).drop_columns([ORDER_COLUMN])
+
+    taxpayer = _sort_by(_concat([result["dim_taxpayer"] for result in results]), ORDER_COLUMN)
+    merged["dim_taxpayer"] = taxpayer.drop_columns([ORDER_COLUMN])
+
+    # Sorting is stable, so the rows of one source row keep their shard-local order.
+    fact = _sort_by(_concat([result["fact_tax_returns"] for result in results]), ORDER_COLUMN)
+    fact = fact.drop_columns([ORDER_COLUMN])
+    return_id = pa.array(np.arange(1, fact.num_rows + 1, dtype=np.int64))
+    merged["fact_tax_returns"] = fact.set_column(fact.column_names.index("return_id"), "return_id", return_id)
+    return merged
+
+
+class ShardedValidateTransformStage(PipelineStage):
+    """Runs validate and transform per NRIC hash shard in worker processes.
+
+    Rows are numbered before partitioning and shipped to the workers as Arrow IPC
+    streams in shared memory. Shard outputs are merged back in source order, so
+    ``row_id`` and ``return_id`` match an unsharded run for any shard count.
+    """
+
+    name = "validate_transform"
+    skip_when_empty = True
+
+    def __init__(
+        self,
+        validate_stage: PipelineStage,
+        transform_stage: PipelineStage,
+        shards: int,
+        workers: Optional[int] = None,
+    ) -> None:
+        self.validate_stage = validate_stage
+        self.transform_stage = transform_stage
+        self.shards = shards
+        self.workers = workers or min(shards, os.cpu_count() or 1)
+
+    def run(self, context: PipelineContext, data=None):
+        if data is None:
+            raise ValueError("Validation stage requires input data.")
+
+        engine = "arrow" if isinstance(data, pa.Table) else "pandas"
+        table = _to_table(data)
+        table = table.append_column("row_id", pa.array(np.arange(1, table.num_rows + 1, dtype=np.int64)))
+
+        shared_artifacts = {
+            key: context.artifacts[key] for key in ["run_id", "run_timestamp"] if key in context.artifacts
+        }
+        mp_context = multiprocessing.get_context("spawn")
+        # Every block created for this run, inputs and shard outputs, is released in finally.
+        refs: List[SharedRef] = []
+        outputs: List[Dict[str, SharedRef]] = []
+        errors: List[BaseException] = []
+        try:
+            with span("validate_transform.partition"):
+                assignments = shard_assignments(table["nric"], self.shards)
+                for shard in range(self.shards):
+                    part = table.filter(pa.array(assignments == shard))
+                    if part.num_rows:
+                        refs.append(_write_shared(part))
+            del table
+
+            LOGGER.info("Running %s shards on %s worker processes", len(refs), self.workers)
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context) as executor:
+                futures = [
+                    executor.submit(
+                        _run_shard,
+                        self.validate_stage,
+                        self.transform_stage,
+                        context.config,
+                        shared_artifacts,
+                        ref,
+                        engine,
+                    )
+                    for ref in refs
+                ]
+                # Wait for every shard, so the outputs of those that succeeded are known too.
+                for future in futures:
+                    try:
+                        outputs.append(future.result())
+                    except Exception as exc:
+                        errors.append(exc)
+            if errors:
+                raise errors[0]
+            results = [{key: _read_shared(ref, unlink=False) for key, ref in output.items()} for output in outputs]
+        finally:
+            for ref in refs + [ref for output in outputs for ref in output.values()]:
+                _release_shared(ref)
+
+        with span("validate_transform.merge"):
+            merged = merge_shard_results(results)
+        del results
+
+        registry = RuleRegistry.from_config(context.config)
+        if engine == "arrow":
+            metrics = calculate_domain_metrics_arrow(merged["validated"], registry.domain_map)
+        else:
+            merged = {key: _to_frame(key, value) for key, value in merged.items()}
+            metrics = calculate_domain_metrics(merged["validated"], registry.domain_map)
+
+        for key, value in merged.items():
+            context.artifacts[key] = value
+        context.artifacts["quality_metrics"] = metrics
+        return merged["validated"]
+
+
+def _to_frame(key: str, table: pa.Table) -> pd.DataFrame:
+    frame = table.to_pandas()
+    if key in ROW_ARTIFACTS:
+        # Keep the source positions as the index, like the unsharded boolean filters do.
+        frame.index = pd.Index(frame["row_id"].to_numpy() - 1)
+    return frame
+
+
+def _release_shared(ref: SharedRef) -> None:
+    try:
+        block = shared_memory.SharedMemory(name=ref[0])
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
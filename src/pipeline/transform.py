@@ -2,16 +2,27 @@ import logging
 from typing import Optional
 
 import pandas as pd
+import pyarrow as pa
 
 from src.pipeline.base import PipelineContext, PipelineStage
+from src.transform.arrow_builders import (
+    build_dim_geo_arrow,
+    build_dim_taxpayer_arrow,
+    build_fact_tax_returns_arrow,
+)
 from src.transform.dimensions import build_dim_geo, build_dim_taxpayer
 from src.transform.facts import build_fact_tax_returns
+from src.utils.arrow import with_constant_columns
+from src.utils.categorical import categorical_columns, encode_frame, encode_table
+from src.utils.profiling import span
 
 LOGGER = logging.getLogger(__name__)
 
 
 class TransformStage(PipelineStage):
     name = "transform"
+    consumes = ("valid",)
+    skip_when_empty = True
 
     def run(self, context: PipelineContext, data: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         if data is None:
@@ -21,9 +32,12 @@ class TransformStage(PipelineStage):
         run_timestamp = context.artifacts.get("run_timestamp")
         source = context.artifacts.get("valid", data)
 
-        dim_geo = build_dim_geo(source)
-        dim_taxpayer = build_dim_taxpayer(source, dim_geo)
-        fact_tax_returns = build_fact_tax_returns(source, dim_taxpayer, context.config)
+        with span("transform.build_dim_geo"):
+            dim_geo = encode_frame(build_dim_geo(source), categorical_columns(context.config))
+        with span("transform.build_dim_taxpayer"):
+            dim_taxpayer = build_dim_taxpayer(source, dim_geo)
+        with span("transform.build_fact_tax_returns"):
+            fact_tax_returns = build_fact_tax_returns(source, dim_taxpayer, context.config)
 
         for frame in [dim_geo, dim_taxpayer, fact_tax_returns]:
             if run_id is not None:
@@ -37,3 +51,33 @@ class TransformStage(PipelineStage):
         context.artifacts["dim_taxpayer"] = dim_taxpayer
         context.artifacts["fact_tax_returns"] = fact_tax_returns
         return data
+
+
+class ArrowTransformStage(TransformStage):
+    """Builds dimensions and facts as ``pyarrow.Table`` objects."""
+
+    def run(self, context: PipelineContext, data: Optional[pa.Table] = None) -> pa.Table:
+        if data is None:
+            raise ValueError("Transform stage requires input data.")
+
+        run_id = context.artifacts.get("run_id")
+        run_timestamp = context.artifacts.get("run_timestamp")
+        source = context.artifacts.get("valid", data)
+
+        with span("transform.build_dim_geo"):
+            dim_geo = encode_table(build_dim_geo_arrow(source), categorical_columns(context.config))
+        with span("transform.build_dim_taxpayer"):
+            dim_taxpayer = build_dim_taxpayer_arrow(source, dim_geo)
+        with span("transform.build_fact_tax_returns"):
+            fact_tax_returns = build_fact_tax_returns_arrow(source, dim_taxpayer, context.config)
+
+        audit = {}
+        if run_id is not None:
+            audit.update({"created_run_id": run_id, "last_seen_run_id": run_id})
+        if run_timestamp is not None:
+            audit.update({"created_at": run_timestamp, "updated_at": run_timestamp})
+
+        context.artifacts["dim_geo"] = with_constant_columns(dim_geo, audit)
+        context.artifacts["dim_taxpayer"] = with_constant_columns(dim_taxpayer, audit)
+        context.artifacts["fact_tax_returns"] = with_constant_columns(fact_tax_returns, audit)
+        return data
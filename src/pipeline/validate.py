@@ -2,9 +2,16 @@ import logging
 from typing import Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 from src.pipeline.base import PipelineContext, PipelineStage
-from src.quality.metrics import calculate_domain_metrics
+from src.pipeline.warm import cached
+from src.quality.metrics import calculate_domain_metrics, calculate_domain_metrics_arrow
+from src.utils.arrow import as_string, coerce_numeric, parse_timestamp, set_or_append
+from src.utils.categorical import map_categories, trim_dictionary
+from src.utils.dates import parse_dates
+from src.utils.money import MONEY_COLUMNS, fixed_point, to_cents, to_cents_arrow
 from src.validation.registry import RuleRegistry
 
 LOGGER = logging.getLogger(__name__)
@@ -12,6 +19,7 @@ LOGGER = logging.getLogger(__name__)
 
 class ValidateStage(PipelineStage):
     name = "validate"
+    skip_when_empty = True
 
     def run(self, context: PipelineContext, data: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         if data is None:
@@ -20,7 +28,8 @@ class ValidateStage(PipelineStage):
         cleaned = data.copy()
         for col in ["nric", "postal_code", "residential_status", "occupation"]:
             if col in cleaned.columns:
-                cleaned[col] = cleaned[col].astype("string").str.strip()
+                # Categorical columns are stripped per category and stay encoded.
+                cleaned[col] = map_categories(cleaned[col], lambda values: values.str.strip())
 
         for col in [
             "annual_income",
@@ -32,11 +41,16 @@ class ValidateStage(PipelineStage):
         ]:
             if col in cleaned.columns:
                 cleaned[col] = pd.to_numeric(cleaned[col], errors="coerce")
+        if fixed_point(context.config):
+            for col in MONEY_COLUMNS:
+                if col in cleaned.columns:
+                    cleaned[col] = to_cents(cleaned[col])
 
         if "filing_date" in cleaned.columns:
-            cleaned["filing_date"] = pd.to_datetime(cleaned["filing_date"], errors="coerce")
+            # Parsed once here; the rules, transform and SCD2 writes reuse the datetime column.
+            cleaned["filing_date"] = parse_dates(cleaned["filing_date"])
 
-        registry = RuleRegistry.from_config(context.config)
+        registry = cached("rule_registry", lambda: RuleRegistry.from_config(context.config))
         results = registry.apply_rules(cleaned)
         metrics = calculate_domain_metrics(results, registry.domain_map)
 
@@ -53,3 +67,56 @@ class ValidateStage(PipelineStage):
         context.artifacts["valid"] = valid
         context.artifacts["quality_metrics"] = metrics
         return results
+
+
+class ArrowValidateStage(ValidateStage):
+    """Validation over ``pyarrow.Table`` input using ``pyarrow.compute`` kernels."""
+
+    def run(self, context: PipelineContext, data: Optional[pa.Table] = None) -> pa.Table:
+        if data is None:
+            raise ValueError("Validation stage requires input data.")
+
+        cleaned = data
+        for col in ["nric", "postal_code", "residential_status", "occupation"]:
+            if col in cleaned.column_names:
+                values = cleaned[col]
+                if pa.types.is_dictionary(values.type):
+                    values = trim_dictionary(values)
+                else:
+                    values = pc.utf8_trim_whitespace(as_string(values))
+                cleaned = set_or_append(cleaned, col, values)
+
+        for col in [
+            "annual_income",
+            "total_reliefs",
+            "chargeable_income",
+            "cpf_contribution",
+            "tax_payable",
+            "tax_paid",
+        ]:
+            if col in cleaned.column_names:
+                cleaned = set_or_append(cleaned, col, coerce_numeric(cleaned[col]))
+        if fixed_point(context.config):
+            for col in MONEY_COLUMNS:
+                if col in cleaned.column_names:
+                    cleaned = set_or_append(cleaned, col, to_cents_arrow(cleaned[col]))
+
+        if "filing_date" in cleaned.column_names:
+            cleaned = set_or_append(cleaned, "filing_date", parse_timestamp(cleaned["filing_date"]))
+
+        registry = cached("rule_registry", lambda: RuleRegistry.from_config(context.config))
+        results = registry.apply_rules_arrow(cleaned)
+        metrics = calculate_domain_metrics_arrow(results, registry.domain_map)
+
+        rule_cols = [col for cols in registry.domain_map.values() for col in cols]
+        dq_all_pass = results[rule_cols[0]]
+        for col in rule_cols[1:]:
+            dq_all_pass = pc.and_(dq_all_pass, results[col])
+
+        # Arrow tables are immutable, so staging shares buffers with the results.
+        context.artifacts["validated"] = results
+        context.artifacts["staging"] = results
+        context.artifacts["quarantine"] = results.filter(pc.invert(dq_all_pass))
+        context.artifacts["valid"] = results.filter(dq_all_pass)
+        context.artifacts["quality_metrics"] = metrics
+        return results
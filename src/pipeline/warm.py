@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+LOGGER = logging.getLogger(__name__)
+
+_ACTIVE: contextvars.ContextVar[Optional["WarmState"]] = contextvars.ContextVar(
+    "warm_state", default=None
+)
+
+
+def _signature(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WarmState:
+    """State a resident process keeps between pipeline runs.
+
+    Curated tables written by one run are served from memory to the next run as long
+    as the file on disk is unchanged, and objects such as the rule registry are built
+    once. Nothing is cached unless the state is active.
+    """
+
+    def __init__(self) -> None:
+        self._tables: Dict[Path, Tuple[Tuple[int, int], pd.DataFrame]] = {}
+        self._objects: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @contextmanager
+    def activate(self) -> Iterator["WarmState"]:
+        token = _ACTIVE.set(self)
+        try:
+            yield self
+        finally:
+            _ACTIVE.reset(token)
+
+    def read_parquet(self, path: Path) -> pd.DataFrame:
+        path = Path(path).resolve()
+        cached = self._tables.get(path)
+        if cached is not None and cached[0] == _signature(path):
+            self.hits += 1
+            return cached[1].copy()
+        self.misses += 1
+        frame = pd.read_parquet(path)
+        self._tables[path] = (_signature(path), frame.copy())
+        return frame
+
+    def write_parquet(self, frame: pd.DataFrame, path: Path, row_group_size: Optional[int] = None) -> None:
+        _write_atomic(frame, path, row_group_size)
+        self._tables[Path(path).resolve()] = (
+            _signature(Path(path)),
+            frame.reset_index(drop=True).copy(),
+        )
+
+    def cached(self, key: str, factory: Callable[[], Any]) -> Any:
+        if key not in self._objects:
+            self._objects[key] = factory()
+        return self._objects[key]
+
+    def clear(self) -> None:
+        self._tables.clear()
+        self._objects.clear()
+
+
+def active_state() -> Optional[WarmState]:
+    return _ACTIVE.get()
+
+
+def read_parquet(path: Path) -> pd.DataFrame:
+    state = _ACTIVE.get()
+    if state is None:
+        return pd.read_parquet(path)
+    return state.read_parquet(path)
+
+
+def _write_atomic(frame: pd.DataFrame, path: Path, row_group_size: Optional[int] = None) -> None:
+    # Written aside and renamed, so concurrent readers see the old or the new file, never a torn one.
+    staged = Path(path).with_name(Path(path).name + ".tmp")
+    frame.to_parquet(staged, index=False, row_group_size=row_group_size)
+    os.replace(staged, path)
+
+
+def write_parquet(frame: pd.DataFrame, path: Path, row_group_size: Optional[int] = None) -> None:
+    state = _ACTIVE.get()
+    if state is None:
+        _write_atomic(frame, path, row_group_size)
+        return
+    state.write_parquet(frame, path, row_group_size=row_group_size)
+
+
+def cached(key: str, factory: Callable[[], Any]) -> Any:
+    state = _ACTIVE.get()
+    if state is None:
+        return factory()
+    return state.cached(key, factory)
@@ -1,25 +1,42 @@
 import logging
 from datetime import datetime
 from pathlib import Path
-import shutil
-from typing import Optional
+from typing import Dict, Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from pandas.api.types import is_datetime64_any_dtype
 
+from src.dedup import HashIndex
+from src.export import TableDelta, file_version, table_delta
 from src.pipeline.base import PipelineContext, PipelineStage
+from src.locks import lock_dir, lock_timeout, table_locks
+from src.lookup import INDEXED_COLUMNS, write_indexes
+from src.pipeline.warm import read_parquet, write_parquet
 import json
 from zoneinfo import ZoneInfo
 
+from src.quality.history import DqHistory
 from src.quality.outputs import (
     build_quality_outputs,
     build_quarantine_reports,
     build_summary_report,
 )
-from src.state import write_state
+from src.sinks import OutputSink
+from src.state import parse_file_id, write_state
+from src.transform.rollups import Scd2Change, rollup_grains, update_rollups
+from src.utils.arrow import decode_dictionaries, ordered_left_join, to_pandas_frame, with_constant_columns
+from src.utils.categorical import align_categories, categorical_columns
+from src.utils.money import money_scale
+from src.utils.profiling import span
 
 LOGGER = logging.getLogger(__name__)
 
+# Sources share the datamart and quality outputs; each rewrites only its own rows.
+SOURCE_COLUMN = "source_name"
+
 
 def _json_safe(value):
     if isinstance(value, (list, dict)):
@@ -31,17 +48,87 @@ def _json_safe(value):
     return value
 
 
+def _is_table(value) -> bool:
+    return isinstance(value, (pd.DataFrame, pa.Table))
+
+
+def _write_zone_frame(sink: OutputSink, frame, path: str, audit: dict) -> None:
+    if isinstance(frame, pa.Table):
+        sink.write_table(with_constant_columns(frame, audit), path)
+        return
+    zone_frame = frame.copy()
+    for col, value in audit.items():
+        zone_frame[col] = value
+    sink.write_table(zone_frame, path)
+
+
+def _build_datamart_arrow(
+    fact_tax_returns: pa.Table, dim_taxpayer_current: pa.Table, dim_geo: pa.Table
+) -> pa.Table:
+    mart = ordered_left_join(
+        fact_tax_returns, dim_taxpayer_current, keys="taxpayer_id", right_suffix="_taxpayer"
+    )
+    return ordered_left_join(mart, dim_geo, keys="geo_id", right_suffix="_geo")
+
+
+def _concat_source_rows(kept: pa.Table, table: pa.Table) -> pa.Table:
+    if not kept.num_rows:
+        return table
+    try:
+        return pa.concat_tables([kept, table], promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Another engine, or a backfill, may have typed a column differently; the new rows' types win.
+        kept, table = decode_dictionaries(kept), decode_dictionaries(table)
+        for field in table.schema:
+            index = kept.schema.get_field_index(field.name)
+            if index >= 0 and kept.schema.field(index).type != field.type:
+                kept = kept.set_column(index, field.name, kept[field.name].cast(field.type, safe=False))
+        return pa.concat_tables([kept, table], promote_options="permissive")
+
+
+def _merge_source_rows(path: Path, rows, source_name: str) -> None:
+    """Write ``rows`` as ``source_name``'s rows of ``path``, keeping every other source's rows.
+
+    Callers hold the table's lock, so a concurrent source cannot drop the rows merged here.
+    """
+    if isinstance(rows, pa.Table):
+        table = with_constant_columns(rows.replace_schema_metadata(None), {SOURCE_COLUMN: source_name})
+        if path.exists():
+            existing = pq.read_table(path).replace_schema_metadata(None)
+            if SOURCE_COLUMN in existing.column_names:
+                kept = existing.filter(pc.not_equal(existing[SOURCE_COLUMN], source_name))
+                table = _concat_source_rows(kept, table)
+        pq.write_table(table, path)
+        return
+    frame = rows.assign(**{SOURCE_COLUMN: source_name})
+    if path.exists():
+        existing = pd.read_parquet(path)
+        if SOURCE_COLUMN in existing.columns:
+            kept, frame = align_categories([existing[existing[SOURCE_COLUMN].ne(source_name)], frame])
+            frame = pd.concat([kept, frame], ignore_index=True)
+    frame.to_parquet(path, index=False)
+
+
 def _sanitize_records(records):
     return [{key: _json_safe(value) for key, value in record.items()} for record in records]
 
 
 def _normalize_datetime(frame: pd.DataFrame, columns: list[str]) -> None:
     for col in columns:
-        if col in frame.columns:
-            frame[col] = (
-                pd.to_datetime(frame[col], errors="coerce", utc=True)
-                .dt.tz_convert("Asia/Singapore")
-            )
+        if col not in frame.columns:
+            continue
+        values = frame[col]
+        if is_datetime64_any_dtype(values):
+            # Already parsed: only the time zone needs adjusting (naive values are UTC).
+            if values.dt.tz is None:
+                values = values.dt.tz_localize("UTC")
+            if str(values.dt.tz) != "Asia/Singapore":
+                frame[col] = values.dt.tz_convert("Asia/Singapore")
+            continue
+        frame[col] = (
+            pd.to_datetime(values, errors="coerce", utc=True)
+            .dt.tz_convert("Asia/Singapore")
+        )
 
 
 def _preserve_created_fields(
@@ -82,18 +169,20 @@ def _align_merge_key_dtypes(left: pd.DataFrame, right: pd.DataFrame, keys: list[
 
 def _upsert_parquet(
     path: Path, new_df: pd.DataFrame, keys: list[str], current_run_id: str
-) -> None:
+) -> Optional[pd.DataFrame]:
     if new_df is None:
-        return
+        return None
     if path.exists():
-        existing = pd.read_parquet(path)
-        new_frame = _preserve_created_fields(existing, new_df.copy(), keys)
+        with span(f"write.read_existing.{path.stem}"):
+            existing = read_parquet(path)
+        existing, new_frame = align_categories([existing, new_df.copy()])
+        new_frame = _preserve_created_fields(existing, new_frame, keys)
         combined = pd.concat([existing, new_frame], ignore_index=True)
     else:
-        combined = new_df.copy()
+        combined = align_categories([new_df.copy()])[0]
 
     if combined.empty:
-        return
+        return None
 
     if "updated_at" in combined.columns:
         combined = combined.sort_values(by="updated_at")
@@ -106,7 +195,9 @@ def _upsert_parquet(
         combined = combined.merge(key_df, on=keys, how="left")
         combined.loc[combined["_present"].eq(True), "last_seen_run_id"] = current_run_id
         combined.drop(columns=["_present"], inplace=True)
-    combined.to_parquet(path, index=False)
+    with span(f"write.write_curated.{path.stem}"):
+        write_parquet(combined, path)
+    return combined
 
 
 def _upsert_fact_scd2(
@@ -114,15 +205,17 @@ def _upsert_fact_scd2(
     new_df: pd.DataFrame,
     current_run_id: str,
     current_run_ts: datetime,
-) -> None:
+    row_group_size: Optional[int] = None,
+) -> Optional[Scd2Change]:
     if new_df is None:
-        return
+        return None
     existing_current = None
     dedupe_cols = []
     if path.exists():
-        existing = pd.read_parquet(path)
+        with span(f"write.read_existing.{path.stem}"):
+            existing = read_parquet(path)
         date_cols = ["filing_date", "created_at", "updated_at"]
-        new_frame = new_df.copy()
+        existing, new_frame = align_categories([existing, new_df.copy()])
         _normalize_datetime(existing, date_cols)
         _normalize_datetime(new_frame, date_cols)
         dedupe_cols = [
@@ -147,10 +240,10 @@ def _upsert_fact_scd2(
             new_frame = _preserve_created_fields(existing, new_frame, dedupe_cols)
         combined = pd.concat([existing, new_frame], ignore_index=True)
     else:
-        combined = new_df.copy()
+        combined = align_categories([new_df.copy()])[0]
 
     if combined.empty:
-        return
+        return None
 
     _normalize_datetime(combined, ["filing_date", "created_at", "updated_at"])
 
@@ -201,9 +294,13 @@ def _upsert_fact_scd2(
         if "updated_at" not in combined.columns:
             combined["updated_at"] = pd.NaT
         combined.loc[retired_mask, "updated_at"] = current_run_ts
-        combined.drop(columns=["_was_current"], inplace=True)
+        was_current = combined.pop("_was_current").eq(True)
+    else:
+        was_current = pd.Series(False, index=combined.index)
 
-    combined.to_parquet(path, index=False)
+    with span(f"write.write_curated.{path.stem}"):
+        write_parquet(combined, path, row_group_size=row_group_size)
+    return Scd2Change(combined, was_current)
 
 
 def _upsert_dim_taxpayer_scd2(
@@ -211,15 +308,18 @@ def _upsert_dim_taxpayer_scd2(
     new_df: pd.DataFrame,
     current_run_id: str,
     current_run_ts: datetime,
-) -> None:
+    row_group_size: Optional[int] = None,
+) -> Optional[Scd2Change]:
     if new_df is None:
-        return
+        return None
     existing_current = None
     dedupe_cols = []
     if path.exists():
-        existing = pd.read_parquet(path)
+        with span(f"write.read_existing.{path.stem}"):
+            existing = read_parquet(path)
         date_cols = ["created_at", "updated_at"]
-        new_frame = new_df.copy()
+        # Shared categories keep the concat and the dedupe merges on integer codes.
+        existing, new_frame = align_categories([existing, new_df.copy()])
         _normalize_datetime(existing, date_cols)
         _normalize_datetime(new_frame, date_cols)
         dedupe_cols = [
@@ -242,10 +342,10 @@ def _upsert_dim_taxpayer_scd2(
             new_frame = _preserve_created_fields(existing, new_frame, dedupe_cols)
         combined = pd.concat([existing, new_frame], ignore_index=True)
     else:
-        combined = new_df.copy()
+        combined = align_categories([new_df.copy()])[0]
 
     if combined.empty:
-        return
+        return None
 
     _normalize_datetime(combined, ["created_at", "updated_at"])
 
@@ -290,29 +390,27 @@ def _upsert_dim_taxpayer_scd2(
         combined = combined.merge(current_keys, on=dedupe_cols, how="left")
         retired_mask = combined["_was_current"].eq(True) & ~combined["is_current"]
         combined.loc[retired_mask, "updated_at"] = current_run_ts
-        combined.drop(columns=["_was_current"], inplace=True)
-
-    combined.to_parquet(path, index=False)
-
+        was_current = combined.pop("_was_current").eq(True)
+    else:
+        was_current = pd.Series(False, index=combined.index)
 
-def _parse_file_id(file_id: str) -> dict:
-    parts = file_id.split(":")
-    if len(parts) != 3:
-        return {"file_name": file_id, "file_size": None, "file_mtime": None}
-    name, size, mtime = parts
-    try:
-        file_size = int(size)
-    except ValueError:
-        file_size = None
-    try:
-        file_mtime = datetime.utcfromtimestamp(int(mtime)).replace(tzinfo=ZoneInfo("UTC")).astimezone(ZoneInfo("Asia/Singapore")).isoformat()
-    except ValueError:
-        file_mtime = None
-    return {"file_name": name, "file_size": file_size, "file_mtime": file_mtime}
+    with span(f"write.write_curated.{path.stem}"):
+        write_parquet(combined, path, row_group_size=row_group_size)
+    return Scd2Change(combined, was_current)
 
 
 class WriteStage(PipelineStage):
     name = "write"
+    consumes = (
+        "raw",
+        "validated",
+        "staging",
+        "quarantine",
+        "quality_metrics",
+        "dim_geo",
+        "dim_taxpayer",
+        "fact_tax_returns",
+    )
 
     def run(self, context: PipelineContext, data: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         output_dir = Path(context.config.output_dir)
@@ -336,94 +434,68 @@ class WriteStage(PipelineStage):
 
         ingest_date = run_dt.date().isoformat()
 
-        for zone in [landing_dir, raw_zone, staging_zone, quarantine_zone, curated_zone, datamart_zone]:
+        sink = OutputSink.from_config(context.config)
+        for zone in [curated_zone, datamart_zone]:
             zone.mkdir(parents=True, exist_ok=True)
+        raw_root = sink.zone_root("raw", raw_zone)
+        staging_root = sink.zone_root("staging", staging_zone)
+        quarantine_root = sink.zone_root("staging/quarantine", quarantine_zone)
 
-        dim_taxpayer = context.artifacts.get("dim_taxpayer")
-        dim_geo = context.artifacts.get("dim_geo")
-        fact_tax_returns = context.artifacts.get("fact_tax_returns")
         quality_metrics = context.artifacts.get("quality_metrics")
         validated = context.artifacts.get("validated")
         staging = context.artifacts.get("staging")
         quarantine = context.artifacts.get("quarantine")
         raw = context.artifacts.get("raw")
 
-        if isinstance(raw, pd.DataFrame):
-            raw_frame = raw.copy()
-            raw_frame["created_run_id"] = run_id
-            raw_frame["last_seen_run_id"] = run_id
-            raw_frame["ingested_at"] = run_timestamp
-            raw_part_dir = raw_zone / source_name / f"ingest_date={ingest_date}"
-            raw_part_dir.mkdir(parents=True, exist_ok=True)
-            raw_frame.to_parquet(raw_part_dir / f"raw_{run_id}.parquet", index=False)
-        if isinstance(staging, pd.DataFrame):
-            staging_frame = staging.copy()
-            staging_frame["created_run_id"] = run_id
-            staging_frame["last_seen_run_id"] = run_id
-            staging_frame["ingested_at"] = run_timestamp
-            staging_part_dir = staging_zone / source_name / f"ingest_date={ingest_date}"
-            staging_part_dir.mkdir(parents=True, exist_ok=True)
-            staging_frame.to_parquet(staging_part_dir / f"staging_{run_id}.parquet", index=False)
-        if isinstance(quarantine, pd.DataFrame):
-            quarantine_frame = quarantine.copy()
-            quarantine_frame["created_run_id"] = run_id
-            quarantine_frame["last_seen_run_id"] = run_id
-            quarantine_frame["ingested_at"] = run_timestamp
-            quarantine_part_dir = quarantine_zone / source_name / f"ingest_date={ingest_date}"
-            quarantine_part_dir.mkdir(parents=True, exist_ok=True)
-            quarantine_frame.to_parquet(
-                quarantine_part_dir / f"quarantine_{run_id}.parquet", index=False
-            )
-            breakdown, samples = build_quarantine_reports(quarantine)
-            breakdown.to_parquet(
-                quarantine_part_dir / f"quarantine_breakdown_{run_id}.parquet",
-                index=False,
+        zone_audit = {
+            "created_run_id": run_id,
+            "last_seen_run_id": run_id,
+            "ingested_at": run_timestamp,
+        }
+        partition = f"{source_name}/ingest_date={ingest_date}"
+        if _is_table(raw):
+            _write_zone_frame(sink, raw, f"{raw_root}/{partition}/raw_{run_id}.parquet", zone_audit)
+        if _is_table(staging):
+            _write_zone_frame(sink, staging, f"{staging_root}/{partition}/staging_{run_id}.parquet", zone_audit)
+        quarantine_reports = None
+        if _is_table(quarantine):
+            quarantine_part_dir = f"{quarantine_root}/{partition}"
+            _write_zone_frame(
+                sink, quarantine, f"{quarantine_part_dir}/quarantine_{run_id}.parquet", zone_audit
             )
-            samples.to_parquet(
-                quarantine_part_dir / f"quarantine_samples_{run_id}.parquet",
-                index=False,
-            )
-
+            quarantine_reports = build_quarantine_reports(to_pandas_frame(quarantine))
+            breakdown, samples = quarantine_reports
+            sink.write_table(breakdown, f"{quarantine_part_dir}/quarantine_breakdown_{run_id}.parquet")
+            sink.write_table(samples, f"{quarantine_part_dir}/quarantine_samples_{run_id}.parquet")
+
+        run_folder = f"{source_name}/{run_dt.strftime('%Y/%m/%d')}/{run_id}"
+        landing_root = sink.zone_root("landing", landing_dir)
+        archive_root = sink.zone_root("archive", context.artifacts.get("archive_dir", Path("archive")))
         for source_path in context.artifacts.get("source_files", []):
-            landing_path = landing_dir / source_name / run_dt.strftime("%Y/%m/%d") / run_id
-            landing_path.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(source_path, landing_path / source_path.name)
-
-            archive_root = context.artifacts.get("archive_dir", Path("archive"))
-            archive_path = archive_root / source_name / run_dt.strftime("%Y/%m/%d") / run_id
-            archive_path.mkdir(parents=True, exist_ok=True)
-            shutil.move(str(source_path), archive_path / source_path.name)
-
-        if isinstance(dim_taxpayer, pd.DataFrame):
-            _upsert_dim_taxpayer_scd2(
-                curated_zone / "dim_taxpayer.parquet",
-                dim_taxpayer,
-                run_id,
-                run_dt,
-            )
-        if isinstance(dim_geo, pd.DataFrame):
-            _upsert_parquet(
-                curated_zone / "dim_geo.parquet",
-                dim_geo,
-                ["postal_code"],
-                run_id,
-            )
-        if isinstance(fact_tax_returns, pd.DataFrame):
-            _upsert_fact_scd2(
-                curated_zone / "fact_tax_returns.parquet",
-                fact_tax_returns,
-                run_id,
-                run_dt,
-            )
-
-        data_quality_results, agg_metrics = build_quality_outputs(validated, quality_metrics)
-        data_quality_results.to_parquet(curated_zone / "data_quality_results.parquet", index=False)
-        agg_metrics.to_parquet(curated_zone / "agg_data_quality_metrics.parquet", index=False)
-
-        if isinstance(validated, pd.DataFrame):
-            summary = build_summary_report(validated)
-            if isinstance(quarantine, pd.DataFrame):
-                breakdown, samples = build_quarantine_reports(quarantine)
+            landing_path = f"{landing_root}/{run_folder}/{source_path.name}"
+            sink.put_file(source_path, landing_path)
+            # On an object store the archive is a server-side copy of the landing object.
+            sink.move_in(source_path, f"{archive_root}/{run_folder}/{source_path.name}", copy_of=landing_path)
+
+        # A batch left empty by dedup or the watermark skips validate and transform; its
+        # files are still archived and recorded below, so they are not picked up again.
+        if _is_table(validated):
+            self.write_curated(context, curated_zone, datamart_zone, run_id, run_dt)
+
+            data_quality_results, agg_metrics = build_quality_outputs(validated, quality_metrics)
+            with table_locks(lock_dir(context.config), ["quality"], lock_timeout(context.config)):
+                _merge_source_rows(curated_zone / "data_quality_results.parquet", data_quality_results, source_name)
+                _merge_source_rows(curated_zone / "agg_data_quality_metrics.parquet", agg_metrics, source_name)
+            if (context.config.quality_history or {}).get("enabled", True):
+                with span("write.dq_history"):
+                    DqHistory.from_config(context.config).append(
+                        run_id, run_dt.isoformat(), source_name, data_quality_results, agg_metrics
+                    )
+
+        if _is_table(validated):
+            summary = build_summary_report(validated, money_scale(context.config))
+            if quarantine_reports is not None:
+                breakdown, samples = quarantine_reports
                 summary["quarantine_breakdown"] = _sanitize_records(
                     breakdown.to_dict(orient="records")
                 )
@@ -431,24 +503,8 @@ class WriteStage(PipelineStage):
                     samples.to_dict(orient="records")
                 )
             summary = {key: _json_safe(value) for key, value in summary.items()}
-            pd.DataFrame([summary]).to_parquet(
-                curated_zone / "summary_report.parquet", index=False
-            )
-
-        if isinstance(dim_taxpayer, pd.DataFrame) and isinstance(dim_geo, pd.DataFrame) and isinstance(fact_tax_returns, pd.DataFrame):
-            dim_taxpayer_current = dim_taxpayer
-            dim_taxpayer_path = curated_zone / "dim_taxpayer.parquet"
-            if dim_taxpayer_path.exists():
-                dim_taxpayer_loaded = pd.read_parquet(dim_taxpayer_path)
-                if "is_current" in dim_taxpayer_loaded.columns:
-                    dim_taxpayer_current = dim_taxpayer_loaded[dim_taxpayer_loaded["is_current"]].copy()
-            mart = fact_tax_returns.merge(
-                dim_taxpayer_current,
-                on="taxpayer_id",
-                how="left",
-                suffixes=("", "_taxpayer"),
-            ).merge(dim_geo, on="geo_id", how="left", suffixes=("", "_geo"))
-            mart.to_parquet(datamart_zone / "datamart_tax_returns.parquet", index=False)
+            with table_locks(lock_dir(context.config), ["quality"], lock_timeout(context.config)):
+                _merge_source_rows(curated_zone / "summary_report.parquet", pd.DataFrame([summary]), source_name)
 
         incremental_cfg = context.config.incremental or {}
         if incremental_cfg.get("enabled"):
@@ -467,13 +523,15 @@ class WriteStage(PipelineStage):
                 }
                 write_state(Path(state_path), state_payload)
 
-            metadata_dir = output_dir / "metadata"
-            metadata_dir.mkdir(parents=True, exist_ok=True)
+            ledger_path = Path(
+                incremental_cfg.get("ledger_path") or output_dir / "metadata" / "processed_files.csv"
+            )
+            ledger_path.parent.mkdir(parents=True, exist_ok=True)
             all_files = sorted(set(processed_files + new_files))
             processed_at = datetime.now(tz=ZoneInfo("Asia/Singapore")).isoformat()
             ledger_rows = []
             for file_id in all_files:
-                parsed = _parse_file_id(file_id)
+                parsed = parse_file_id(file_id)
                 ledger_rows.append(
                     {
                         "file_id": file_id,
@@ -484,9 +542,135 @@ class WriteStage(PipelineStage):
                         "is_new": file_id in new_files,
                     }
                 )
-            pd.DataFrame(ledger_rows).to_csv(
-                metadata_dir / "processed_files.csv", index=False
-            )
+            pd.DataFrame(ledger_rows).to_csv(ledger_path, index=False)
+
+        dedup_hashes = context.artifacts.get("dedup_hashes")
+        if dedup_hashes is not None:
+            added = HashIndex.from_config(context.config).add(dedup_hashes)
+            LOGGER.info("Recorded %s new row fingerprints in the dedup index", added)
 
         LOGGER.info("Outputs written to %s", output_dir)
         return data
+
+    def write_curated(
+        self,
+        context: PipelineContext,
+        curated_zone: Path,
+        datamart_zone: Path,
+        run_id: str,
+        run_dt: datetime,
+    ) -> None:
+        """Commit the run's dimensions and facts: SCD2 upserts, lookup indexes, rollups, datamart."""
+        dim_taxpayer = context.artifacts.get("dim_taxpayer")
+        dim_geo = context.artifacts.get("dim_geo")
+        fact_tax_returns = context.artifacts.get("fact_tax_returns")
+        categorical = categorical_columns(context.config)
+        # Tables are shared with runs of other sources; each read-modify-write holds its locks.
+        locks = lock_dir(context.config)
+        timeout = lock_timeout(context.config)
+        # With export enabled, each table's committed rows for this run's keys feed the export.
+        deltas: Dict[str, TableDelta] = {}
+        export_enabled = (context.config.export or {}).get("enabled")
+
+        def record_delta(name: str, key: str, base: Optional[str], committed, batch: pd.DataFrame) -> None:
+            if export_enabled and committed is not None:
+                deltas[name] = table_delta(curated_zone / f"{name}.parquet", base, committed, key, batch[key])
+
+        if _is_table(dim_geo):
+            geo_frame = to_pandas_frame(dim_geo, categorical)
+            geo_path = curated_zone / "dim_geo.parquet"
+            with table_locks(locks, ["dim_geo"], timeout), span("write.upsert_dim_geo"):
+                base = file_version(geo_path)
+                committed = _upsert_parquet(geo_path, geo_frame, ["postal_code"], run_id)
+                record_delta("dim_geo", "postal_code", base, committed, geo_frame)
+
+        index_cfg = context.config.lookup_index or {}
+        row_group_size = index_cfg.get("row_group_size")
+        rollups_cfg = context.config.rollups or {}
+        taxpayer_change = fact_change = None
+        # One rollup delta nets this run's taxpayer and fact versions, so the two SCD2
+        # tables and the rollups are committed under one set of locks.
+        with table_locks(locks, ["dim_taxpayer", "fact_tax_returns", "rollups"], timeout):
+            if _is_table(dim_taxpayer):
+                taxpayer_frame = to_pandas_frame(dim_taxpayer, categorical)
+                base = file_version(curated_zone / "dim_taxpayer.parquet")
+                with span("write.upsert_dim_taxpayer_scd2"):
+                    taxpayer_change = _upsert_dim_taxpayer_scd2(
+                        curated_zone / "dim_taxpayer.parquet",
+                        taxpayer_frame,
+                        run_id,
+                        run_dt,
+                        row_group_size,
+                    )
+                # Closed versions share their nric with the new ones, so both are replaced.
+                committed = None if taxpayer_change is None else taxpayer_change.table
+                record_delta("dim_taxpayer", "nric", base, committed, taxpayer_frame)
+            if _is_table(fact_tax_returns):
+                fact_frame = to_pandas_frame(fact_tax_returns)
+                base = file_version(curated_zone / "fact_tax_returns.parquet")
+                with span("write.upsert_fact_scd2"):
+                    fact_change = _upsert_fact_scd2(
+                        curated_zone / "fact_tax_returns.parquet",
+                        fact_frame,
+                        run_id,
+                        run_dt,
+                        row_group_size,
+                    )
+                committed = None if fact_change is None else fact_change.table
+                record_delta("fact_tax_returns", "return_key", base, committed, fact_frame)
+            if index_cfg.get("enabled"):
+                for table, change in [("dim_taxpayer", taxpayer_change), ("fact_tax_returns", fact_change)]:
+                    if change is not None:
+                        with span(f"write.lookup_index.{table}"):
+                            write_indexes(curated_zone / f"{table}.parquet", INDEXED_COLUMNS[table])
+
+            if rollups_cfg.get("enabled") and fact_change is not None and taxpayer_change is not None:
+                with span("write.update_rollups"):
+                    update_rollups(
+                        datamart_zone,
+                        rollup_grains(context.config),
+                        fact_change,
+                        taxpayer_change,
+                        read_parquet(curated_zone / "dim_geo.parquet"),
+                    )
+
+        source_name = context.config.source_name
+        mart_path = datamart_zone / "datamart_tax_returns.parquet"
+        with table_locks(locks, ["datamart_tax_returns"], timeout):
+            base = file_version(mart_path)
+            self._write_datamart(curated_zone, datamart_zone, dim_taxpayer, dim_geo, fact_tax_returns, source_name)
+            if export_enabled and file_version(mart_path) != base:
+                rows = pq.read_table(mart_path, filters=[(SOURCE_COLUMN, "=", source_name)])
+                deltas["datamart_tax_returns"] = TableDelta(SOURCE_COLUMN, rows, base, file_version(mart_path))
+        context.artifacts["export_deltas"] = deltas
+
+    @staticmethod
+    def _write_datamart(
+        curated_zone: Path, datamart_zone: Path, dim_taxpayer, dim_geo, fact_tax_returns, source_name: str
+    ) -> None:
+        """Replace ``source_name``'s datamart rows with its latest facts joined to the current taxpayers."""
+        if isinstance(fact_tax_returns, pa.Table) and isinstance(dim_geo, pa.Table):
+            dim_taxpayer_path = curated_zone / "dim_taxpayer.parquet"
+            dim_taxpayer_current = dim_taxpayer
+            if dim_taxpayer_path.exists():
+                dim_taxpayer_current = pq.read_table(dim_taxpayer_path)
+                if "is_current" in dim_taxpayer_current.column_names:
+                    dim_taxpayer_current = dim_taxpayer_current.filter(
+                        dim_taxpayer_current["is_current"]
+                    )
+            mart = _build_datamart_arrow(fact_tax_returns, dim_taxpayer_current, dim_geo)
+            _merge_source_rows(datamart_zone / "datamart_tax_returns.parquet", mart, source_name)
+        elif isinstance(dim_taxpayer, pd.DataFrame) and isinstance(dim_geo, pd.DataFrame) and isinstance(fact_tax_returns, pd.DataFrame):
+            dim_taxpayer_current = dim_taxpayer
+            dim_taxpayer_path = curated_zone / "dim_taxpayer.parquet"
+            if dim_taxpayer_path.exists():
+                dim_taxpayer_loaded = read_parquet(dim_taxpayer_path)
+                if "is_current" in dim_taxpayer_loaded.columns:
+                    dim_taxpayer_current = dim_taxpayer_loaded[dim_taxpayer_loaded["is_current"]].copy()
+            mart = fact_tax_returns.merge(
+                dim_taxpayer_current,
+                on="taxpayer_id",
+                how="left",
+                suffixes=("", "_taxpayer"),
+            ).merge(dim_geo, on="geo_id", how="left", suffixes=("", "_geo"))
+            _merge_source_rows(datamart_zone / "datamart_tax_returns.parquet", mart, source_name)
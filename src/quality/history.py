@@ -0,0 +1,167 @@
+"""Append-only history of data-quality outputs, partitioned by run."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_RATE = 0.05
+_PARTITIONING = ds.partitioning(pa.schema([("run_id", pa.string())]), flavor="hive")
+_PASS_COLUMNS = ("rule_", "dq_")
+
+
+def _write_partition(frame: pd.DataFrame, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staged = path.with_name(path.name + ".tmp")
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), staged)
+    os.replace(staged, path)
+
+
+def run_metrics(
+    results: pd.DataFrame, domain_metrics: pd.DataFrame, run_timestamp: str, source_name: str
+) -> pd.DataFrame:
+    """The compact per-run table: one row per quality domain and one per rule column."""
+    domains = pd.DataFrame(
+        {
+            "kind": "domain",
+            "name": domain_metrics["domain"].astype(str),
+            "passing_rows": domain_metrics["passing_rows"].astype("int64"),
+            "total_rows": domain_metrics["total_rows"].astype("int64"),
+        }
+    )
+    rule_columns = [col for col in results.columns if col.startswith("rule_")]
+    rules = pd.DataFrame(
+        {
+            "kind": "rule",
+            "name": rule_columns,
+            "passing_rows": [int(results[col].eq(True).sum()) for col in rule_columns],
+            "total_rows": [int(results[col].notna().sum()) for col in rule_columns],
+        }
+    )
+    metrics = pd.concat([domains, rules], ignore_index=True)
+    metrics["score_pct"] = (100 * metrics["passing_rows"] / metrics["total_rows"].where(metrics["total_rows"] > 0)).round(2)
+    metrics["run_timestamp"] = run_timestamp
+    metrics["source_name"] = source_name
+    return metrics
+
+
+def sample_results(results: pd.DataFrame, rate: float, keep_failed: bool = True) -> pd.DataFrame:
+    """Failing rows (when ``keep_failed``) plus a reproducible ``rate`` sample of the rest."""
+    columns = [col for col in results.columns if col == "row_id" or col.startswith(_PASS_COLUMNS)]
+    frame = results[columns]
+    checks = [col for col in columns if col.startswith("rule_")]
+    failed = ~frame[checks].fillna(False).astype(bool).all(axis=1) if checks else pd.Series(False, index=frame.index)
+    if "row_id" in frame.columns:
+        buckets = pd.util.hash_pandas_object(frame["row_id"], index=False).to_numpy() % np.uint64(1_000_000)
+        sampled = pd.Series(buckets < rate * 1_000_000, index=frame.index)
+    else:
+        sampled = pd.Series(rate >= 1, index=frame.index)
+    kept_failed = failed & keep_failed
+    keep = kept_failed | sampled
+    kept = frame[keep].copy()
+    kept["sample_weight"] = np.where(kept_failed[keep], 1.0, 1.0 / rate if rate > 0 else 0.0)
+    return kept.reset_index(drop=True)
+
+
+class DqHistory:
+    """Run-partitioned quality metrics and sampled row results under ``root``."""
+
+    def __init__(self, root: Path, sample_rate: float = DEFAULT_SAMPLE_RATE, keep_failed: bool = True) -> None:
+        self.root = Path(root)
+        self.sample_rate = sample_rate
+        self.keep_failed = keep_failed
+
+    @classmethod
+    def from_config(cls, config) -> "DqHistory":
+        settings = config.quality_history or {}
+        output_dir = Path(config.output_dir)
+        curated = Path((config.layers or {}).get("curated_dir", output_dir / "curated"))
+        rate = settings.get("results_sample_rate")
+        return cls(
+            Path(settings.get("path") or curated / "dq_history"),
+            DEFAULT_SAMPLE_RATE if rate is None else float(rate),
+            settings.get("keep_failed_rows", True),
+        )
+
+    def append(
+        self,
+        run_id: str,
+        run_timestamp: str,
+        source_name: str,
+        results: pd.DataFrame,
+        domain_metrics: pd.DataFrame,
+    ) -> pd.DataFrame:
+        """Add the run's partitions; returns its metrics rows."""
+        metrics = run_metrics(results, domain_metrics, run_timestamp, source_name)
+        sample = sample_results(results, self.sample_rate, self.keep_failed)
+        _write_partition(sample, self.root / "results" / f"run_id={run_id}" / "results.parquet")
+        # Metrics last: a run shows up in trends only once its results are in place too.
+        _write_partition(metrics, self.root / "metrics" / f"run_id={run_id}" / "metrics.parquet")
+        LOGGER.info("Appended DQ history for %s (%s of %s result rows kept)", run_id, len(sample), len(results))
+        return metrics
+
+    def _dataset(self, name: str) -> Optional[ds.Dataset]:
+        files = sorted(str(path) for path in (self.root / name).glob("run_id=*/*.parquet"))
+        if not files:
+            return None
+        return ds.dataset(files, format="parquet", partitioning=_PARTITIONING, partition_base_dir=str(self.root / name))
+
+    def runs(self) -> pd.DataFrame:
+        """``run_id`` and ``run_timestamp`` of every recorded run, oldest first."""
+        dataset = self._dataset("metrics")
+        if dataset is None:
+            return pd.DataFrame({"run_id": pd.Series(dtype=str), "run_timestamp": pd.Series(dtype=str)})
+        runs = dataset.to_table(columns=["run_id", "run_timestamp"]).to_pandas().drop_duplicates("run_id")
+        order = pd.to_datetime(runs["run_timestamp"], utc=True, format="ISO8601")
+        return runs.assign(_order=order).sort_values(["_order", "run_id"]).drop(columns="_order").reset_index(drop=True)
+
+    def trends(
+        self, runs: Optional[int] = None, kind: Optional[str] = None, names: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """Metrics rows of the last ``runs`` runs (all when None), oldest run first."""
+        dataset = self._dataset("metrics")
+        if dataset is None:
+            return pd.DataFrame()
+        run_ids = self.runs()["run_id"].tolist()
+        if runs is not None:
+            run_ids = run_ids[-runs:] if runs > 0 else []
+        expression = ds.field("run_id").isin(run_ids)
+        if kind is not None:
+            expression &= ds.field("kind") == kind
+        if names is not None:
+            expression &= ds.field("name").isin(list(names))
+        table = dataset.to_table(filter=expression).to_pandas()
+        position = {run_id: index for index, run_id in enumerate(run_ids)}
+        table["_order"] = table["run_id"].map(position)
+        return table.sort_values(["_order", "kind", "name"]).drop(columns="_order").reset_index(drop=True)
+
+    def results(self, run_ids: List[str]) -> pd.DataFrame:
+        """The kept per-row results of ``run_ids``."""
+        dataset = self._dataset("results")
+        if dataset is None:
+            return pd.DataFrame()
+        return dataset.to_table(filter=ds.field("run_id").isin(list(run_ids))).to_pandas()
+
+
+def dq_trends_command(config, runs: Optional[int] = 10, kind: Optional[str] = None, as_json: bool = False) -> int:
+    trends = DqHistory.from_config(config).trends(runs=runs, kind=kind)
+    if as_json:
+        print(json.dumps(trends.to_dict(orient="records"), indent=2, default=str))
+        return 0
+    if trends.empty:
+        print("No data-quality history recorded yet.")
+        return 0
+    table = trends.pivot_table(index=["kind", "name"], columns="run_id", values="score_pct", sort=False)
+    print(table.to_string())
+    return 0
@@ -3,6 +3,8 @@ from __future__ import annotations
 from typing import Dict, List
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 
 def calculate_domain_metrics(df: pd.DataFrame, domain_map: Dict[str, List[str]]) -> pd.DataFrame:
@@ -24,3 +26,27 @@ def calculate_domain_metrics(df: pd.DataFrame, domain_map: Dict[str, List[str]])
         )
 
     return pd.DataFrame(metrics)
+
+
+def calculate_domain_metrics_arrow(table: pa.Table, domain_map: Dict[str, List[str]]) -> pd.DataFrame:
+    metrics = []
+    total = table.num_rows
+
+    for domain, rules in domain_map.items():
+        if not rules:
+            continue
+        passing_mask = table[rules[0]]
+        for rule in rules[1:]:
+            passing_mask = pc.and_(passing_mask, table[rule])
+        passing = pc.sum(pc.cast(passing_mask, pa.int64())).as_py() or 0
+        score = (passing / total) * 100 if total else 0.0
+        metrics.append(
+            {
+                "domain": domain,
+                "passing_rows": int(passing),
+                "total_rows": int(total),
+                "score_pct": round(score, 2),
+            }
+        )
+
+    return pd.DataFrame(metrics)
@@ -4,8 +4,34 @@ from datetime import datetime
 from typing import Tuple
 
 import pandas as pd
+import pyarrow as pa
 from zoneinfo import ZoneInfo
 
+DATA_QUALITY_RESULT_COLUMNS = [
+    "row_id",
+    "rule_nric_format",
+    "rule_postal_code",
+    "rule_filing_date_after_assessment",
+    "rule_chargeable_income",
+    "rule_cpf_residency",
+    "rule_unique_return",
+    "rule_single_filing",
+    "rule_consistent_residency",
+    "dq_completeness_pass",
+    "dq_validity_pass",
+    "dq_accuracy_pass",
+    "dq_uniqueness_pass",
+    "dq_consistency_pass",
+]
+
+SUMMARY_MEASURE_COLUMNS = [
+    "annual_income",
+    "total_reliefs",
+    "chargeable_income",
+    "tax_payable",
+    "tax_paid",
+]
+
 
 def build_quality_outputs(
     validated: pd.DataFrame, metrics: pd.DataFrame
@@ -14,19 +40,13 @@ def build_quality_outputs(
     run_id = datetime.now(tz=sg_tz).strftime("run_%Y%m%dT%H%M%S%z")
     run_timestamp = datetime.now(tz=sg_tz).isoformat()
 
-    data_quality_results = validated[
-        [
-            "row_id",
-            "rule_nric_format",
-            "rule_postal_code",
-            "rule_filing_date_after_assessment",
-            "rule_chargeable_income",
-            "rule_cpf_residency",
-            "dq_completeness_pass",
-            "dq_validity_pass",
-            "dq_accuracy_pass",
-        ]
-    ].copy()
+    # Cross-row rule columns exist only when cross_row_rules are enabled.
+    if isinstance(validated, pa.Table):
+        columns = [col for col in DATA_QUALITY_RESULT_COLUMNS if col in validated.column_names]
+        data_quality_results = validated.select(columns).to_pandas()
+    else:
+        columns = [col for col in DATA_QUALITY_RESULT_COLUMNS if col in validated.columns]
+        data_quality_results = validated[columns].copy()
     data_quality_results["created_run_id"] = run_id
     data_quality_results["last_seen_run_id"] = run_id
     data_quality_results["run_timestamp"] = run_timestamp
@@ -39,7 +59,12 @@ def build_quality_outputs(
     return data_quality_results, agg_metrics
 
 
-def build_summary_report(validated: pd.DataFrame) -> dict:
+def build_summary_report(validated: pd.DataFrame, money_scale: int = 1) -> dict:
+    if isinstance(validated, pa.Table):
+        wanted = DATA_QUALITY_RESULT_COLUMNS + SUMMARY_MEASURE_COLUMNS
+        validated = validated.select(
+            [col for col in wanted if col in validated.column_names]
+        ).to_pandas()
     total_rows = len(validated)
     sg_tz = ZoneInfo("Asia/Singapore")
 
@@ -51,7 +76,8 @@ def build_summary_report(validated: pd.DataFrame) -> dict:
     def sum_numeric(column: str) -> float:
         if column not in validated.columns:
             return 0.0
-        return float(pd.to_numeric(validated[column], errors="coerce").sum())
+        # With fixed-point money the sum is an exact integer count of cents.
+        return float(pd.to_numeric(validated[column], errors="coerce").sum()) / money_scale
 
     summary = {
         "total_rows": int(total_rows),
@@ -60,6 +86,9 @@ def build_summary_report(validated: pd.DataFrame) -> dict:
         "invalid_filing_date_count": count_false("rule_filing_date_after_assessment"),
         "invalid_chargeable_income_count": count_false("rule_chargeable_income"),
         "invalid_cpf_residency_count": count_false("rule_cpf_residency"),
+        "duplicate_return_count": count_false("rule_unique_return"),
+        "multiple_filing_count": count_false("rule_single_filing"),
+        "conflicting_residency_count": count_false("rule_consistent_residency"),
         "annual_income_total": sum_numeric("annual_income"),
         "reliefs_total": sum_numeric("total_reliefs"),
         "chargeable_income_total": sum_numeric("chargeable_income"),
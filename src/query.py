@@ -0,0 +1,288 @@
+"""Read-side query API over the curated, datamart and zone tables."""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.asof import SCD2_KEYS, IntervalIndex, point_in_time_join
+from src.lookup import INDEXED_COLUMNS, LookupIndex
+
+LOGGER = logging.getLogger(__name__)
+
+SG_TZ = ZoneInfo("Asia/Singapore")
+CURATED_TABLES = (
+    "dim_geo",
+    "dim_taxpayer",
+    "fact_tax_returns",
+    "data_quality_results",
+    "agg_data_quality_metrics",
+    "summary_report",
+)
+DATAMART_TABLES = ("datamart_tax_returns",)
+# Zone snapshots are hive-partitioned by ingest_date, one file per run.
+ZONE_TABLES = ("raw", "staging", "quarantine")
+
+Filter = Union[ds.Expression, Sequence[Tuple[str, str, Any]], None]
+Snapshot = Tuple[Tuple[str, int, int], ...]
+
+
+@dataclass(frozen=True)
+class TableSource:
+    name: str
+    files: Tuple[Path, ...]
+    partition_base: Optional[Path] = None
+
+
+def _to_expression(filters: Filter) -> Optional[ds.Expression]:
+    if filters is None or isinstance(filters, ds.Expression):
+        return filters
+    # Same tuple syntax as pyarrow.parquet.read_table(filters=...).
+    return pq.filters_to_expression(list(filters))
+
+
+def _as_of_timestamp(as_of: Union[str, date, datetime, pd.Timestamp]) -> pa.Scalar:
+    stamp = pd.Timestamp(as_of)
+    stamp = stamp.tz_localize(SG_TZ) if stamp.tzinfo is None else stamp.tz_convert(SG_TZ)
+    return pa.scalar(stamp.to_pydatetime(), pa.timestamp("ns", tz=str(SG_TZ)))
+
+
+class QueryEngine:
+    """Query the lakehouse tables with projection, pushdown and an LRU result cache."""
+
+    def __init__(
+        self,
+        curated_dir: Path,
+        datamart_dir: Path,
+        raw_dir: Optional[Path] = None,
+        staging_dir: Optional[Path] = None,
+        source_name: Optional[str] = None,
+        cache_size: int = 64,
+        sink_type: str = "local",
+    ) -> None:
+        self.curated_dir = Path(curated_dir)
+        self.datamart_dir = Path(datamart_dir)
+        self.raw_dir = Path(raw_dir) if raw_dir else None
+        self.staging_dir = Path(staging_dir) if staging_dir else None
+        self.source_name = source_name
+        self.sink_type = sink_type
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Hashable, pa.Table]" = OrderedDict()
+        self._indexes: Dict[Tuple[str, str], Tuple[Snapshot, LookupIndex]] = {}
+        self._intervals: Dict[str, Tuple[Snapshot, pa.Table, IntervalIndex]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config, cache_size: int = 64) -> "QueryEngine":
+        output_dir = Path(config.output_dir)
+        layers = config.layers or {}
+        return cls(
+            curated_dir=Path(layers.get("curated_dir", output_dir / "curated")),
+            datamart_dir=Path(layers.get("datamart_dir", output_dir / "datamart")),
+            raw_dir=Path(layers.get("raw_dir", output_dir / "raw")),
+            staging_dir=Path(layers.get("staging_dir", output_dir / "staging")),
+            source_name=config.source_name,
+            cache_size=cache_size,
+            sink_type=(getattr(config, "sink", None) or {}).get("type") or "local",
+        )
+
+    def tables(self) -> List[str]:
+        rollups = tuple(sorted(path.stem for path in self.datamart_dir.glob("rollup_*.parquet")))
+        names = CURATED_TABLES + DATAMART_TABLES + rollups + (ZONE_TABLES if self.sink_type == "local" else ())
+        return [name for name in names if self._source(name).files]
+
+    def _source(self, table: str) -> TableSource:
+        if table in CURATED_TABLES:
+            path = self.curated_dir / f"{table}.parquet"
+            return TableSource(table, (path,) if path.exists() else ())
+        if table in DATAMART_TABLES or table.startswith("rollup_"):
+            path = self.datamart_dir / f"{table}.parquet"
+            return TableSource(table, (path,) if path.exists() else ())
+        if table in ZONE_TABLES:
+            if self.sink_type != "local":
+                # Written through the sink to an object store; only the layer directories are local.
+                raise ValueError(f"The {table} zone is on the {self.sink_type} sink; only local zones can be queried")
+            zone_root = self.raw_dir if table == "raw" else self.staging_dir
+            if zone_root is None:
+                return TableSource(table, ())
+            if table == "quarantine":
+                zone_root = zone_root / "quarantine"
+            base = zone_root / self.source_name if self.source_name else zone_root
+            # Quarantine partitions also hold breakdown/sample reports; match the run files only.
+            files = tuple(
+                path
+                for path in sorted(base.glob(f"ingest_date=*/{table}_*.parquet"))
+                if not path.name.startswith(("quarantine_breakdown_", "quarantine_samples_"))
+            )
+            return TableSource(table, files, partition_base=base)
+        raise KeyError(f"Unknown table: {table}")
+
+    def snapshot(self, table: str) -> Snapshot:
+        """File names, mtimes and sizes behind ``table``; changes whenever a run rewrites it."""
+        signature = []
+        for path in self._source(table).files:
+            stat = path.stat()
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def dataset(self, table: str) -> ds.Dataset:
+        source = self._source(table)
+        if not source.files:
+            raise FileNotFoundError(f"No data for table {table}")
+        if source.partition_base is not None:
+            return ds.dataset(
+                [str(path) for path in source.files],
+                format="parquet",
+                partitioning=ds.HivePartitioning.discover(infer_dictionary=False),
+                partition_base_dir=str(source.partition_base),
+            )
+        return ds.dataset(str(source.files[0]), format="parquet")
+
+    def query(
+        self,
+        table: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Filter = None,
+        current_only: bool = False,
+        as_of: Union[str, date, datetime, pd.Timestamp, None] = None,
+        limit: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> pa.Table:
+        """Scan ``table`` and return the matching rows as an Arrow table.
+
+        ``filters`` is a ``pyarrow.dataset`` expression or a list of ``(column, op, value)``
+        tuples. ``current_only`` keeps ``is_current`` rows; ``as_of`` keeps the versions
+        effective at that time (naive values are read as Asia/Singapore).
+        """
+        snapshot = self.snapshot(table)
+        if not snapshot:
+            raise FileNotFoundError(f"No data for table {table}")
+        expression = _to_expression(filters)
+        key = (
+            table,
+            snapshot,
+            tuple(columns) if columns is not None else None,
+            str(expression) if expression is not None else None,
+            current_only,
+            str(pd.Timestamp(as_of)) if as_of is not None else None,
+            limit,
+        )
+        if use_cache and key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        self.misses += 1
+
+        dataset = self.dataset(table)
+        expression = self._versioned(dataset, table, expression, current_only, as_of)
+        if limit is not None:
+            result = dataset.head(limit, columns=list(columns) if columns else None, filter=expression)
+        else:
+            result = dataset.to_table(columns=list(columns) if columns else None, filter=expression)
+
+        if use_cache and self.cache_size > 0:
+            self._evict_stale(table, snapshot)
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def query_pandas(self, table: str, **kwargs: Any) -> pd.DataFrame:
+        return self.query(table, **kwargs).to_pandas()
+
+    def lookup(self, table: str, column: str, value: Any, columns: Optional[Sequence[str]] = None) -> pa.Table:
+        """All versions whose ``column`` equals ``value``, read through the sidecar index."""
+        if column not in INDEXED_COLUMNS.get(table, ()):
+            raise ValueError(f"{table}.{column} has no lookup index")
+        snapshot = self.snapshot(table)
+        if not snapshot:
+            raise FileNotFoundError(f"No data for table {table}")
+        loaded = self._indexes.get((table, column))
+        if loaded is None or loaded[0] != snapshot:
+            loaded = (snapshot, LookupIndex.load(self._source(table).files[0], column))
+            self._indexes[(table, column)] = loaded
+        return loaded[1].fetch(value, columns)
+
+    def versions(self, table: str) -> Tuple[pa.Table, IntervalIndex]:
+        """All versions of an SCD2 table with its interval index, rebuilt when the table changes."""
+        if table not in SCD2_KEYS:
+            raise ValueError(f"Table {table} is not an SCD2 table")
+        snapshot = self.snapshot(table)
+        if not snapshot:
+            raise FileNotFoundError(f"No data for table {table}")
+        loaded = self._intervals.get(table)
+        if loaded is None or loaded[0] != snapshot:
+            data = self.dataset(table).to_table()
+            frame = data.select([SCD2_KEYS[table], "effective_start", "effective_end"]).to_pandas()
+            loaded = (snapshot, data, IntervalIndex.from_frame(frame, SCD2_KEYS[table]))
+            self._intervals[table] = loaded
+        return loaded[1], loaded[2]
+
+    def versions_as_of(
+        self,
+        table: str,
+        moment: Union[str, date, datetime, pd.Timestamp],
+        keys: Optional[Sequence[Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pa.Table:
+        """The version of each key (default: every key) valid at ``moment``, via the interval index."""
+        data, index = self.versions(table)
+        result = data.take(index.as_of(_as_of_timestamp(moment).as_py(), keys))
+        return result.select(list(columns)) if columns else result
+
+    def point_in_time_datamart(self, current_only: bool = True) -> pd.DataFrame:
+        """Facts joined to the taxpayer version valid at each filing date, then to ``dim_geo``."""
+        facts = self.query_pandas("fact_tax_returns", current_only=current_only)
+        taxpayers, index = self.versions("dim_taxpayer")
+        return point_in_time_join(facts, taxpayers.to_pandas(), self.query_pandas("dim_geo"), index=index)
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        if table is None:
+            self._cache.clear()
+            return
+        for key in [key for key in self._cache if key[0] == table]:
+            del self._cache[key]
+
+    def cache_info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache), "max_entries": self.cache_size}
+
+    def _evict_stale(self, table: str, snapshot: Snapshot) -> None:
+        for key in [key for key in self._cache if key[0] == table and key[1] != snapshot]:
+            del self._cache[key]
+
+    @staticmethod
+    def _versioned(
+        dataset: ds.Dataset,
+        table: str,
+        expression: Optional[ds.Expression],
+        current_only: bool,
+        as_of,
+    ) -> Optional[ds.Expression]:
+        names = set(dataset.schema.names)
+        clauses = [expression] if expression is not None else []
+        if current_only:
+            if "is_current" not in names:
+                raise ValueError(f"Table {table} has no is_current column")
+            clauses.append(ds.field("is_current") == True)  # noqa: E712
+        if as_of is not None:
+            if not {"effective_start", "effective_end"} <= names:
+                raise ValueError(f"Table {table} has no effective_start/effective_end columns")
+            moment = _as_of_timestamp(as_of)
+            clauses.append((ds.field("effective_start") <= moment) & (ds.field("effective_end") > moment))
+        if not clauses:
+            return None
+        combined = clauses[0]
+        for clause in clauses[1:]:
+            combined = combined & clause
+        return combined
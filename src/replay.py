@@ -0,0 +1,142 @@
+"""Replay quarantined rows through the current rule set."""
+
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from src.pipeline.base import PipelineContext
+from src.pipeline.transform import TransformStage
+from src.pipeline.validate import ValidateStage
+from src.pipeline.write import WriteStage
+from src.sinks import require_local_zones
+from src.utils.money import MONEY_COLUMNS, fixed_point, to_dollars
+
+LOGGER = logging.getLogger(__name__)
+
+SG_TZ = ZoneInfo("Asia/Singapore")
+RELEASE_COLUMNS = ["released_run_id", "released_at"]
+AUDIT_COLUMNS = ["created_run_id", "last_seen_run_id", "ingested_at"]
+REPORT_PREFIXES = ("quarantine_breakdown_", "quarantine_samples_")
+_FILE, _ROW, _RUN = "_quarantine_file", "_quarantine_row_id", "_quarantine_run_id"
+
+
+def quarantine_files(quarantine_root: Path) -> List[Path]:
+    """Row snapshots under ``quarantine_root``, without the breakdown and sample reports."""
+    return [
+        path
+        for path in sorted(Path(quarantine_root).glob("ingest_date=*/quarantine_*.parquet"))
+        if not path.name.startswith(REPORT_PREFIXES)
+    ]
+
+
+def _replay_columns(frame: pd.DataFrame) -> List[str]:
+    """Validation and audit columns, dropped so the rows look like freshly ingested input."""
+    return [
+        col
+        for col in frame.columns
+        if col.startswith(("rule_", "dq_")) or col in AUDIT_COLUMNS + RELEASE_COLUMNS + ["row_id"]
+    ]
+
+
+class QuarantineReplay:
+    def __init__(self, config) -> None:
+        require_local_zones(config, "replay-quarantine")
+        self.config = config
+        output_dir = Path(config.output_dir)
+        layers = config.layers or {}
+        staging_zone = Path(layers.get("staging_dir", output_dir / "staging"))
+        self.quarantine_root = staging_zone / "quarantine" / config.source_name
+        self.curated_zone = Path(layers.get("curated_dir", output_dir / "curated"))
+        self.datamart_zone = Path(layers.get("datamart_dir", output_dir / "datamart"))
+
+    def load(self) -> pd.DataFrame:
+        """Unreleased quarantined rows, tagged with their snapshot file and row id."""
+        frames = []
+        for path in quarantine_files(self.quarantine_root):
+            frame = pd.read_parquet(path)
+            if "released_run_id" in frame.columns:
+                frame = frame[frame["released_run_id"].isna()]
+            if frame.empty:
+                continue
+            # row_id restarts every run; compacted snapshots hold several runs' rows.
+            run_ids = frame["created_run_id"] if "created_run_id" in frame.columns else None
+            frame = frame.assign(**{_FILE: str(path), _ROW: frame["row_id"], _RUN: run_ids})
+            frames.append(frame.drop(columns=_replay_columns(frame)))
+        if not frames:
+            return pd.DataFrame()
+        rows = pd.concat(frames, ignore_index=True)
+        if fixed_point(self.config):
+            # Snapshots hold validated cents; validation converts dollars again.
+            for col in MONEY_COLUMNS:
+                if col in rows.columns:
+                    rows[col] = to_dollars(rows[col])
+        return rows
+
+    def run(self, dry_run: bool = False) -> Dict[str, Any]:
+        rows = self.load()
+        run_dt = datetime.now(tz=SG_TZ)
+        run_id = f"replay_{run_dt.strftime('%Y%m%dT%H%M%S%z')}"
+        summary: Dict[str, Any] = {"run_id": run_id, "replayed": len(rows), "released": 0, "failing_rules": {}}
+        if rows.empty:
+            LOGGER.info("No unreleased quarantine rows under %s", self.quarantine_root)
+            return summary
+
+        context = PipelineContext(
+            config=self.config, artifacts={"run_id": run_id, "run_timestamp": run_dt.isoformat()}
+        )
+        validated = ValidateStage().run(context, rows.drop(columns=[_FILE, _ROW, _RUN]))
+        valid = context.artifacts["valid"]
+        rule_cols = [col for col in validated.columns if col.startswith("rule_")]
+        summary["released"] = len(valid)
+        summary["failing_rules"] = {
+            col: int((~validated[col].fillna(False).astype(bool)).sum()) for col in rule_cols
+        }
+        LOGGER.info("Replayed %s quarantined rows; %s now pass", len(rows), len(valid))
+        if dry_run or valid.empty:
+            return summary
+
+        TransformStage().run(context, validated)
+        WriteStage().write_curated(context, self.curated_zone, self.datamart_zone, run_id, run_dt)
+        self._mark_released(rows.loc[valid.index, [_FILE, _ROW, _RUN]], run_id, run_dt)
+        return summary
+
+    @staticmethod
+    def _mark_released(released: pd.DataFrame, run_id: str, run_dt: datetime) -> None:
+        for path, group in released.groupby(_FILE):
+            snapshot = pd.read_parquet(path)
+            for col in RELEASE_COLUMNS:
+                if col not in snapshot.columns:
+                    snapshot[col] = pd.Series(pd.NA, index=snapshot.index, dtype="string")
+            snapshot_runs = snapshot["created_run_id"] if "created_run_id" in snapshot.columns else None
+            keys = pd.MultiIndex.from_arrays(
+                [pd.Series(snapshot_runs, index=snapshot.index, dtype="string").fillna(""), snapshot["row_id"]]
+            )
+            released_keys = pd.MultiIndex.from_arrays([group[_RUN].astype("string").fillna(""), group[_ROW]])
+            mask = keys.isin(released_keys) & snapshot["released_run_id"].isna()
+            snapshot.loc[mask, "released_run_id"] = run_id
+            snapshot.loc[mask, "released_at"] = run_dt.isoformat()
+            staged = Path(path).with_name(Path(path).name + ".tmp")
+            snapshot.to_parquet(staged, index=False)
+            os.replace(staged, path)
+
+
+def replay_command(config, dry_run: bool = False, as_json: bool = False) -> int:
+    import json
+
+    summary = QuarantineReplay(config).run(dry_run=dry_run)
+    if as_json:
+        print(json.dumps(summary, indent=2))
+    else:
+        action = "would be released" if dry_run else "released"
+        print(f"{summary['replayed']} quarantined row(s) replayed, {summary['released']} {action}.")
+        for rule, count in summary["failing_rules"].items():
+            if count:
+                print(f"  still failing {rule}: {count}")
+    return 0
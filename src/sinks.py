@@ -0,0 +1,116 @@
+"""Output sinks for the append-only zones: the local filesystem or S3-compatible storage."""
+
+from __future__ import annotations
+
+import logging
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+LOGGER = logging.getLogger(__name__)
+
+SINK_TYPES = {"local", "s3"}
+
+
+def require_local_zones(config, command: str) -> None:
+    """Raise ``ValueError`` unless the raw, staging and quarantine zones are local directories."""
+    sink_type = (getattr(config, "sink", None) or {}).get("type") or "local"
+    if sink_type != "local":
+        raise ValueError(
+            f"{command} reads the raw, staging and quarantine zones from local directories "
+            f"and does not support sink.type: {sink_type}"
+        )
+
+
+@lru_cache(maxsize=None)
+def _s3_filesystem(
+    endpoint_override: Optional[str], region: Optional[str], scheme: Optional[str]
+) -> pafs.S3FileSystem:
+    options = {"background_writes": True}
+    if endpoint_override:
+        options["endpoint_override"] = endpoint_override
+    if region:
+        options["region"] = region
+    if scheme:
+        options["scheme"] = scheme
+    return pafs.S3FileSystem(**options)
+
+
+class OutputSink:
+    """A pyarrow filesystem plus the root the zones are written under."""
+
+    def __init__(self, filesystem: pafs.FileSystem, root: Optional[str] = None) -> None:
+        self.filesystem = filesystem
+        self.root = root.rstrip("/") if root else None
+
+    @classmethod
+    def from_config(cls, config) -> "OutputSink":
+        settings = getattr(config, "sink", None) or {}
+        sink_type = settings.get("type") or "local"
+        if sink_type == "local":
+            return cls(pafs.LocalFileSystem())
+        if sink_type != "s3":
+            raise ValueError(f"Unsupported sink type: {sink_type}")
+        uri = settings.get("uri") or ""
+        if not uri.startswith("s3://"):
+            raise ValueError("sink.uri must be an s3:// URI for the s3 sink")
+        io_threads = settings.get("io_threads")
+        if io_threads:
+            pa.set_io_thread_count(int(io_threads))
+        filesystem = _s3_filesystem(settings.get("endpoint_override"), settings.get("region"), settings.get("scheme"))
+        return cls(filesystem, uri[len("s3://") :])
+
+    @property
+    def is_local(self) -> bool:
+        return self.root is None
+
+    def zone_root(self, zone: str, local_dir: Path) -> str:
+        """Where ``zone`` lives: its layer directory locally, ``{root}/{zone}`` on an object store."""
+        return Path(local_dir).as_posix() if self.is_local else f"{self.root}/{zone}"
+
+    def _make_parent(self, path: str) -> None:
+        # Object stores have no directories; anything else needs the parent to exist.
+        if self.filesystem.type_name != "s3":
+            self.filesystem.create_dir(path.rsplit("/", 1)[0], recursive=True)
+
+    def write_table(self, data: Union[pa.Table, pd.DataFrame], path: str) -> None:
+        table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+        self._make_parent(path)
+        pq.write_table(table, path, filesystem=self.filesystem)
+
+    def move_in(self, local_path: Path, path: str, copy_of: Optional[str] = None) -> None:
+        """Move a local file to ``path``.
+
+        ``copy_of`` names a sink object with the same bytes, such as the landing copy of an
+        input. On an object store that object is copied server-side instead of uploading
+        the file again.
+        """
+        self._make_parent(path)
+        if self.is_local:
+            shutil.move(str(local_path), path)
+            return
+        if copy_of is not None:
+            self.filesystem.copy_file(copy_of, path)
+        else:
+            self.put_file(local_path, path)
+        Path(local_path).unlink()
+
+    def put_file(self, local_path: Path, path: str) -> None:
+        """Copy a local file to ``path``, uploading it in concurrent parts on an object store."""
+        self._make_parent(path)
+        if self.is_local:
+            shutil.copy2(local_path, path)
+            return
+        pafs.copy_files(
+            str(local_path),
+            path,
+            source_filesystem=pafs.LocalFileSystem(),
+            destination_filesystem=self.filesystem,
+            use_threads=True,
+        )
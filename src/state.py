@@ -1,6 +1,9 @@
 import json
+import os
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List
+from zoneinfo import ZoneInfo
 
 
 def read_state(path: Path) -> Dict[str, Any]:
@@ -12,5 +15,37 @@ def read_state(path: Path) -> Dict[str, Any]:
 
 def write_state(path: Path, state: Dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as handle:
-        json.dump(state, handle, indent=2)
+    # Write aside and rename so a crash never leaves a truncated state file.
+    staged = path.with_name(path.name + ".tmp")
+    with staged.open("w", encoding="utf-8") as handle:
+        json.dump(state, handle, indent=2, default=str)
+    os.replace(staged, path)
+
+
+def source_file_id(path: Path) -> str:
+    """Ledger key of an input file: name, size and whole-second mtime."""
+    stat = path.stat()
+    return f"{path.name}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def parse_file_id(file_id: str) -> dict:
+    parts = file_id.split(":")
+    if len(parts) != 3:
+        return {"file_name": file_id, "file_size": None, "file_mtime": None}
+    name, size, mtime = parts
+    try:
+        file_size = int(size)
+    except ValueError:
+        file_size = None
+    try:
+        file_mtime = datetime.fromtimestamp(int(mtime), tz=timezone.utc).astimezone(ZoneInfo("Asia/Singapore")).isoformat()
+    except ValueError:
+        file_mtime = None
+    return {"file_name": name, "file_size": file_size, "file_mtime": file_mtime}
+
+
+def input_files(input_path: Path) -> List[Path]:
+    """CSV files the ingest stage reads from ``input_path`` (a directory or a single file)."""
+    if input_path.is_dir():
+        return sorted(input_path.glob("*.csv"))
+    return [input_path] if input_path.exists() else []
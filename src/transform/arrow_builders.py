@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.transform.dimensions import _postal_region, _stable_int_id
+from src.transform.facts import _stable_return_key
+from src.utils.arrow import as_string, ordered_left_join
+from src.utils.profiling import span
+
+TAXPAYER_COLUMNS = [
+    "nric",
+    "full_name",
+    "filing_status",
+    "residential_status",
+    "number_of_dependents",
+    "occupation",
+    "postal_code",
+    "housing_type",
+]
+
+FACT_COLUMNS = [
+    "nric",
+    "assessment_year",
+    "filing_date",
+    "annual_income",
+    "total_reliefs",
+    "chargeable_income",
+    "cpf_contribution",
+    "foreign_income",
+    "tax_payable",
+    "tax_paid",
+]
+
+
+def _map_distinct(values, func: Callable[[Optional[str]], object], result_type: pa.DataType) -> pa.Array:
+    """Apply ``func`` once per distinct value and broadcast the results back by index."""
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    encoded = pc.dictionary_encode(values)
+    mapped = pa.array([func(value) for value in encoded.dictionary.to_pylist()], result_type)
+    if len(mapped) == 0:
+        return pa.nulls(len(encoded), result_type)
+    return pc.take(mapped, encoded.indices)
+
+
+def _ensure_columns(table: pa.Table, columns: list[str]) -> pa.Table:
+    for col in columns:
+        if col not in table.column_names:
+            table = table.append_column(col, pa.nulls(table.num_rows))
+    return table
+
+
+def build_dim_geo_arrow(table: pa.Table) -> pa.Table:
+    postal = as_string(table["postal_code"]) if "postal_code" in table.column_names else pa.nulls(
+        table.num_rows, pa.string()
+    )
+    codes = pc.unique(postal)
+
+    with span("transform.dim_geo.region"):
+        regions = pa.array([_postal_region(code) for code in codes.to_pylist()], pa.string())
+    with span("transform.dim_geo.hash_keys"):
+        geo_ids = pa.array(
+            [_stable_int_id(code, "GEO") if code else None for code in codes.to_pylist()],
+            pa.uint64(),
+        )
+    return pa.table({"geo_id": geo_ids, "postal_code": codes, "region": regions})
+
+
+def taxpayer_keys_arrow(nric) -> pa.Table:
+    """``taxpayer_id`` per distinct NRIC string (``nric``, ``taxpayer_id`` columns)."""
+    distinct = pc.unique(as_string(nric))
+    if isinstance(distinct, pa.ChunkedArray):
+        distinct = distinct.combine_chunks()
+    ids = pa.array(
+        [_stable_int_id(value, "NRIC") if value else None for value in distinct.to_pylist()], pa.uint64()
+    )
+    return pa.table({"nric": distinct, "taxpayer_id": ids})
+
+
+def return_keys_arrow(table: pa.Table) -> pa.Array:
+    """``return_key`` per row, hashed once per distinct ``nric:assessment_year``."""
+    working = _ensure_columns(table, ["nric", "assessment_year"])
+    nric = as_string(working["nric"])
+    natural_key = pc.binary_join_element_wise(
+        pc.if_else(pc.equal(nric, ""), pa.scalar(None, pa.string()), nric),
+        pc.cast(pc.cast(working["assessment_year"], pa.int64()), pa.string()),
+        ":",
+    )
+    return _map_distinct(
+        natural_key,
+        lambda value: _stable_return_key(*value.rsplit(":", 1)) if value else None,
+        pa.uint64(),
+    )
+
+
+def build_dim_taxpayer_arrow(table: pa.Table, dim_geo: pa.Table) -> pa.Table:
+    working = _ensure_columns(table, TAXPAYER_COLUMNS).select(TAXPAYER_COLUMNS)
+    for col in ["nric", "postal_code"]:
+        working = working.set_column(working.column_names.index(col), col, as_string(working[col]))
+
+    # group_by does not keep first-seen order, which decides the SCD2 current version
+    # when a taxpayer appears with several attribute sets; restore it explicitly.
+    working = working.append_column("_row", pa.array(np.arange(working.num_rows, dtype=np.int64)))
+    dim = working.group_by(TAXPAYER_COLUMNS, use_threads=False).aggregate([("_row", "min")])
+    dim = dim.sort_by("_row_min").select(TAXPAYER_COLUMNS)
+    with span("transform.dim_taxpayer.hash_keys"):
+        keys = taxpayer_keys_arrow(dim["nric"])
+    taxpayer_id = pc.take(keys["taxpayer_id"], pc.index_in(dim["nric"], value_set=keys["nric"]))
+    dim = dim.add_column(0, "taxpayer_id", taxpayer_id)
+
+    dim = ordered_left_join(dim, dim_geo.select(["geo_id", "postal_code"]), keys="postal_code")
+    return dim.select(["taxpayer_id"] + TAXPAYER_COLUMNS + ["geo_id"])
+
+
+def build_fact_tax_returns_arrow(table: pa.Table, dim_taxpayer: pa.Table, config) -> pa.Table:
+    working = _ensure_columns(table, FACT_COLUMNS).select(FACT_COLUMNS)
+    working = working.set_column(0, "nric", as_string(working["nric"]))
+    with span("transform.fact_tax_returns.hash_keys"):
+        keys = return_keys_arrow(working)
+    # Carried through the join, which repeats a return once per matching taxpayer row.
+    working = working.append_column("return_key", keys)
+
+    fact = ordered_left_join(working, dim_taxpayer.select(["taxpayer_id", "nric"]), keys="nric")
+    year = pc.cast(fact["assessment_year"], pa.int64())
+    fact = fact.set_column(fact.column_names.index("assessment_year"), "assessment_year", year)
+    fact = fact.select(["taxpayer_id"] + FACT_COLUMNS[1:] + ["return_key"])
+    return fact.add_column(
+        0, "return_id", pa.array(np.arange(1, fact.num_rows + 1, dtype=np.int64))
+    )
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import hashlib
 
+import numpy as np
 import pandas as pd
 
+from src.utils.profiling import span
+
 
 def _stable_int_id(value: str, prefix: str) -> int:
     digest = hashlib.sha256(f"{prefix}:{value}".encode("utf-8")).hexdigest()
@@ -79,17 +82,26 @@ def build_dim_geo(df: pd.DataFrame) -> pd.DataFrame:
         df["postal_code"] = pd.NA
 
     geo = pd.DataFrame({"postal_code": df["postal_code"].astype("string")})
-    geo["region"] = geo["postal_code"].apply(_postal_region)
     geo = geo.drop_duplicates().reset_index(drop=True)
+    with span("transform.dim_geo.region"):
+        geo["region"] = geo["postal_code"].apply(_postal_region)
 
-    geo["geo_id"] = geo["postal_code"].fillna("").apply(
-        lambda code: _stable_int_id(code, "GEO") if code else pd.NA
-    )
+    with span("transform.dim_geo.hash_keys"):
+        geo["geo_id"] = geo["postal_code"].fillna("").apply(
+            lambda code: _stable_int_id(code, "GEO") if code else pd.NA
+        )
 
     geo = geo[["geo_id", "postal_code", "region"]]
     return geo
 
 
+def taxpayer_keys(nric: pd.Series) -> pd.Series:
+    """``taxpayer_id`` per distinct NRIC string, hashed once each; empty NRICs map to NA."""
+    distinct = pd.Series(nric.astype("string").fillna("").unique(), dtype="string")
+    ids = np.array([_stable_int_id(value, "NRIC") if value else pd.NA for value in distinct], dtype=object)
+    return pd.Series(ids, index=pd.Index(distinct, dtype="string"), dtype=object)
+
+
 def build_dim_taxpayer(df: pd.DataFrame, dim_geo: pd.DataFrame) -> pd.DataFrame:
     cols = [
         "nric",
@@ -102,15 +114,21 @@ def build_dim_taxpayer(df: pd.DataFrame, dim_geo: pd.DataFrame) -> pd.DataFrame:
         "housing_type",
     ]
 
-    working = df.copy()
+    # Only the taxpayer columns are copied; categorical ones deduplicate on their codes.
+    working = df[[col for col in cols if col in df.columns]].copy()
     for col in cols:
         if col not in working.columns:
             working[col] = pd.NA
 
     dim = working[cols].drop_duplicates().reset_index(drop=True)
-    dim["taxpayer_id"] = dim["nric"].astype("string").fillna("").apply(
-        lambda value: _stable_int_id(value, "NRIC") if value else pd.NA
-    )
+    nric = dim["nric"].astype("string").fillna("")
+    with span("transform.dim_taxpayer.hash_keys"):
+        keys = taxpayer_keys(nric)
+    positions = keys.index.get_indexer(nric)
+    taxpayer_id = pd.Series(keys.to_numpy()[positions], index=dim.index, dtype=object)
+    # uint64 whenever every NRIC has a key, even if this batch's keys all fit in int64:
+    # concatenating an int64 batch onto the committed uint64 table would give float64.
+    dim["taxpayer_id"] = taxpayer_id.astype(np.uint64) if taxpayer_id.notna().all() else taxpayer_id.infer_objects()
 
     dim = dim.merge(dim_geo[["geo_id", "postal_code"]], on="postal_code", how="left")
     dim = dim[
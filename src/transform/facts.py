@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import hashlib
 
+import numpy as np
 import pandas as pd
 
+from src.utils.profiling import span
+
 
 def _stable_return_key(nric: str, assessment_year: str) -> int | pd.NA:
     if not nric or not assessment_year:
@@ -12,6 +15,33 @@ def _stable_return_key(nric: str, assessment_year: str) -> int | pd.NA:
     return int(digest[:16], 16)
 
 
+def return_keys(df: pd.DataFrame) -> np.ndarray:
+    """``return_key`` per row, hashed once per distinct ``(nric, assessment_year)``."""
+    if not len(df):
+        # A batch emptied by dedup or the watermark; MultiIndex cannot factorize zero rows.
+        return np.empty(0, dtype=np.uint64)
+    nric = df["nric"].astype("string") if "nric" in df.columns else pd.Series(pd.NA, index=df.index, dtype="string")
+    year = (
+        pd.to_numeric(df["assessment_year"], errors="coerce").astype("Int64")
+        if "assessment_year" in df.columns
+        else pd.Series(pd.NA, index=df.index, dtype="Int64")
+    )
+    codes, uniques = pd.MultiIndex.from_arrays([nric, year]).factorize()
+    keys = np.array(
+        [
+            _stable_return_key(
+                str(value) if pd.notna(value) else "",
+                str(assessment_year) if pd.notna(assessment_year) else "",
+            )
+            for value, assessment_year in uniques
+        ],
+        dtype=object,
+    )
+    values = keys[codes] if len(keys) else np.full(len(codes), pd.NA, dtype=object)
+    # uint64 unless a key is missing, matching what the per-row apply used to infer.
+    return pd.Series(values, dtype=object).infer_objects().to_numpy()
+
+
 def build_fact_tax_returns(df: pd.DataFrame, dim_taxpayer: pd.DataFrame, config) -> pd.DataFrame:
     df = df.drop(columns=["taxpayer_id"], errors="ignore")
     for col in [
@@ -29,6 +59,10 @@ def build_fact_tax_returns(df: pd.DataFrame, dim_taxpayer: pd.DataFrame, config)
         if col not in df.columns:
             df[col] = pd.NA
 
+    with span("transform.fact_tax_returns.hash_keys"):
+        keys = return_keys(df)
+    # Carried through the merge, which repeats a return once per matching taxpayer row.
+    df = df.assign(return_key=keys)
     lookup = dim_taxpayer[["taxpayer_id", "nric"]]
     fact = df.merge(lookup, on="nric", how="left")
 
@@ -48,17 +82,11 @@ def build_fact_tax_returns(df: pd.DataFrame, dim_taxpayer: pd.DataFrame, config)
             "foreign_income",
             "tax_payable",
             "tax_paid",
+            "return_key",
         ]
     ].copy()
 
     fact["assessment_year"] = fact["assessment_year"].astype("Int64")
-    fact["return_key"] = fact.apply(
-        lambda row: _stable_return_key(
-            str(row.get("nric")) if pd.notna(row.get("nric")) else "",
-            str(row.get("assessment_year")) if pd.notna(row.get("assessment_year")) else "",
-        ),
-        axis=1,
-    )
 
     fact.drop(columns=["nric"], inplace=True)
     fact.insert(0, "return_id", range(1, len(fact) + 1))
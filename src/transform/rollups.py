@@ -0,0 +1,186 @@
+"""Pre-aggregated datamart rollups maintained from the SCD2 delta of each run."""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from src.utils.profiling import span
+
+LOGGER = logging.getLogger(__name__)
+
+MEASURES = ["annual_income", "total_reliefs", "tax_payable", "tax_paid"]
+COUNT_COLUMN = "return_count"
+TAXPAYER_ATTRIBUTES = [
+    "residential_status",
+    "housing_type",
+    "filing_status",
+    "occupation",
+    "number_of_dependents",
+    "geo_id",
+]
+DEFAULT_GRAINS = {
+    "region_year": ["region", "assessment_year"],
+    "residential_status_year": ["residential_status", "assessment_year"],
+    "housing_type_year": ["housing_type", "assessment_year"],
+    "region_status_housing_year": ["region", "residential_status", "housing_type", "assessment_year"],
+}
+
+
+@dataclass
+class Scd2Change:
+    """An SCD2 table as committed, with a mask of the rows that were current before the commit."""
+
+    table: pd.DataFrame
+    was_current: pd.Series
+
+    @property
+    def before(self) -> pd.DataFrame:
+        return self.table[self.was_current]
+
+    @property
+    def after(self) -> pd.DataFrame:
+        return self.table[self.table["is_current"].eq(True)]
+
+    def changed_keys(self, key: str) -> set:
+        flipped = self.table[self.was_current != self.table["is_current"].eq(True)]
+        return set(flipped[key].dropna())
+
+
+def rollup_grains(config) -> Dict[str, List[str]]:
+    return dict((config.rollups or {}).get("grains") or DEFAULT_GRAINS)
+
+
+def rollup_path(datamart_dir: Path, name: str) -> Path:
+    return Path(datamart_dir) / f"rollup_{name}.parquet"
+
+
+def _attach_attributes(facts: pd.DataFrame, taxpayers: pd.DataFrame, dim_geo: pd.DataFrame) -> pd.DataFrame:
+    attributes = ["taxpayer_id"] + [col for col in TAXPAYER_ATTRIBUTES if col in taxpayers.columns]
+    base = facts.merge(
+        taxpayers[attributes].drop_duplicates(subset=["taxpayer_id"], keep="last"),
+        on="taxpayer_id",
+        how="left",
+    )
+    if "geo_id" in base.columns:
+        base = base.merge(
+            dim_geo[["geo_id", "region"]].drop_duplicates(subset=["geo_id"], keep="last"),
+            on="geo_id",
+            how="left",
+        )
+    return base
+
+
+def aggregate(base: pd.DataFrame, grain: List[str]) -> pd.DataFrame:
+    frame = pd.DataFrame({col: base[col] if col in base.columns else pd.NA for col in grain}, index=base.index)
+    frame[COUNT_COLUMN] = 1
+    for col in MEASURES:
+        frame[col] = pd.to_numeric(base[col], errors="coerce") if col in base.columns else 0.0
+    return _sum_by_grain(frame, grain)
+
+
+def _sum_by_grain(frame: pd.DataFrame, grain: List[str]) -> pd.DataFrame:
+    columns = [COUNT_COLUMN] + MEASURES
+    if frame.empty:
+        return frame[grain + columns].reset_index(drop=True)
+    # observed=True: categorical grain columns must not expand to every category combination.
+    return frame.groupby(grain, dropna=False, sort=True, observed=True)[columns].sum().reset_index()
+
+
+def _net(frames: List[pd.DataFrame], signs: List[int], grain: List[str]) -> pd.DataFrame:
+    signed = []
+    for frame, sign in zip(frames, signs):
+        if frame.empty:
+            continue
+        frame = frame.copy()
+        frame[[COUNT_COLUMN] + MEASURES] = frame[[COUNT_COLUMN] + MEASURES] * sign
+        signed.append(frame)
+    if not signed:
+        return frames[0].iloc[0:0]
+    return _sum_by_grain(pd.concat(signed, ignore_index=True), grain)
+
+
+def full_rollup(facts: pd.DataFrame, taxpayers: pd.DataFrame, dim_geo: pd.DataFrame, grain: List[str]) -> pd.DataFrame:
+    return aggregate(_attach_attributes(facts, taxpayers, dim_geo), grain)
+
+
+def update_rollups(
+    datamart_dir: Path,
+    grains: Dict[str, List[str]],
+    facts: Scd2Change,
+    taxpayers: Scd2Change,
+    dim_geo: pd.DataFrame,
+) -> Dict[str, pd.DataFrame]:
+    """Apply this run's SCD2 delta to each rollup, rebuilding any that is missing or re-grained."""
+    moved = facts.table["taxpayer_id"].isin(taxpayers.changed_keys("taxpayer_id"))
+    is_current = facts.table["is_current"].eq(True)
+    # Region is derived from the postal code behind geo_id, so dim_geo needs no before image.
+    subtract = _attach_attributes(facts.table[facts.was_current & (~is_current | moved)], taxpayers.before, dim_geo)
+    add = _attach_attributes(facts.table[is_current & (~facts.was_current | moved)], taxpayers.after, dim_geo)
+
+    rollups = {}
+    for name, grain in grains.items():
+        path = rollup_path(datamart_dir, name)
+        existing = pd.read_parquet(path) if path.exists() else None
+        with span(f"write.rollup.{name}"):
+            if existing is not None and list(existing.columns) == grain + [COUNT_COLUMN] + MEASURES:
+                rollup = _net([existing, aggregate(add, grain), aggregate(subtract, grain)], [1, 1, -1], grain)
+                rollup = rollup[rollup[COUNT_COLUMN] != 0].reset_index(drop=True)
+            else:
+                LOGGER.info("Rebuilding rollup %s from the curated tables", name)
+                rollup = full_rollup(facts.after, taxpayers.after, dim_geo, grain)
+        rollup.to_parquet(path, index=False)
+        rollups[name] = rollup
+    LOGGER.info("Rollups updated: -%s/+%s fact rows", len(subtract), len(add))
+    return rollups
+
+
+def check_rollups(
+    curated_dir: Path,
+    datamart_dir: Path,
+    grains: Dict[str, List[str]],
+    tolerance: float = 0.01,
+) -> List[str]:
+    """Compare the stored rollups with a full recompute; returns one line per mismatch."""
+    facts = pd.read_parquet(Path(curated_dir) / "fact_tax_returns.parquet")
+    taxpayers = pd.read_parquet(Path(curated_dir) / "dim_taxpayer.parquet")
+    dim_geo = pd.read_parquet(Path(curated_dir) / "dim_geo.parquet")
+    facts = facts[facts["is_current"].eq(True)]
+    taxpayers = taxpayers[taxpayers["is_current"].eq(True)]
+
+    problems = []
+    for name, grain in grains.items():
+        path = rollup_path(datamart_dir, name)
+        if not path.exists():
+            problems.append(f"{name}: missing {path}")
+            continue
+        stored = pd.read_parquet(path)
+        if list(stored.columns) != grain + [COUNT_COLUMN] + MEASURES:
+            problems.append(f"{name}: columns {list(stored.columns)} do not match grain {grain}")
+            continue
+        diff = _net([stored, full_rollup(facts, taxpayers, dim_geo, grain)], [1, -1], grain)
+        off = diff[(diff[COUNT_COLUMN] != 0) | (diff[MEASURES].abs() > tolerance).any(axis=1)]
+        for record in off.to_dict(orient="records"):
+            problems.append(f"{name}: stored minus recomputed {record}")
+    return problems
+
+
+def check_rollups_command(config, as_json: bool = False) -> int:
+    output_dir = Path(config.output_dir)
+    layers = config.layers or {}
+    problems = check_rollups(
+        Path(layers.get("curated_dir", output_dir / "curated")),
+        Path(layers.get("datamart_dir", output_dir / "datamart")),
+        rollup_grains(config),
+    )
+    if as_json:
+        print(json.dumps({"consistent": not problems, "problems": problems}, indent=2, default=str))
+    else:
+        print("\n".join(problems + [f"Rollups {'consistent' if not problems else 'INCONSISTENT'}."]))
+    return 0 if not problems else 1
+
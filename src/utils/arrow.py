@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.utils.dates import DATE_FORMATS, SINGLE_DIGIT_FIELD
+
+_NUMERIC_PATTERN = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+
+def is_numeric_type(data_type: pa.DataType) -> bool:
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+
+
+def coerce_numeric(values) -> pa.ChunkedArray:
+    """Arrow counterpart of ``pd.to_numeric(errors="coerce")``: bad values become nulls."""
+    if is_numeric_type(values.type):
+        return values
+    text = pc.utf8_trim_whitespace(pc.cast(values, pa.string()))
+    cleaned = pc.if_else(
+        pc.match_substring_regex(text, _NUMERIC_PATTERN),
+        text,
+        pa.scalar(None, pa.string()),
+    )
+    return pc.cast(cleaned, pa.float64())
+
+
+def as_string(values) -> pa.ChunkedArray:
+    if pa.types.is_dictionary(values.type):
+        values = pc.cast(values, values.type.value_type)
+    if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+        return values
+    return pc.cast(values, pa.string())
+
+
+def constant_column(value, rows: int) -> pa.DictionaryArray:
+    """A dictionary-encoded column repeating ``value``; costs four bytes per row."""
+    indices = pa.array(np.zeros(rows, dtype=np.int32)) if value is not None else pa.nulls(rows, pa.int32())
+    return pa.DictionaryArray.from_arrays(indices, pa.array([value], pa.string()))
+
+
+def set_or_append(table: pa.Table, name: str, values) -> pa.Table:
+    if name in table.column_names:
+        return table.set_column(table.column_names.index(name), name, values)
+    return table.append_column(name, values)
+
+
+def parse_timestamp(values, formats=DATE_FORMATS) -> pa.ChunkedArray:
+    """Parse strings against ``formats`` in order; unparseable values become nulls."""
+    if pa.types.is_timestamp(values.type) or pa.types.is_date(values.type):
+        return pc.cast(values, pa.timestamp("ns"))
+    if pa.types.is_null(values.type):
+        return pc.cast(values, pa.timestamp("ns"))
+    text = pc.utf8_trim_whitespace(as_string(values))
+    if isinstance(text, pa.ChunkedArray):
+        text = text.combine_chunks()
+    # Parse each distinct string once, then broadcast back through the dictionary indices.
+    encoded = pc.dictionary_encode(text)
+    pattern, replacement = SINGLE_DIGIT_FIELD
+    distinct = pc.replace_substring_regex(encoded.dictionary, pattern, replacement)
+    parsed = []
+    for fmt in formats:
+        candidate = pc.strptime(distinct, format=fmt, unit="ns", error_is_null=True)
+        # strptime rolls impossible dates such as 2024-02-30 over; reject them instead.
+        exact = pc.equal(pc.strftime(candidate, format=fmt), distinct)
+        parsed.append(pc.if_else(exact, candidate, pa.scalar(None, pa.timestamp("ns"))))
+    parsed_distinct = pc.coalesce(*parsed) if len(parsed) > 1 else parsed[0]
+    return pa.chunked_array([parsed_distinct.take(encoded.indices)], pa.timestamp("ns"))
+
+
+def decode_dictionaries(table: pa.Table, keep=()) -> pa.Table:
+    for index, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type) and field.name not in keep:
+            table = table.set_column(index, field.name, pc.cast(table[field.name], field.type.value_type))
+    return table
+
+
+def to_pandas_frame(value, keep=()) -> pd.DataFrame:
+    """Convert an Arrow table at a pandas edge, decoding dictionary columns to plain values.
+
+    Dictionary columns named in ``keep`` become pandas categoricals instead.
+    """
+    if isinstance(value, pa.Table):
+        return decode_dictionaries(value, keep).to_pandas()
+    return value
+
+
+def with_constant_columns(table: pa.Table, values: dict) -> pa.Table:
+    for name, value in values.items():
+        table = set_or_append(table, name, constant_column(value, table.num_rows))
+    return table
+
+
+def ordered_left_join(
+    left: pa.Table, right: pa.Table, keys, right_suffix: str | None = None
+) -> pa.Table:
+    """Left outer hash join that keeps the row order of ``pd.merge(how="left")``."""
+    left = left.append_column("__left_pos", pa.array(np.arange(left.num_rows, dtype=np.int64)))
+    right = right.append_column("__right_pos", pa.array(np.arange(right.num_rows, dtype=np.int64)))
+    joined = left.join(right, keys=keys, join_type="left outer", right_suffix=right_suffix)
+    order = pc.sort_indices(
+        joined,
+        sort_keys=[("__left_pos", "ascending"), ("__right_pos", "ascending")],
+        null_placement="at_end",
+    )
+    return joined.take(order).drop_columns(["__left_pos", "__right_pos"])
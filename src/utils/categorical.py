@@ -0,0 +1,109 @@
+"""Dictionary encoding of low-cardinality text columns."""
+
+from __future__ import annotations
+
+from typing import Callable, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+DEFAULT_COLUMNS = [
+    "residential_status",
+    "filing_status",
+    "housing_type",
+    "occupation",
+    "region",
+    "source_file",
+    "source_file_id",
+]
+
+
+def categorical_columns(config) -> List[str]:
+    """Columns to dictionary-encode; empty when ``categorical.enabled`` is off."""
+    settings = getattr(config, "categorical", None) or {}
+    if not settings.get("enabled"):
+        return []
+    return list(settings.get("columns") or DEFAULT_COLUMNS)
+
+
+def _is_categorical(values: pd.Series) -> bool:
+    return isinstance(values.dtype, pd.CategoricalDtype)
+
+
+def encode_frame(frame: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
+    """``frame`` with each of ``columns`` it has converted to ``category`` (in place)."""
+    for col in columns:
+        if col in frame.columns and not _is_categorical(frame[col]):
+            frame[col] = frame[col].astype("category")
+    return frame
+
+
+def map_categories(values: pd.Series, func: Callable[[pd.Series], pd.Series]) -> pd.Series:
+    """Apply a string transform once per category; plain columns are transformed row by row.
+
+    Categories that become equal (``"Resident "`` and ``"Resident"`` after a strip) are
+    merged, so the result is still a categorical with unique categories.
+    """
+    if not _is_categorical(values):
+        return func(values.astype("string"))
+    mapped = func(pd.Series(values.cat.categories, dtype="string"))
+    remap, uniques = pd.factorize(mapped, use_na_sentinel=True)
+    codes = values.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, remap[np.maximum(codes, 0)] if len(remap) else -1, -1)
+    categories = pd.Index(np.asarray(uniques, dtype=object))
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, categories=categories), index=values.index, name=values.name
+    )
+
+
+def align_categories(frames: Sequence[pd.DataFrame]) -> List[pd.DataFrame]:
+    """Give shared categorical columns the sorted union of their categories.
+
+    ``pd.concat`` and ``merge`` only stay on the codes when both sides have identical
+    categories; otherwise they fall back to object strings. Sorting makes the stored
+    categories independent of row order, engine and sharding.
+    """
+    frames = list(frames)
+    columns = {col for frame in frames for col in frame.columns if _is_categorical(frame[col])}
+    for col in sorted(columns):
+        parts = [frame[col] for frame in frames if col in frame.columns]
+        seen = set()
+        for part in parts:
+            seen.update(part.cat.categories if _is_categorical(part) else part.dropna().unique())
+        dtype = pd.CategoricalDtype(pd.Index(sorted(seen, key=str), dtype=object))
+        for index, frame in enumerate(frames):
+            if col not in frame.columns:
+                continue
+            values = frame[col]
+            if not _is_categorical(values):
+                frames[index] = frame.assign(**{col: values.astype(dtype)})
+            elif not values.cat.categories.equals(dtype.categories):
+                # astype() is a no-op between unordered dtypes that differ only in order.
+                frames[index] = frame.assign(**{col: values.cat.set_categories(dtype.categories)})
+    return frames
+
+
+def encode_table(table: pa.Table, columns: Iterable[str]) -> pa.Table:
+    """``table`` with each of ``columns`` it has dictionary-encoded, one dictionary per column."""
+    for col in columns:
+        if col not in table.column_names:
+            continue
+        values = table[col]
+        if not pa.types.is_dictionary(values.type):
+            values = pc.dictionary_encode(values)
+        index = table.column_names.index(col)
+        table = table.set_column(index, col, values)
+    return table.unify_dictionaries()
+
+
+def trim_dictionary(values) -> pa.ChunkedArray:
+    """Strip whitespace from a dictionary column's values, keeping it encoded."""
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    dictionary = pc.utf8_trim_whitespace(pc.cast(values.dictionary, pa.string()))
+    # Trimming can make two entries equal; re-encode the dictionary and remap the indices.
+    merged = pc.dictionary_encode(dictionary)
+    indices = pc.take(merged.indices, values.indices)
+    return pa.chunked_array([pa.DictionaryArray.from_arrays(indices, merged.dictionary)])
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+
+# Accepted date layouts, tried in order; shared by the pandas and Arrow engines.
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y")
+# A lone digit between separators, zero-padded before parsing so "2024-3-1" reads as "2024-03-01".
+SINGLE_DIGIT_FIELD = (r"\b(\d)\b", r"0\1")
+
+
+def _parse_unique(text: pd.Series, formats: Sequence[str]) -> pd.Series:
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    text = text.str.replace(*SINGLE_DIGIT_FIELD, regex=True)
+    for fmt in formats:
+        pending = parsed.isna() & text.notna()
+        if not pending.any():
+            break
+        candidate = pd.to_datetime(text[pending], format=fmt, errors="coerce")
+        # Only exact round trips of the padded text count, so "2024-02-30" is not rolled over.
+        exact = candidate.dt.strftime(fmt) == text[pending]
+        parsed[pending] = candidate.where(exact)
+    return parsed
+
+
+def parse_dates(values: pd.Series, formats: Sequence[str] = DATE_FORMATS) -> pd.Series:
+    """Parse date strings against ``formats``; unparseable values become NaT.
+
+    Each distinct string is parsed once and the results are mapped back by position, so
+    the cost follows the number of distinct dates rather than the number of rows. Columns
+    that are already datetimes are returned unchanged.
+    """
+    if is_datetime64_any_dtype(values):
+        return values
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    text = pd.Series(uniques).astype("string").str.strip()
+    parsed = _parse_unique(text, formats).to_numpy()
+    result = np.full(len(codes), np.datetime64("NaT"), dtype="datetime64[ns]")
+    found = codes >= 0
+    result[found] = parsed[codes[found]]
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+def year_end(years: pd.Series) -> pd.Series:
+    """Midnight on 31 December of each (numeric) year, computed once per distinct year."""
+    numeric = pd.to_numeric(years, errors="coerce").astype("Int64")
+    codes, uniques = pd.factorize(numeric, use_na_sentinel=True)
+    ends = pd.to_datetime(pd.Series(uniques).astype(str) + "-12-31", format="%Y-%m-%d", errors="coerce").to_numpy()
+    result = np.full(len(codes), np.datetime64("NaT"), dtype="datetime64[ns]")
+    found = codes >= 0
+    result[found] = ends[codes[found]]
+    return pd.Series(result, index=years.index)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.utils.arrow import coerce_numeric
+
+MONEY_COLUMNS = [
+    "annual_income",
+    "total_reliefs",
+    "chargeable_income",
+    "cpf_contribution",
+    "foreign_income",
+    "tax_payable",
+    "tax_paid",
+]
+CENTS = 100
+
+
+def fixed_point(config) -> bool:
+    """True when ``money.fixed_point`` stores money columns as int64 cents."""
+    return bool((getattr(config, "money", None) or {}).get("fixed_point", False))
+
+
+def money_scale(config) -> int:
+    """Units per dollar of the money columns: 100 for cents, 1 for float dollars."""
+    return CENTS if fixed_point(config) else 1
+
+
+def to_cents(values: pd.Series) -> pd.Series:
+    """Dollar amounts as nullable int64 cents, rounded half away from zero."""
+    dollars = pd.to_numeric(values, errors="coerce").astype("float64").to_numpy(na_value=np.nan)
+    dollars = np.where(np.isfinite(dollars), dollars, np.nan)
+    cents = np.sign(dollars) * np.floor(np.abs(dollars) * CENTS + 0.5)
+    return pd.Series(pd.array(cents, dtype="Float64"), index=values.index).astype("Int64")
+
+
+def to_cents_arrow(values) -> pa.ChunkedArray:
+    dollars = pc.cast(coerce_numeric(values), pa.float64())
+    dollars = pc.if_else(pc.is_finite(dollars), dollars, pa.scalar(None, pa.float64()))
+    cents = pc.round(pc.multiply(dollars, float(CENTS)), round_mode="half_towards_infinity")
+    return pc.cast(cents, pa.int64())
+
+
+def to_dollars(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values, errors="coerce").astype("float64") / CENTS
+
+
+def tolerance_cents(tolerance: float) -> int:
+    """A dollar tolerance as whole cents, so integer comparisons match the float rule."""
+    return int(round(tolerance * CENTS))
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import cProfile
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+from zoneinfo import ZoneInfo
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - resource is unavailable on Windows
+    resource = None
+
+LOGGER = logging.getLogger(__name__)
+
+_ACTIVE_PROFILER: ContextVar[Optional["RunProfiler"]] = ContextVar(
+    "active_profiler", default=None
+)
+
+METRIC_COLUMNS = [
+    "kind",
+    "name",
+    "parent",
+    "started_at",
+    "wall_s",
+    "cpu_s",
+    "rss_mb",
+    "peak_rss_mb",
+    "tracemalloc_peak_mb",
+    "rows_in",
+    "rows_out",
+    "bytes",
+]
+
+
+def current_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as handle:
+            pages = int(handle.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * resource.getpagesize() / (1024 * 1024) if resource else None
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def row_count(value: Any) -> Optional[int]:
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    num_rows = getattr(value, "num_rows", None)
+    return int(num_rows) if num_rows is not None else None
+
+
+def frame_bytes(value: Any, deep: bool = False) -> Optional[int]:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=deep).sum())
+    nbytes = getattr(value, "nbytes", None)
+    return int(nbytes) if nbytes is not None else None
+
+
+class RunProfiler:
+    """Collects stage, span and artifact measurements for a single run."""
+
+    def __init__(self, run_id: str, trace_memory: bool = False, deep_sizes: bool = False) -> None:
+        self.run_id = run_id
+        self.trace_memory = trace_memory
+        self.deep_sizes = deep_sizes
+        self.records: List[Dict[str, Any]] = []
+        self._stack: List[Dict[str, Any]] = []
+
+    @classmethod
+    def from_config(cls, config, run_id: str) -> Optional["RunProfiler"]:
+        profiling_cfg = getattr(config, "profiling", None) or {}
+        if not profiling_cfg.get("enabled", True):
+            return None
+        return cls(
+            run_id,
+            trace_memory=profiling_cfg.get("tracemalloc", False),
+            deep_sizes=profiling_cfg.get("deep_sizes", False),
+        )
+
+    @contextmanager
+    def activate(self) -> Iterator["RunProfiler"]:
+        token = _ACTIVE_PROFILER.set(self)
+        started_tracing = False
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        try:
+            yield self
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            _ACTIVE_PROFILER.reset(token)
+
+    @contextmanager
+    def measure(self, kind: str, name: str) -> Iterator[Dict[str, Any]]:
+        tracing = tracemalloc.is_tracing()
+        if tracing and self._stack:
+            parent = self._stack[-1]
+            parent["_peak"] = max(parent["_peak"], tracemalloc.get_traced_memory()[1])
+        if tracing:
+            tracemalloc.reset_peak()
+
+        record: Dict[str, Any] = {
+            "kind": kind,
+            "name": name,
+            "parent": self._stack[-1]["name"] if self._stack else None,
+            "started_at": datetime.now(tz=ZoneInfo("Asia/Singapore")).isoformat(),
+            "rows_in": None,
+            "rows_out": None,
+            "bytes": None,
+            "_peak": 0,
+        }
+        self._stack.append(record)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = time.perf_counter() - wall_start
+            record["cpu_s"] = time.process_time() - cpu_start
+            record["rss_mb"] = current_rss_mb()
+            record["peak_rss_mb"] = peak_rss_mb()
+            self._stack.pop()
+            peak = record.pop("_peak")
+            if tracing:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                record["tracemalloc_peak_mb"] = peak / (1024 * 1024)
+                if self._stack:
+                    self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+            else:
+                record["tracemalloc_peak_mb"] = None
+            self.records.append(record)
+
+    def record_artifacts(self, stage_name: str, artifacts, before: Dict[str, int]) -> None:
+        """Record table artifacts added or replaced since the ``before`` snapshot."""
+        for key, version in artifacts.snapshot().items():
+            if before.get(key) == version:
+                continue
+            rows, size = artifacts.stats(key, deep=self.deep_sizes)
+            if size is None:
+                continue
+            self.records.append(
+                {
+                    "kind": "artifact",
+                    "name": key,
+                    "parent": stage_name,
+                    "started_at": None,
+                    "wall_s": None,
+                    "cpu_s": None,
+                    "rss_mb": None,
+                    "peak_rss_mb": None,
+                    "tracemalloc_peak_mb": None,
+                    "rows_in": None,
+                    "rows_out": rows,
+                    "bytes": size,
+                }
+            )
+
+    def to_frame(self) -> pd.DataFrame:
+        frame = pd.DataFrame(self.records, columns=METRIC_COLUMNS)
+        for col in ["rows_in", "rows_out", "bytes"]:
+            frame[col] = frame[col].astype("Int64")
+        return frame
+
+
+@contextmanager
+def span(name: str) -> Iterator[Optional[Dict[str, Any]]]:
+    """Record a nested timing span when a profiler is active, otherwise do nothing."""
+    profiler = _ACTIVE_PROFILER.get()
+    if profiler is None:
+        yield None
+        return
+    with profiler.measure("span", name) as record:
+        yield record
+
+
+def record_timing(name: str, wall_s: float, nbytes: Optional[int] = None) -> None:
+    """Record a duration measured outside ``span`` (e.g. on a background thread)."""
+    profiler = _ACTIVE_PROFILER.get()
+    if profiler is None:
+        return
+    profiler.records.append(
+        {
+            "kind": "span",
+            "name": name,
+            "parent": profiler._stack[-1]["name"] if profiler._stack else None,
+            "started_at": None,
+            "wall_s": wall_s,
+            "cpu_s": None,
+            "rss_mb": None,
+            "peak_rss_mb": None,
+            "tracemalloc_peak_mb": None,
+            "rows_in": None,
+            "rows_out": None,
+            "bytes": nbytes,
+        }
+    )
+
+
+def write_run_metrics(profiler: RunProfiler, metrics_dir: Path, status: str = "succeeded") -> Path:
+    part_dir = metrics_dir / f"run_id={profiler.run_id}"
+    part_dir.mkdir(parents=True, exist_ok=True)
+    path = part_dir / "run_metrics.parquet"
+    frame = profiler.to_frame()
+    frame["run_status"] = status
+    frame.to_parquet(path, index=False)
+    LOGGER.info("Run metrics written to %s", path)
+    return path
+
+
+@contextmanager
+def code_profiler(kind: Optional[str], output_path: Path) -> Iterator[None]:
+    """Dump a cProfile or pyinstrument profile of the wrapped block to ``output_path``."""
+    if not kind:
+        yield
+        return
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if kind == "cprofile":
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(str(output_path))
+            LOGGER.info("cProfile stats written to %s", output_path)
+        return
+
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError as exc:
+            raise RuntimeError(
+                "pyinstrument is not installed; install it or use --profile cprofile."
+            ) from exc
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            output_path.write_text(profiler.output_html(), encoding="utf-8")
+            LOGGER.info("pyinstrument report written to %s", output_path)
+        return
+
+    raise ValueError(f"Unsupported profiler: {kind}")
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.utils.arrow import as_string, coerce_numeric
+
+
+def _fill_false(mask) -> pa.ChunkedArray:
+    return pc.fill_null(mask, False)
+
+
+def rule_nric_format(table: pa.Table, column: str) -> pa.ChunkedArray:
+    return _fill_false(pc.match_substring_regex(as_string(table[column]), r"^[STFG]\d{7}[A-Z]$"))
+
+
+def rule_postal_code(table: pa.Table, column: str) -> pa.ChunkedArray:
+    return _fill_false(pc.match_substring_regex(as_string(table[column]), r"^\d{6}$"))
+
+
+def rule_filing_date_after_assessment(table: pa.Table, date_col: str, year_col: str) -> pa.ChunkedArray:
+    filing_date = table[date_col]
+    year = pc.cast(pc.floor(pc.cast(coerce_numeric(table[year_col]), pa.float64())), pa.int64())
+    year_end = pc.strptime(
+        pc.binary_join_element_wise(pc.cast(year, pa.string()), "-12-31", ""),
+        format="%Y-%m-%d",
+        unit="ns",
+        error_is_null=True,
+    )
+    return _fill_false(pc.greater(pc.cast(filing_date, pa.timestamp("ns")), year_end))
+
+
+def rule_chargeable_income(
+    table: pa.Table,
+    annual_col: str,
+    relief_col: str,
+    chargeable_col: str,
+    tolerance: float,
+) -> pa.ChunkedArray:
+    annual = coerce_numeric(table[annual_col])
+    relief = coerce_numeric(table[relief_col])
+    chargeable = coerce_numeric(table[chargeable_col])
+
+    diff = pc.subtract(pc.subtract(annual, relief), chargeable)
+    return _fill_false(pc.less_equal(pc.abs(diff), tolerance))
+
+
+def rule_cpf_residency(table: pa.Table, cpf_col: str, residency_col: str) -> pa.ChunkedArray:
+    cpf = pc.fill_null(coerce_numeric(table[cpf_col]), 0)
+    residency = pc.utf8_lower(as_string(table[residency_col]))
+
+    is_resident = _fill_false(pc.equal(residency, "resident"))
+    is_non_resident = _fill_false(
+        pc.is_in(residency, value_set=pa.array(["non-resident", "nonresident"]))
+    )
+    resident_ok = pc.and_(is_resident, pc.greater(cpf, 0))
+    return pc.or_(resident_ok, is_non_resident)
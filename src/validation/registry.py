@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List
+from pathlib import Path
+from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
-from src.validation import rules
+from src.locks import DEFAULT_TIMEOUT_SECONDS, lock_timeout
+from src.utils.money import fixed_point, tolerance_cents
+from src.utils.profiling import span
+from src.validation import arrow_rules, rules, set_rules
 
 
 @dataclass
@@ -22,11 +29,17 @@ class RuleRegistry:
         rules_list: List[RuleDefinition],
         required_columns: List[str],
         tolerance: float,
+        cross_row: bool = False,
+        history_dir: Optional[Path] = None,
+        history_timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS,
     ) -> None:
         self.domain_map = domain_map
         self.rules_list = rules_list
         self.required_columns = required_columns
         self.tolerance = tolerance
+        self.cross_row = cross_row
+        self.history_dir = history_dir
+        self.history_timeout = history_timeout
 
     @classmethod
     def from_config(cls, config) -> "RuleRegistry":
@@ -36,9 +49,30 @@ class RuleRegistry:
             "accuracy": ["rule_filing_date_after_assessment", "rule_chargeable_income", "rule_cpf_residency"],
         }
         tolerance = config.quality_tolerance.get("income_diff", 0.01)
+        if fixed_point(config):
+            # Money columns are int64 cents, so the rule compares integers.
+            tolerance = tolerance_cents(tolerance)
+
+        cross_row_cfg = config.cross_row_rules or {}
+        cross_row = bool(cross_row_cfg.get("enabled", False))
+        history_dir = None
+        if cross_row:
+            domain_map["uniqueness"] = ["rule_unique_return", "rule_single_filing"]
+            domain_map["consistency"] = ["rule_consistent_residency"]
+            if cross_row_cfg.get("history", False):
+                layers = config.layers or {}
+                history_dir = Path(layers.get("curated_dir", Path(config.output_dir) / "curated"))
 
         rules_list: List[RuleDefinition] = []
-        return cls(domain_map, rules_list, config.required_columns, tolerance)
+        return cls(
+            domain_map, rules_list, config.required_columns, tolerance, cross_row, history_dir, lock_timeout(config)
+        )
+
+    def _history(self) -> Optional[pd.DataFrame]:
+        if self.history_dir is None:
+            return None
+        with span("validate.load_current_filings"):
+            return set_rules.current_filings(self.history_dir, self.history_timeout)
 
     def apply_rules(self, df: pd.DataFrame) -> pd.DataFrame:
         cols = df.columns
@@ -47,24 +81,105 @@ class RuleRegistry:
                 df[col] = pd.NA
 
         df = df.copy()
-        df["row_id"] = range(1, len(df) + 1)
+        # Sharded runs assign row_id before partitioning so it stays globally unique.
+        if "row_id" not in df.columns:
+            df["row_id"] = range(1, len(df) + 1)
 
-        df["rule_nric_format"] = rules.rule_nric_format(df, "nric")
-        df["rule_postal_code"] = rules.rule_postal_code(df, "postal_code")
-        df["rule_filing_date_after_assessment"] = rules.rule_filing_date_after_assessment(
-            df, "filing_date", "assessment_year"
-        )
-        df["rule_chargeable_income"] = rules.rule_chargeable_income(
-            df, "annual_income", "total_reliefs", "chargeable_income", tolerance=self.tolerance
-        )
-        df["rule_cpf_residency"] = rules.rule_cpf_residency(
-            df, "cpf_contribution", "residential_status"
-        )
+        with span("validate.rule_nric_format"):
+            df["rule_nric_format"] = rules.rule_nric_format(df, "nric")
+        with span("validate.rule_postal_code"):
+            df["rule_postal_code"] = rules.rule_postal_code(df, "postal_code")
+        with span("validate.rule_filing_date_after_assessment"):
+            df["rule_filing_date_after_assessment"] = rules.rule_filing_date_after_assessment(
+                df, "filing_date", "assessment_year"
+            )
+        with span("validate.rule_chargeable_income"):
+            df["rule_chargeable_income"] = rules.rule_chargeable_income(
+                df, "annual_income", "total_reliefs", "chargeable_income", tolerance=self.tolerance
+            )
+        with span("validate.rule_cpf_residency"):
+            df["rule_cpf_residency"] = rules.rule_cpf_residency(
+                df, "cpf_contribution", "residential_status"
+            )
+
+        if self.cross_row:
+            with span("validate.rule_unique_return"):
+                df["rule_unique_return"] = set_rules.rule_unique_return(df)
+            with span("validate.rule_single_filing"):
+                df["rule_single_filing"] = set_rules.rule_single_filing(df, "filing_date", self._history())
+            with span("validate.rule_consistent_residency"):
+                df["rule_consistent_residency"] = set_rules.rule_consistent_residency(df, "residential_status")
 
         df["dq_completeness_pass"] = df["rule_nric_format"]
         df["dq_validity_pass"] = df["rule_postal_code"]
         df["dq_accuracy_pass"] = df[
             ["rule_filing_date_after_assessment", "rule_chargeable_income", "rule_cpf_residency"]
         ].all(axis=1)
+        if self.cross_row:
+            df["dq_uniqueness_pass"] = df["rule_unique_return"] & df["rule_single_filing"]
+            df["dq_consistency_pass"] = df["rule_consistent_residency"]
 
         return df
+
+    def apply_rules_arrow(self, table: pa.Table) -> pa.Table:
+        for col in self.required_columns:
+            if col not in table.column_names:
+                table = table.append_column(col, pa.nulls(table.num_rows))
+
+        if "row_id" not in table.column_names:
+            table = table.append_column(
+                "row_id", pa.array(np.arange(1, table.num_rows + 1, dtype=np.int64))
+            )
+
+        with span("validate.rule_nric_format"):
+            table = table.append_column(
+                "rule_nric_format", arrow_rules.rule_nric_format(table, "nric")
+            )
+        with span("validate.rule_postal_code"):
+            table = table.append_column(
+                "rule_postal_code", arrow_rules.rule_postal_code(table, "postal_code")
+            )
+        with span("validate.rule_filing_date_after_assessment"):
+            table = table.append_column(
+                "rule_filing_date_after_assessment",
+                arrow_rules.rule_filing_date_after_assessment(table, "filing_date", "assessment_year"),
+            )
+        with span("validate.rule_chargeable_income"):
+            table = table.append_column(
+                "rule_chargeable_income",
+                arrow_rules.rule_chargeable_income(
+                    table, "annual_income", "total_reliefs", "chargeable_income", tolerance=self.tolerance
+                ),
+            )
+        with span("validate.rule_cpf_residency"):
+            table = table.append_column(
+                "rule_cpf_residency",
+                arrow_rules.rule_cpf_residency(table, "cpf_contribution", "residential_status"),
+            )
+
+        if self.cross_row:
+            with span("validate.rule_unique_return"):
+                table = table.append_column("rule_unique_return", set_rules.rule_unique_return_arrow(table))
+            with span("validate.rule_single_filing"):
+                table = table.append_column(
+                    "rule_single_filing",
+                    set_rules.rule_single_filing_arrow(table, "filing_date", self._history()),
+                )
+            with span("validate.rule_consistent_residency"):
+                table = table.append_column(
+                    "rule_consistent_residency",
+                    set_rules.rule_consistent_residency_arrow(table, "residential_status"),
+                )
+
+        table = table.append_column("dq_completeness_pass", table["rule_nric_format"])
+        table = table.append_column("dq_validity_pass", table["rule_postal_code"])
+        accuracy = pc.and_(
+            pc.and_(table["rule_filing_date_after_assessment"], table["rule_chargeable_income"]),
+            table["rule_cpf_residency"],
+        )
+        table = table.append_column("dq_accuracy_pass", accuracy)
+        if self.cross_row:
+            uniqueness = pc.and_(table["rule_unique_return"], table["rule_single_filing"])
+            table = table.append_column("dq_uniqueness_pass", uniqueness)
+            table = table.append_column("dq_consistency_pass", table["rule_consistent_residency"])
+        return table
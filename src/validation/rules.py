@@ -2,6 +2,9 @@ from __future__ import annotations
 
 import pandas as pd
 
+from src.utils.categorical import map_categories
+from src.utils.dates import parse_dates, year_end
+
 
 def rule_nric_format(df: pd.DataFrame, column: str) -> pd.Series:
     series = df[column].astype("string")
@@ -14,10 +17,8 @@ def rule_postal_code(df: pd.DataFrame, column: str) -> pd.Series:
 
 
 def rule_filing_date_after_assessment(df: pd.DataFrame, date_col: str, year_col: str) -> pd.Series:
-    filing_date = pd.to_datetime(df[date_col], errors="coerce")
-    assessment_year = pd.to_numeric(df[year_col], errors="coerce")
-
-    year_start = pd.to_datetime(assessment_year.astype("Int64").astype(str) + "-12-31", errors="coerce")
+    filing_date = parse_dates(df[date_col])
+    year_start = year_end(df[year_col])
     return filing_date > year_start
 
 
@@ -38,7 +39,7 @@ def rule_chargeable_income(
 
 def rule_cpf_residency(df: pd.DataFrame, cpf_col: str, residency_col: str) -> pd.Series:
     cpf = pd.to_numeric(df[cpf_col], errors="coerce")
-    residency = df[residency_col].astype("string").str.lower()
+    residency = map_categories(df[residency_col], lambda values: values.str.lower())
 
     is_resident = residency.eq("resident")
     is_non_resident = residency.isin(["non-resident", "nonresident"])
@@ -0,0 +1,138 @@
+"""Cross-row rules, evaluated per ``(nric, assessment_year)`` group with hash grouping."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.locks import DEFAULT_TIMEOUT_SECONDS, LOCK_DIR_NAME, table_locks
+from src.utils.arrow import as_string, coerce_numeric, ordered_left_join
+from src.utils.categorical import map_categories
+from src.utils.dates import parse_dates
+
+KEY_COLUMNS = ["nric", "assessment_year"]
+
+
+def _keys(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "nric": df["nric"].astype("string"),
+            "assessment_year": pd.to_numeric(df["assessment_year"], errors="coerce").astype("Int64"),
+        },
+        index=df.index,
+    )
+
+
+def _naive(dates: pd.Series) -> pd.Series:
+    dates = parse_dates(dates)
+    if getattr(dates.dt, "tz", None) is not None:
+        dates = dates.dt.tz_convert("Asia/Singapore").dt.tz_localize(None)
+    return dates.dt.normalize()
+
+
+def _filed(history: pd.DataFrame) -> pd.DataFrame:
+    """One row per key with its normalised curated filing date as ``_filed``."""
+    return pd.DataFrame(
+        {
+            "nric": history["nric"].astype("string"),
+            "assessment_year": pd.to_numeric(history["assessment_year"], errors="coerce").astype("Int64"),
+            "_filed": _naive(history["filing_date"]),
+        }
+    ).drop_duplicates(KEY_COLUMNS, keep="last")
+
+
+def rule_unique_return(df: pd.DataFrame) -> pd.Series:
+    keys = _keys(df)
+    known = keys.notna().all(axis=1)
+    return ~(keys.duplicated(keep=False) & known)
+
+
+def rule_consistent_residency(df: pd.DataFrame, residency_col: str) -> pd.Series:
+    keys = _keys(df)
+    status = map_categories(df[residency_col], lambda values: values.str.strip().str.lower())
+    distinct = status.groupby([keys["nric"], keys["assessment_year"]], dropna=True).transform("nunique")
+    return ~distinct.gt(1).fillna(False).astype(bool)
+
+
+def rule_single_filing(df: pd.DataFrame, date_col: str, history: Optional[pd.DataFrame] = None) -> pd.Series:
+    """Fail keys filed on more than one date in the batch, or on another date than ``history``.
+
+    ``history`` is the curated snapshot read when the batch is validated. Returns that another
+    source commits after that point, or that sit in a batch still in flight, are not seen.
+    """
+    keys = _keys(df)
+    dates = _naive(df[date_col])
+    distinct = dates.groupby([keys["nric"], keys["assessment_year"]], dropna=True).transform("nunique")
+    single = ~distinct.gt(1).fillna(False).astype(bool)
+    if history is not None and len(history):
+        filed = keys.merge(_filed(history), on=KEY_COLUMNS, how="left")["_filed"]
+        conflict = filed.notna().to_numpy() & dates.notna().to_numpy() & (filed.to_numpy() != dates.to_numpy())
+        single &= ~conflict
+    return single
+
+
+# Arrow ------------------------------------------------------------------------------
+
+
+def _arrow_keys(table: pa.Table) -> pa.Table:
+    year = pc.cast(pc.floor(pc.cast(coerce_numeric(table["assessment_year"]), pa.float64())), pa.int64())
+    return pa.table({"nric": as_string(table["nric"]), "assessment_year": year})
+
+
+def _group_stat(keys: pa.Table, aggregations: List[tuple], name: str, values: Optional[pa.ChunkedArray] = None):
+    """Group statistic ``name`` broadcast back to each row (null for rows with a null key)."""
+    grouped = keys if values is None else keys.append_column("_value", values)
+    stats = grouped.group_by(KEY_COLUMNS).aggregate(aggregations)
+    joined = ordered_left_join(keys, stats, KEY_COLUMNS)
+    known = pc.and_(pc.is_valid(keys["nric"]), pc.is_valid(keys["assessment_year"]))
+    return pc.if_else(known, joined[name], None)
+
+
+def rule_unique_return_arrow(table: pa.Table) -> pa.ChunkedArray:
+    counts = _group_stat(_arrow_keys(table), [([], "count_all")], "count_all")
+    return pc.fill_null(pc.less_equal(counts, 1), True)
+
+
+def rule_consistent_residency_arrow(table: pa.Table, residency_col: str) -> pa.ChunkedArray:
+    status = pc.utf8_lower(pc.utf8_trim_whitespace(as_string(table[residency_col])))
+    distinct = _group_stat(_arrow_keys(table), [("_value", "count_distinct")], "_value_count_distinct", status)
+    return pc.fill_null(pc.less_equal(distinct, 1), True)
+
+
+def rule_single_filing_arrow(
+    table: pa.Table, date_col: str, history: Optional[pd.DataFrame] = None
+) -> pa.ChunkedArray:
+    keys = _arrow_keys(table)
+    dates = pc.floor_temporal(pc.cast(table[date_col], pa.timestamp("ns")), unit="day")
+    distinct = _group_stat(keys, [("_value", "count_distinct")], "_value_count_distinct", dates)
+    single = pc.fill_null(pc.less_equal(distinct, 1), True)
+    if history is not None and len(history):
+        known = pa.Table.from_pandas(_filed(history), preserve_index=False)
+        known = known.cast(
+            pa.schema([("nric", pa.string()), ("assessment_year", pa.int64()), ("_filed", pa.timestamp("ns"))])
+        )
+        joined = ordered_left_join(keys.append_column("_date", dates), known, KEY_COLUMNS)
+        conflict = pc.not_equal(joined["_filed"], joined["_date"])
+        single = pc.and_(single, pc.fill_null(pc.invert(conflict), True))
+    return single
+
+
+def current_filings(curated_dir: Path, timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS) -> Optional[pd.DataFrame]:
+    """``nric``, ``assessment_year`` and ``filing_date`` of the current curated returns."""
+    facts_path = Path(curated_dir) / "fact_tax_returns.parquet"
+    taxpayers_path = Path(curated_dir) / "dim_taxpayer.parquet"
+    current = [("is_current", "==", True)]
+    # Under the write stage's locks, so both tables come from the same commit.
+    with table_locks(Path(curated_dir) / LOCK_DIR_NAME, ["dim_taxpayer", "fact_tax_returns"], timeout):
+        if not (facts_path.exists() and taxpayers_path.exists()):
+            return None
+        facts = pq.read_table(
+            facts_path, columns=["taxpayer_id", "assessment_year", "filing_date"], filters=current
+        ).to_pandas()
+        taxpayers = pq.read_table(taxpayers_path, columns=["taxpayer_id", "nric"], filters=current).to_pandas()
+    return facts.merge(taxpayers, on="taxpayer_id", how="inner")[KEY_COLUMNS + ["filing_date"]]
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.main import build_pipeline, write_metrics
+from src.pipeline.warm import WarmState
+
+LOGGER = logging.getLogger(__name__)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Reports files in ``directory`` that finished writing or were moved in (Linux only)."""
+
+    def __init__(self, directory: Path, pattern: str = "*.csv") -> None:
+        self.directory = Path(directory)
+        self.pattern = pattern
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        watch = self._libc.inotify_add_watch(
+            self._fd, str(self.directory).encode(), IN_CLOSE_WRITE | IN_MOVED_TO
+        )
+        if watch < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {self.directory}")
+
+    @staticmethod
+    def available() -> bool:
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        try:
+            return hasattr(ctypes.CDLL(libc_name), "inotify_init1")
+        except OSError:
+            return False
+
+    def poll(self, timeout: float) -> List[Path]:
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not ready:
+            return []
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        changed = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            _, _, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset : offset + length].rstrip(b"\0").decode()
+            offset += length
+            if name and fnmatch.fnmatch(name, self.pattern):
+                changed.append(self.directory / name)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Portable fallback: reports files whose size and mtime held still for one interval."""
+
+    def __init__(self, directory: Path, pattern: str = "*.csv", interval: float = 1.0) -> None:
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.interval = interval
+        self._pending: Dict[Path, Tuple[int, int]] = {}
+        self._reported: Dict[Path, Tuple[int, int]] = {}
+
+    def poll(self, timeout: float) -> List[Path]:
+        time.sleep(min(self.interval, max(timeout, 0)))
+        current = {}
+        for path in self.directory.glob(self.pattern):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            current[path] = (stat.st_size, stat.st_mtime_ns)
+
+        changed = []
+        for path, signature in current.items():
+            if self._reported.get(path) == signature:
+                continue
+            if self._pending.get(path) == signature:
+                changed.append(path)
+                self._reported[path] = signature
+        self._pending = current
+        self._reported = {path: sig for path, sig in self._reported.items() if path in current}
+        return changed
+
+    def close(self) -> None:
+        return None
+
+
+def create_watcher(directory: Path, pattern: str, backend: str = "auto", interval: float = 1.0):
+    if backend not in {"auto", "inotify", "polling"}:
+        raise ValueError(f"Unsupported watch backend: {backend}")
+    if backend in {"auto", "inotify"} and InotifyWatcher.available():
+        try:
+            return InotifyWatcher(directory, pattern)
+        except OSError as exc:
+            if backend == "inotify":
+                raise
+            LOGGER.warning("inotify unavailable (%s); falling back to polling", exc)
+    elif backend == "inotify":
+        raise RuntimeError("inotify is not available on this platform")
+    return PollingWatcher(directory, pattern, interval)
+
+
+class WatchDaemon:
+    """Keeps the pipeline resident and runs it on micro-batches of dropped files.
+
+    A batch starts at the first new file and closes once no further file has arrived
+    for ``debounce_seconds`` or ``max_batch_wait_seconds`` have passed. Config, rule
+    registry and curated tables stay warm between batches.
+    """
+
+    def __init__(self, config, backend: Optional[str] = None) -> None:
+        self.config = config
+        watch_cfg = getattr(config, "watch", None) or {}
+        self.debounce_seconds = float(watch_cfg.get("debounce_seconds", 2.0))
+        self.max_batch_wait_seconds = float(watch_cfg.get("max_batch_wait_seconds", 30.0))
+        self.poll_interval_seconds = float(watch_cfg.get("poll_interval_seconds", 1.0))
+        self.backend = backend or watch_cfg.get("backend", "auto")
+        self.state = WarmState()
+        self.batches = 0
+
+        input_path = Path(config.input_path)
+        if input_path.suffix:
+            self.directory, self.pattern = input_path.parent, input_path.name
+        else:
+            self.directory, self.pattern = input_path, "*.csv"
+
+    def pending_files(self) -> List[Path]:
+        return sorted(self.directory.glob(self.pattern))
+
+    def serve(self, max_batches: Optional[int] = None) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        watcher = create_watcher(
+            self.directory, self.pattern, self.backend, self.poll_interval_seconds
+        )
+        LOGGER.info(
+            "Watching %s for %s (%s)", self.directory, self.pattern, type(watcher).__name__
+        )
+        try:
+            if self.pending_files():
+                self.run_batch()
+            while max_batches is None or self.batches < max_batches:
+                batch = self._collect_batch(watcher)
+                if batch and self.pending_files():
+                    self.run_batch()
+        finally:
+            watcher.close()
+
+    def _collect_batch(self, watcher) -> Set[Path]:
+        batch = set(watcher.poll(self.poll_interval_seconds))
+        if not batch:
+            return batch
+        started = time.monotonic()
+        quiet_since = started
+        while True:
+            now = time.monotonic()
+            if now - quiet_since >= self.debounce_seconds:
+                break
+            if now - started >= self.max_batch_wait_seconds:
+                break
+            arrived = watcher.poll(min(self.debounce_seconds, self.poll_interval_seconds))
+            if arrived:
+                batch.update(arrived)
+                quiet_since = time.monotonic()
+        LOGGER.info("Collected micro-batch of %s file(s)", len(batch))
+        return batch
+
+    def run_batch(self) -> bool:
+        self.batches += 1
+        started = time.perf_counter()
+        with self.state.activate():
+            pipeline, context = build_pipeline(self.config)
+            status = "failed"
+            try:
+                pipeline.run(context)
+                status = "succeeded"
+            except Exception:
+                LOGGER.exception("Micro-batch %s failed; waiting for the next drop", self.batches)
+                return False
+            finally:
+                context.artifacts.close()
+                write_metrics(self.config, context, status=status)
+        LOGGER.info(
+            "Micro-batch %s finished in %.2fs (warm table hits=%s, misses=%s)",
+            self.batches,
+            time.perf_counter() - started,
+            self.state.hits,
+            self.state.misses,
+        )
+        return True
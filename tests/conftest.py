@@ -0,0 +1,41 @@
+from dataclasses import fields, replace
+from pathlib import Path
+
+import pytest
+
+from src.config import load_config
+
+
+def _relocate(value, source: Path, target: Path):
+    if isinstance(value, dict):
+        return {key: _relocate(item, source, target) for key, item in value.items()}
+    if isinstance(value, str) and value:
+        path = Path(value)
+        if path == source or source in path.parents:
+            return str(target / path.relative_to(source))
+    return value
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """Copies of configs/pipeline.yaml that read ``workdir/input`` and write under ``workdir``."""
+
+    def make(workdir: Path = tmp_path, engine: str = "pandas"):
+        base = load_config(Path("configs/pipeline.yaml"))
+        output_dir = Path(workdir) / "outputs"
+        # Every section is copied, with paths under the configured output_dir moved along.
+        sections = {
+            item.name: _relocate(getattr(base, item.name), Path(base.output_dir), output_dir)
+            for item in fields(base)
+            if isinstance(getattr(base, item.name), dict)
+        }
+        sections["execution"] = {**sections["execution"], "engine": engine}
+        return replace(
+            base,
+            **sections,
+            input_path=str(Path(workdir) / "input" / "synthetic_tax_returns.csv"),
+            output_dir=str(output_dir),
+            archive_dir=str(Path(workdir) / "archive"),
+        )
+
+    return make
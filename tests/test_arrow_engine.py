@@ -0,0 +1,65 @@
+import pandas as pd
+import pyarrow as pa
+
+from src.bench.harness import DEFAULT_ERROR_RATES
+from src.bench.synthetic import SyntheticSpec, write_tax_returns_csv
+from src.main import build_pipeline
+from src.utils.arrow import parse_timestamp
+from src.validation import arrow_rules, rules
+
+CURATED_TABLES = ["dim_geo", "dim_taxpayer", "fact_tax_returns", "data_quality_results"]
+
+
+def test_arrow_rules_match_pandas_rules():
+    frame = pd.DataFrame(
+        {
+            "nric": ["S1234567A", "123", None, "T7654321Z"],
+            "postal_code": ["123456", "12345", None, "012345"],
+            "annual_income": [100.0, 100.0, None, 50.0],
+            "total_reliefs": [10.0, 5.0, 1.0, 0.0],
+            "chargeable_income": [90.0, 99.0, 1.0, 50.0],
+            "cpf": [100.0, 0.0, None, 0.0],
+            "residency": ["Resident", "Resident", "Non-Resident", "Non-Resident"],
+        }
+    )
+    table = pa.Table.from_pandas(frame)
+
+    pairs = [
+        (rules.rule_nric_format(frame, "nric"), arrow_rules.rule_nric_format(table, "nric")),
+        (rules.rule_postal_code(frame, "postal_code"), arrow_rules.rule_postal_code(table, "postal_code")),
+        (
+            rules.rule_chargeable_income(frame, "annual_income", "total_reliefs", "chargeable_income", 0.01),
+            arrow_rules.rule_chargeable_income(table, "annual_income", "total_reliefs", "chargeable_income", 0.01),
+        ),
+        (rules.rule_cpf_residency(frame, "cpf", "residency"), arrow_rules.rule_cpf_residency(table, "cpf", "residency")),
+    ]
+    for expected, actual in pairs:
+        assert actual.to_pylist() == expected.tolist()
+
+
+def test_parse_timestamp_rejects_impossible_dates():
+    parsed = parse_timestamp(pa.array(["2024-02-29", "2024-02-30", "29/02/2024", None]))
+    assert parsed.null_count == 2
+    assert parsed[0].as_py().day == 29
+    assert parsed[2].as_py().month == 2
+
+
+def test_arrow_engine_matches_pandas_engine(tmp_path, make_config):
+    outputs = {}
+    for engine in ["pandas", "arrow"]:
+        config = make_config(tmp_path / engine, engine)
+        spec = SyntheticSpec(rows=600, seed=3, error_rates=DEFAULT_ERROR_RATES)
+        write_tax_returns_csv(spec, tmp_path / engine / "input" / "synthetic_tax_returns.csv")
+        pipeline, context = build_pipeline(config)
+        pipeline.run(context)
+        outputs[engine] = tmp_path / engine / "outputs" / "curated"
+
+    for table in CURATED_TABLES:
+        expected = pd.read_parquet(outputs["pandas"] / f"{table}.parquet")
+        actual = pd.read_parquet(outputs["arrow"] / f"{table}.parquet")
+        volatile = [
+            col for col in expected.columns if col.endswith(("_at", "run_id", "timestamp")) or "effective" in col
+        ]
+        pd.testing.assert_frame_equal(
+            actual.drop(columns=volatile), expected.drop(columns=volatile), check_dtype=False
+        )
@@ -0,0 +1,71 @@
+import pandas as pd
+import pyarrow as pa
+
+from src.pipeline.artifacts import ArtifactStore
+from src.pipeline.base import Pipeline, PipelineContext, PipelineStage
+
+
+def _frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({"id": range(rows), "name": [f"row{i}" for i in range(rows)]})
+
+
+def test_spills_least_recently_used_and_reloads_lazily(tmp_path):
+    first, second = _frame(1_000), _frame(1_000)
+    budget = ArtifactStore(initial={"probe": first}).stats("probe", deep=True)[1] * 3 // 2
+    store = ArtifactStore(memory_budget_bytes=budget, scratch_dir=tmp_path)
+
+    store["first"] = first
+    store["second"] = second
+
+    assert store.is_spilled("first")
+    assert not store.is_spilled("second")
+    assert store.stats("first") == (1_000, budget * 2 // 3)
+
+    pd.testing.assert_frame_equal(store["first"], first)
+    assert store.is_spilled("second")
+
+
+def test_arrow_tables_stay_memory_mapped_after_reload(tmp_path):
+    table = pa.table({"id": list(range(1_000))})
+    store = ArtifactStore(memory_budget_bytes=table.nbytes, scratch_dir=tmp_path)
+    store["a"] = table
+    store["b"] = table
+
+    assert store["a"].equals(table)
+    assert store.is_spilled("b")
+    store.close()
+    assert not tmp_path.exists()
+
+
+def test_release_drops_artifact_after_last_consumer():
+    store = ArtifactStore(initial={"valid": _frame(3), "run_id": "run_1"})
+    store.retain("valid", count=2)
+
+    store.release("valid")
+    assert "valid" in store
+    store.release("valid")
+    assert "valid" not in store
+    assert store["run_id"] == "run_1"
+
+
+class _ProduceStage(PipelineStage):
+    name = "produce"
+
+    def run(self, context, data=None):
+        context.artifacts["valid"] = _frame(3)
+        return data
+
+
+class _ConsumeStage(PipelineStage):
+    name = "consume"
+    consumes = ("valid",)
+
+    def run(self, context, data=None):
+        return len(context.artifacts["valid"])
+
+
+def test_pipeline_releases_consumed_artifacts():
+    context = PipelineContext(config=None, artifacts={"run_id": "run_1"})
+    assert Pipeline([_ProduceStage(), _ConsumeStage()]).run(context) == 3
+    assert "valid" not in context.artifacts
+    assert context.artifacts["run_id"] == "run_1"
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from src.asof import IntervalIndex, point_in_time_join
+from src.query import QueryEngine
+
+MAX_END = pd.Timestamp("2262-04-11", tz="Asia/Singapore")
+
+
+def _ts(value: str) -> pd.Timestamp:
+    return pd.Timestamp(value, tz="Asia/Singapore")
+
+
+def _taxpayers() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "taxpayer_id": np.array([7, 7, 7, 9], dtype="uint64"),
+            "housing_type": ["HDB 3-room", "HDB 4-room", "Landed Property", "Private Condo"],
+            "geo_id": np.array([1, 1, 2, 2], dtype="uint64"),
+            "effective_start": [_ts("2023-01-01"), _ts("2023-06-01"), _ts("2024-01-01"), _ts("2023-03-01")],
+            "effective_end": [_ts("2023-06-01"), _ts("2024-01-01"), MAX_END, MAX_END],
+            "is_current": [False, False, True, True],
+        }
+    )
+
+
+def test_interval_index_matches_filter_scan():
+    taxpayers = _taxpayers()
+    index = IntervalIndex.from_frame(taxpayers, "taxpayer_id")
+    for moment in ["2022-12-31", "2023-01-01", "2023-05-31 23:59", "2023-06-01", "2025-01-01"]:
+        stamp = _ts(moment)
+        expected = np.flatnonzero((taxpayers["effective_start"] <= stamp) & (taxpayers["effective_end"] > stamp))
+        assert index.as_of(stamp).tolist() == expected.tolist()
+
+    rows = index.lookup(np.array([7, 9, 9, 5], dtype="uint64"), ["2023-07-01", "2023-01-01", "2023-04-01", "2023-07-01"])
+    assert rows.tolist() == [1, -1, 3, -1]
+    assert index.as_of(_ts("2023-07-01"), keys=np.array([9], dtype="uint64")).tolist() == [3]
+    early = index.lookup(np.array([9], dtype="uint64"), ["2023-01-01"], extend_first=True)
+    assert early.tolist() == [3]
+
+
+def test_point_in_time_join_uses_version_at_filing_date(tmp_path):
+    taxpayers = _taxpayers()
+    facts = pd.DataFrame(
+        {
+            "return_key": [1, 2, 3],
+            "taxpayer_id": np.array([7, 7, 9], dtype="uint64"),
+            "filing_date": [_ts("2023-02-01"), _ts("2024-02-01"), _ts("2022-04-01")],
+            "effective_start": [_ts("2023-02-01"), _ts("2024-02-01"), _ts("2022-04-01")],
+            "effective_end": [MAX_END, MAX_END, MAX_END],
+            "is_current": [True, True, True],
+        }
+    )
+    dim_geo = pd.DataFrame({"geo_id": np.array([1, 2], dtype="uint64"), "region": ["East", "West"]})
+
+    mart = point_in_time_join(facts, taxpayers, dim_geo)
+
+    assert mart["housing_type"].tolist() == ["HDB 3-room", "Landed Property", "Private Condo"]
+    assert mart["region"].tolist() == ["East", "West", "West"]
+
+    taxpayers.to_parquet(tmp_path / "dim_taxpayer.parquet", index=False)
+    facts.to_parquet(tmp_path / "fact_tax_returns.parquet", index=False)
+    dim_geo.to_parquet(tmp_path / "dim_geo.parquet", index=False)
+    engine = QueryEngine(curated_dir=tmp_path, datamart_dir=tmp_path)
+    pd.testing.assert_frame_equal(engine.point_in_time_datamart(), mart)
+    for moment in ["2023-03-15", "2024-06-30"]:
+        indexed = engine.versions_as_of("dim_taxpayer", moment).to_pandas()
+        scanned = engine.query_pandas("dim_taxpayer", as_of=moment)
+        pd.testing.assert_frame_equal(indexed, scanned)
@@ -0,0 +1,137 @@
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.backfill import BackfillRunner
+from src.bench.synthetic import SyntheticSpec, write_tax_returns_csv
+from src.locks import LockTimeout, file_lock, lock_dir
+from src.main import build_pipeline, parse_years
+from src.pipeline.write import WriteStage
+from src.state import read_state
+
+
+def _config(make_config, workdir: Path, engine: str = "pandas"):
+    config = make_config(workdir, engine)
+    config.input_path = str(workdir / "input")
+    write_tax_returns_csv(SyntheticSpec(rows=300, seed=6, years=[2020, 2021, 2022]), workdir / "input" / "batch.csv")
+    return config
+
+
+def _table(config, name: str, layer: str = "curated_dir") -> pd.DataFrame:
+    table = pd.read_parquet(Path(config.layers[layer]) / f"{name}.parquet")
+    volatile = [
+        col
+        for col in table.columns
+        if any(part in col for part in ("run_id", "return_id", "created_at", "updated_at", "effective"))
+    ]
+    table = table.drop(columns=volatile)
+    return table.sort_values(list(table.columns)).reset_index(drop=True)
+
+
+def _facts(config) -> pd.DataFrame:
+    return _table(config, "fact_tax_returns")
+
+
+@pytest.mark.parametrize("engine", ["pandas", "arrow"])
+def test_backfill_matches_single_run(tmp_path, make_config, engine):
+    single = _config(make_config, tmp_path / "single", engine)
+    pipeline, context = build_pipeline(single)
+    pipeline.run(context)
+
+    config = _config(make_config, tmp_path / "backfill", engine)
+    summary = BackfillRunner(config, workers=2).run()
+
+    assert summary["committed"] == ["ay2020", "ay2021", "ay2022"]
+    pd.testing.assert_frame_equal(_facts(config), _facts(single))
+    # Arrow dictionaries keep first-seen order; the committed dims sort their categories.
+    exact = {"check_categorical": engine == "pandas"}
+    for name in ["dim_taxpayer", "dim_geo"]:
+        pd.testing.assert_frame_equal(_table(config, name), _table(single, name), **exact)
+    datamart = _table(config, "datamart_tax_returns", "datamart_dir")
+    assert sorted(datamart["assessment_year"].unique()) == [2020, 2021, 2022]
+    # A single run's fact artifact repeats a return once per taxpayer attribute row.
+    single_datamart = _table(single, "datamart_tax_returns", "datamart_dir").drop_duplicates(ignore_index=True)
+    pd.testing.assert_frame_equal(datamart, single_datamart, **exact)
+    state = read_state(Path(config.incremental["state_path"]))
+    assert state["last_assessment_year"] == 2022 and len(state["processed_files"]) == 1
+    assert not (Path(config.output_dir) / "metadata" / "backfill").exists()
+
+
+def test_backfill_resumes_after_crash(tmp_path, make_config, monkeypatch):
+    config = _config(make_config, tmp_path)
+    write = WriteStage.run
+    written = []
+
+    def crash_on_second(self, context, data):
+        if written:
+            raise RuntimeError("simulated crash")
+        written.append(context.artifacts["run_id"])
+        return write(self, context, data)
+
+    monkeypatch.setattr(WriteStage, "run", crash_on_second)
+    with pytest.raises(RuntimeError):
+        BackfillRunner(config, workers=1).run()
+    monkeypatch.undo()
+    # The partitions are swapped in together, so the live zones saw none of them.
+    assert not (Path(config.layers["curated_dir"]) / "fact_tax_returns.parquet").exists()
+
+    transformed = []
+    monkeypatch.setattr("src.backfill._transform_partition", lambda *args: transformed.append(args))
+    summary = BackfillRunner(config, workers=1).run()
+
+    assert transformed == []  # the checkpoints are reused
+    assert summary["resumed"] == []
+    assert summary["committed"] == ["ay2020", "ay2021", "ay2022"]
+    assert sorted(_facts(config)["assessment_year"].unique()) == [2020, 2021, 2022]
+
+
+def test_commits_hold_live_locks_and_move_only_rewritten_files(tmp_path, make_config, monkeypatch):
+    config = _config(make_config, tmp_path)
+    curated = Path(config.layers["curated_dir"])
+    curated.mkdir(parents=True)
+    untouched = curated / "notes.parquet"
+    pd.DataFrame({"note": ["kept"]}).to_parquet(untouched)
+    inode = untouched.stat().st_ino
+    write = WriteStage.run
+    blocked = []
+
+    def write_while_probing(self, context, data):
+        try:
+            with file_lock(lock_dir(config) / "fact_tax_returns.lock", timeout=0):
+                pass
+        except LockTimeout:
+            blocked.append(context.artifacts["run_id"])
+        return write(self, context, data)
+
+    copytree = shutil.copytree
+    copied = []
+
+    def counting_copytree(source, target, **kwargs):
+        copied.append(Path(source))
+        return copytree(source, target, **kwargs)
+
+    monkeypatch.setattr(WriteStage, "run", write_while_probing)
+    monkeypatch.setattr(shutil, "copytree", counting_copytree)
+    BackfillRunner(config, workers=1).run()
+
+    assert len(blocked) == 3
+    # Three partitions, one staged copy of the live zone.
+    assert copied == [curated]
+    assert untouched.stat().st_ino == inode
+
+
+def test_backfill_with_export_enabled_syncs_once_at_the_end(tmp_path, make_config):
+    config = _config(make_config, tmp_path)
+    config.export = {**config.export, "enabled": True}
+    BackfillRunner(config, workers=1).run()
+
+    with sqlite3.connect(config.export["path"]) as connection:
+        exported = connection.execute("SELECT count(*) FROM fact_tax_returns").fetchone()[0]
+    assert exported == len(pd.read_parquet(Path(config.layers["curated_dir"]) / "fact_tax_returns.parquet"))
+
+
+def test_parse_years():
+    assert parse_years("2019-2021,2023") == [2019, 2020, 2021, 2023]
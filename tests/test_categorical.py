@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.bench.harness import DEFAULT_ERROR_RATES
+from src.bench.synthetic import SyntheticSpec, write_tax_returns_csv
+from src.main import build_pipeline
+from src.transform.rollups import check_rollups, rollup_grains
+from src.utils.categorical import align_categories, map_categories, trim_dictionary
+
+
+def test_text_clean_up_runs_per_category():
+    status = pd.Series(["Resident ", "resident", None, "Non-Resident"], dtype="category")
+    lowered = map_categories(status, lambda values: values.str.strip().str.lower())
+    assert isinstance(lowered.dtype, pd.CategoricalDtype)
+    assert sorted(lowered.cat.categories) == ["non-resident", "resident"]
+    assert lowered.tolist()[:2] == ["resident", "resident"] and pd.isna(lowered[2])
+
+    trimmed = trim_dictionary(pa.array(["A ", "A", None, " B"]).dictionary_encode())
+    assert pa.types.is_dictionary(trimmed.type)
+    assert trimmed.to_pylist() == ["A", "A", None, "B"]
+    assert len(trimmed.chunk(0).dictionary) == 2
+
+    left = pd.DataFrame({"region": pd.Categorical(["West", "East"])})
+    right = pd.DataFrame({"region": pd.Categorical(["North", "East"], categories=["North", "East"])})
+    left, right = align_categories([left, right])
+    assert list(left["region"].cat.categories) == ["East", "North", "West"]
+    assert left["region"].dtype == right["region"].dtype
+    assert isinstance(pd.concat([left, right])["region"].dtype, pd.CategoricalDtype)
+
+
+def test_configured_columns_stay_encoded_to_the_outputs(tmp_path, make_config):
+    for engine in ["pandas", "arrow"]:
+        config = make_config(tmp_path / engine, engine)
+        write_tax_returns_csv(
+            SyntheticSpec(rows=300, seed=4, error_rates=DEFAULT_ERROR_RATES), Path(config.input_path)
+        )
+        pipeline, context = build_pipeline(config)
+        pipeline.run(context)
+
+        curated = Path(config.layers["curated_dir"])
+        schema = pq.read_schema(curated / "dim_taxpayer.parquet")
+        for col in ["residential_status", "filing_status", "housing_type", "occupation"]:
+            assert pa.types.is_dictionary(schema.field(col).type), (engine, col)
+        assert pa.types.is_dictionary(pq.read_schema(curated / "dim_geo.parquet").field("region").type)
+        mart = pq.read_schema(Path(config.layers["datamart_dir"]) / "datamart_tax_returns.parquet")
+        assert pa.types.is_dictionary(mart.field("region").type)
+        raw = next(Path(config.layers["raw_dir"]).rglob("raw_*.parquet"))
+        assert pa.types.is_dictionary(pq.read_schema(raw).field("source_file_id").type)
+        # Grouping by categorical grain columns must not add empty category combinations.
+        assert check_rollups(curated, Path(config.layers["datamart_dir"]), rollup_grains(config)) == []
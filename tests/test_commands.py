@@ -0,0 +1,58 @@
+import json
+import subprocess
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+from src import commands
+from src.config import load_config
+from src.state import source_file_id, write_state
+
+
+def _config(tmp_path: Path):
+    config = load_config(Path("configs/pipeline.yaml"))
+    return replace(
+        config,
+        input_path=str(tmp_path / "input"),
+        output_dir=str(tmp_path / "outputs"),
+        incremental={**config.incremental, "state_path": str(tmp_path / "state.json")},
+    )
+
+
+def test_metadata_commands_do_not_import_pandas_or_pyarrow():
+    probe = (
+        "import sys; from src.main import parse_args, run_command; "
+        "run_command(parse_args(['status', '--json'])); "
+        "print([name for name in ('pandas', 'pyarrow', 'numpy') if name in sys.modules])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_plan_skips_files_already_in_the_ledger(tmp_path, capsys):
+    config = _config(tmp_path)
+    (tmp_path / "input").mkdir()
+    done, new = tmp_path / "input" / "a.csv", tmp_path / "input" / "b.csv"
+    done.write_text("nric\nS1234567A\n")
+    new.write_text("nric\nS7654321B\nS7654321B\n")
+    write_state(tmp_path / "state.json", {"last_assessment_year": 2022, "processed_files": [source_file_id(done)]})
+
+    assert commands.plan(config, as_json=True) == 0
+    payload = json.loads(capsys.readouterr().out)
+    assert [item["action"] for item in payload["files"]] == ["skip (already processed)", "ingest"]
+    assert payload["ingest_bytes"] == new.stat().st_size
+
+
+def test_config_errors_reports_bad_settings(tmp_path):
+    config = _config(tmp_path)
+    config.execution = {"engine": "spark", "shards": 0}
+    config.required_columns = config.required_columns + ["unmapped"]
+
+    errors = commands.config_errors(config)
+
+    assert any("execution.engine" in error for error in errors)
+    assert any("execution.shards" in error for error in errors)
+    assert any("unmapped" in error for error in errors)
+    assert commands.config_errors(_config(tmp_path)) == []
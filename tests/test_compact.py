@@ -0,0 +1,91 @@
+from datetime import timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.bench.harness import DEFAULT_ERROR_RATES
+from src.bench.synthetic import SyntheticSpec, generate_tax_returns
+from src.compact import ZoneCompactor
+from src.main import build_pipeline
+from src.query import QueryEngine
+
+
+def _micro_batches(make_config, tmp_path: Path, batches: int = 3):
+    config = make_config()
+    config.input_path = str(tmp_path / "input")
+    config.incremental["allow_backfill"] = True
+    Path(config.input_path).mkdir(parents=True)
+    for seed in range(batches):
+        returns = generate_tax_returns(SyntheticSpec(rows=120, seed=30 + seed, error_rates=DEFAULT_ERROR_RATES))
+        returns.to_csv(Path(config.input_path) / f"batch_{seed}.csv", index=False)
+        pipeline, context = build_pipeline(config)
+        context.artifacts["run_id"] = f"run_{seed}"
+        pipeline.run(context)
+    return config
+
+
+def _zone_rows(config):
+    engine = QueryEngine.from_config(config)
+    return {table: engine.query_pandas(table).sort_values(["created_run_id", "row_id"]) for table in ["staging", "quarantine"]}
+
+
+def test_compaction_merges_small_files_and_keeps_lineage(tmp_path, make_config):
+    config = _micro_batches(make_config, tmp_path)
+    before = _zone_rows(config)
+    compactor = ZoneCompactor(config)
+    compactor.today += timedelta(days=1)
+    partition = next(p for p in compactor.partitions() if p.zone == "quarantine").path
+    assert len(list(partition.glob("*.parquet"))) == 9
+
+    assert compactor.run(dry_run=True)["compacted"] and len(list(partition.glob("*.parquet"))) == 9
+    summary = compactor.run()
+
+    assert {(item["zone"], item["prefix"]) for item in summary["compacted"]} == {
+        ("raw", "raw"),
+        ("staging", "staging"),
+        ("quarantine", "quarantine"),
+        ("quarantine", "quarantine_breakdown"),
+        ("quarantine", "quarantine_samples"),
+    }
+    assert len(list(partition.glob("*.parquet"))) == 3
+    after = _zone_rows(config)
+    for table, frame in before.items():
+        assert frame["created_run_id"].astype(str).unique().tolist() == ["run_0", "run_1", "run_2"]
+        pd.testing.assert_frame_equal(
+            after[table].reset_index(drop=True), frame.reset_index(drop=True), check_dtype=False, check_categorical=False
+        )
+    breakdown = pd.read_parquet(next(partition.glob("quarantine_breakdown_*.parquet")))
+    assert set(breakdown["created_run_id"]) == {"run_0", "run_1", "run_2"}
+    log = pd.read_csv(Path(config.output_dir) / "metadata" / "compaction_log.csv")
+    assert log["action"].tolist() == ["compact"] * 5 and log["input_files"].eq(3).all()
+    # A second pass finds nothing left to merge.
+    assert compactor.run()["compacted"] == []
+
+
+def test_interrupted_compaction_is_finished_and_retention_drops_old_partitions(tmp_path, make_config, monkeypatch):
+    config = _micro_batches(make_config, tmp_path, batches=2)
+    expected = _zone_rows(config)["staging"]
+    compactor = ZoneCompactor(config)
+    compactor.today += timedelta(days=1)
+
+    def crash(directory, intent):
+        raise RuntimeError("killed mid-compaction")
+
+    monkeypatch.setattr(ZoneCompactor, "_finish", staticmethod(crash))
+    with pytest.raises(RuntimeError):
+        compactor.run()
+    monkeypatch.undo()
+
+    summary = compactor.run()
+    assert summary["recovered"] == 1
+    assert not list(Path(config.layers["staging_dir"]).rglob("*.tmp"))
+    staging = _zone_rows(config)["staging"]
+    assert len(staging) == len(expected)
+
+    config.compaction = {**config.compaction, "retention_days": {"raw": 0}}
+    expiring = ZoneCompactor(config)
+    expiring.today += timedelta(days=1)
+    assert [item["zone"] for item in expiring.run()["expired"]] == ["raw"]
+    assert not list(Path(config.layers["raw_dir"]).rglob("*.parquet"))
+    assert len(_zone_rows(config)["staging"]) == len(expected)
@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.bench.synthetic import SyntheticSpec, generate_tax_returns
+from src.dedup import HashIndex, row_hashes
+from src.main import build_pipeline
+from src.pipeline.ingest import ArrowCsvIngestStage, CsvIngestStage, text_columns
+
+
+def test_resent_returns_are_dropped_before_validation(tmp_path, make_config):
+    config = make_config()
+    input_dir = tmp_path / "input"
+    config.input_path = str(input_dir)
+    config.incremental["allow_backfill"] = True
+    input_dir.mkdir()
+    returns = generate_tax_returns(SyntheticSpec(rows=200, seed=9))
+    returns.to_csv(input_dir / "batch_1.csv", index=False)
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+    index = HashIndex.from_config(config)
+    assert len(index) == 200
+
+    resent = returns.iloc[::-1].copy()
+    resent.loc[resent.index[0], "tax_paid_sgd"] += 100
+    resent.to_csv(input_dir / "batch_2.csv", index=False)
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+
+    assert context.artifacts["dedup_dropped"] == 199
+    staging = Path(config.layers["staging_dir"]) / config.source_name
+    assert len(pd.read_parquet(next(staging.rglob(f"staging_{context.artifacts['run_id']}.parquet")))) == 1
+    assert len(index) == 201
+
+    ingested = {}
+    rename_map = {
+        CsvIngestStage._normalize_column(source): target for target, source in config.columns.items() if source
+    }
+    for name, stage in [("pandas", CsvIngestStage()), ("arrow", ArrowCsvIngestStage())]:
+        frame = stage._read_file(next((tmp_path / "archive").rglob("batch_2.csv")), "file", text_columns=text_columns(config))
+        ingested[name] = row_hashes(stage._rename_columns(frame, rename_map))
+    np.testing.assert_array_equal(ingested["pandas"], ingested["arrow"])
+    assert index.contains(ingested["pandas"]).all()
+
+
+def test_segments_are_merged_past_max_segments(tmp_path):
+    index = HashIndex(tmp_path, max_segments=2)
+    for batch in ([5, 1], [3, 1], [9]):
+        index.add(np.array(batch, dtype=np.uint64))
+
+    assert len(index.segments()) == 1
+    assert np.load(index.segments()[0]).tolist() == [1, 3, 5, 9]
+    assert index.contains(np.array([9, 2, 1], dtype=np.uint64)).tolist() == [True, False, True]
+    assert not pd.Series(index.contains(np.array([], dtype=np.uint64))).any()
+
+
+def test_numbers_and_dates_hash_in_one_spelling(make_config):
+    spelled = pd.DataFrame(
+        {
+            "nric": ["S1234567D", " S1234567D", "S1234567D"],
+            "assessment_year": ["2023", "2023.0", "2023"],
+            "tax_paid": ["100", "100.0", "1e2"],
+            "filing_date": ["2024-03-05", "2024/03/05", "05/03/2024"],
+            "occupation": ["Nurse", "Nurse", "Nurse"],
+        }
+    )
+    assert len(set(row_hashes(spelled))) == 1
+    typed = spelled.assign(tax_paid=100.0, filing_date=pd.Timestamp("2024-03-05"))
+    assert set(row_hashes(typed)) == set(row_hashes(spelled))
+    assert len(set(row_hashes(spelled.assign(tax_paid=["n/a", "N/A", "100"])))) == 3
+
+    config = make_config()
+    config.dedup = {"enabled": True}
+    assert HashIndex.from_config(config).directory == Path(config.output_dir) / "metadata" / "dedup"
+
+
+def test_whole_file_resent_is_archived_without_new_rows(tmp_path, make_config):
+    config = make_config()
+    input_dir = tmp_path / "input"
+    config.input_path = str(input_dir)
+    config.incremental["allow_backfill"] = True
+    input_dir.mkdir()
+    returns = generate_tax_returns(SyntheticSpec(rows=100, seed=12))
+    returns.to_csv(input_dir / "batch_1.csv", index=False)
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+    fact_path = Path(config.layers["curated_dir"]) / "fact_tax_returns.parquet"
+    committed = pd.read_parquet(fact_path)
+
+    returns.to_csv(input_dir / "batch_2.csv", index=False)
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+
+    assert context.artifacts["dedup_dropped"] == 100
+    assert not list(input_dir.glob("*.csv"))
+    assert len(list((tmp_path / "archive").rglob("batch_2.csv"))) == 1
+    ledger = pd.read_csv(Path(config.output_dir) / "metadata" / "processed_files.csv")
+    assert ledger["file_name"].tolist() == ["batch_1.csv", "batch_2.csv"]
+    pd.testing.assert_frame_equal(pd.read_parquet(fact_path), committed)
@@ -0,0 +1,127 @@
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.bench.synthetic import SyntheticSpec, generate_tax_returns
+from src.export import ROW_HASH, TableExporter, _SqliteStore
+from src.main import build_pipeline
+
+
+def _run(config, frame: pd.DataFrame, run_id: str):
+    frame.to_csv(Path(config.input_path) / f"{run_id}.csv", index=False)
+    pipeline, context = build_pipeline(config)
+    context.artifacts["run_id"] = run_id
+    pipeline.run(context)
+    return context.artifacts["export_summary"]
+
+
+def _exported(path: Path, table: str) -> pd.DataFrame:
+    with sqlite3.connect(path) as connection:
+        return pd.read_sql(f"SELECT * FROM {table}", connection)
+
+
+def test_export_applies_each_runs_scd2_delta(tmp_path, make_config):
+    config = make_config()
+    config.input_path = str(tmp_path / "input")
+    config.incremental["allow_backfill"] = True
+    config.export = {**config.export, "enabled": True}
+    Path(config.input_path).mkdir()
+    returns = generate_tax_returns(SyntheticSpec(rows=300, seed=49, error_rates={}))
+
+    first = _run(config, returns, "run_1")
+    assert {name: item["inserted"] for name, item in first.items()} == {
+        name: item["rows"] for name, item in first.items()
+    }
+
+    changed = returns.copy()
+    changed.loc[:19, "occupation"] = "Auditor"
+    changed.loc[:19, "tax_paid_sgd"] += 100
+    second = _run(config, changed, "run_2")
+
+    fact = second["fact_tax_returns"]
+    assert 0 < fact["inserted"] < fact["rows"] and not fact["reloaded"]
+    assert second["dim_taxpayer"]["deleted"] > 0  # retired versions are replaced in place
+    export_path = Path(config.export["path"])
+    curated = Path(config.layers["curated_dir"])
+    for table in ["dim_taxpayer", "fact_tax_returns"]:
+        exported = _exported(export_path, table)
+        expected = pq.read_table(curated / f"{table}.parquet").to_pandas()
+        assert len(exported) == len(expected)
+        assert exported[ROW_HASH].is_unique
+        assert exported["is_current"].sum() == expected["is_current"].sum()
+    fact_rows = _exported(export_path, "fact_tax_returns")
+    current = fact_rows[fact_rows["is_current"].eq(1)]
+    assert current["tax_paid"].sum() == pq.read_table(curated / "fact_tax_returns.parquet").to_pandas().query(
+        "is_current"
+    )["tax_paid"].sum()
+    assert current["taxpayer_id"].map(int).max() > 2**63  # uint64 keys survive as text
+
+    with sqlite3.connect(export_path) as connection:
+        indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        connection.execute("ALTER TABLE dim_geo ADD COLUMN stale TEXT")
+    assert {"ix_fact_tax_returns_return_key", "ix_dim_taxpayer_taxpayer_id", "ix_dim_geo__row_hash"} <= indexes
+    resync = TableExporter(config).run()
+    assert resync["dim_geo"]["reloaded"] and resync["fact_tax_returns"]["inserted"] == 0
+    assert "stale" not in _exported(export_path, "dim_geo").columns
+
+
+def test_duckdb_export_matches_parquet(tmp_path, make_config):
+    duckdb = pytest.importorskip("duckdb")
+    config = make_config()
+    config.input_path = str(tmp_path / "input")
+    Path(config.input_path).mkdir()
+    config.export = {**config.export, "enabled": True, "backend": "duckdb", "path": str(tmp_path / "tax.duckdb")}
+    summary = _run(config, generate_tax_returns(SyntheticSpec(rows=200, seed=50, error_rates={})), "run_1")
+    with duckdb.connect(config.export["path"]) as connection:
+        count = connection.execute("SELECT count(*) FROM fact_tax_returns").fetchone()[0]
+    assert count == summary["fact_tax_returns"]["rows"]
+
+
+def test_export_defaults_under_output_dir_and_deletes_repeated_hashes(tmp_path, make_config):
+    config = make_config()
+    config.export = {"enabled": True}
+    assert TableExporter(config).path == Path(config.output_dir) / "exports" / "tax_warehouse.sqlite"
+
+    store = _SqliteStore(tmp_path / "rows.sqlite")
+    rows = pa.table({"geo_id": [1, 2, 3], ROW_HASH: pa.array([7, 7, 8], pa.int64())})
+    store.create("dim_geo", rows.schema)
+    store.insert("dim_geo", rows)
+    store.delete("dim_geo", np.array([7, 7], dtype=np.int64))
+    store.commit()
+    assert store.hashes("dim_geo").tolist() == [8]
+    store.close()
+
+
+@pytest.mark.parametrize("engine", ["pandas", "arrow"])
+def test_export_applies_the_write_delta_and_full_resync_agrees(tmp_path, make_config, engine):
+    config = make_config(engine=engine)
+    config.input_path = str(tmp_path / "input")
+    config.incremental["allow_backfill"] = True
+    config.export = {**config.export, "enabled": True}
+    Path(config.input_path).mkdir()
+    returns = generate_tax_returns(SyntheticSpec(rows=300, seed=51, error_rates={}))
+    _run(config, returns, "run_1")
+
+    changed = returns.copy()
+    changed.loc[:9, "occupation"] = "Auditor"
+    changed.loc[:9, "tax_paid_sgd"] += 100
+    second = _run(config, changed, "run_2")
+    # Only the ten changed returns: each closed version is replaced and the new one added.
+    assert (second["fact_tax_returns"]["inserted"], second["fact_tax_returns"]["deleted"]) == (20, 10)
+    assert 0 < second["dim_taxpayer"]["deleted"] < second["dim_taxpayer"]["inserted"] < 30
+
+    unchanged = TableExporter(config).run()
+    assert all(item["inserted"] == item["deleted"] == 0 for item in unchanged.values())
+    resync = TableExporter(config).run(full=True)
+    assert all(item["inserted"] == item["deleted"] == 0 for item in resync.values())
+
+    # A database that missed a run no longer matches the delta's base version: diffed in full.
+    Path(config.export["path"]).unlink()
+    changed.loc[:4, "tax_paid_sgd"] += 100
+    third = _run(config, changed, "run_3")
+    assert third["fact_tax_returns"]["inserted"] == third["fact_tax_returns"]["rows"]
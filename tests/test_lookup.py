@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.bench.synthetic import SyntheticSpec, write_tax_returns_csv
+from src.lookup import LookupIndex, index_path
+from src.main import build_pipeline
+from src.query import QueryEngine
+
+
+def test_lookups_read_only_matching_row_groups(tmp_path, make_config):
+    config = make_config()
+    config.input_path = str(tmp_path / "input")
+    config.lookup_index = {"enabled": True, "row_group_size": 25}
+    write_tax_returns_csv(SyntheticSpec(rows=300, seed=5), tmp_path / "input" / "batch.csv")
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+
+    curated = Path(config.layers["curated_dir"])
+    fact_path = curated / "fact_tax_returns.parquet"
+    assert pq.ParquetFile(fact_path).metadata.num_row_groups > 1
+    assert index_path(fact_path, "return_key").exists()
+
+    facts = pd.read_parquet(fact_path)
+    taxpayers = pd.read_parquet(curated / "dim_taxpayer.parquet")
+    engine = QueryEngine.from_config(config)
+    for table, column, frame in [
+        ("fact_tax_returns", "return_key", facts),
+        ("fact_tax_returns", "taxpayer_id", facts),
+        ("dim_taxpayer", "nric", taxpayers),
+    ]:
+        value = frame[column].iloc[len(frame) // 2]
+        found = engine.lookup(table, column, value).to_pandas()
+        expected = frame[frame[column] == value].reset_index(drop=True)
+        pd.testing.assert_frame_equal(found, expected)
+
+    index = LookupIndex.load(fact_path, "return_key")
+    assert len({group for group, _ in index.locate(facts["return_key"].iloc[0])}) == 1
+    assert engine.lookup("dim_taxpayer", "nric", "S0000000Z").num_rows == 0
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    table_path = tmp_path / "fact_tax_returns.parquet"
+    pd.DataFrame({"return_key": [3, 1, 2]}).to_parquet(table_path, index=False)
+    assert LookupIndex.load(table_path, "return_key").locate(1) == [(0, 1)]
+
+    pd.DataFrame({"return_key": [1, 1, 2, 3]}).to_parquet(table_path, index=False, row_group_size=2)
+
+    assert LookupIndex.load(table_path, "return_key").locate(1) == [(0, 0), (0, 1)]
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.bench.harness import DEFAULT_ERROR_RATES
+from src.bench.synthetic import SyntheticSpec, write_tax_returns_csv
+from src.main import build_pipeline
+from src.transform.rollups import check_rollups, rollup_grains
+from src.utils.money import MONEY_COLUMNS
+
+
+def _run(make_config, tmp_path: Path, engine: str, fixed_point: bool):
+    config = make_config(tmp_path / f"{engine}_{fixed_point}", engine)
+    config.money = {"fixed_point": fixed_point}
+    spec = SyntheticSpec(rows=400, seed=12, error_rates=DEFAULT_ERROR_RATES)
+    write_tax_returns_csv(spec, Path(config.input_path))
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+    return config, Path(config.layers["curated_dir"])
+
+
+def test_fixed_point_money_matches_float_dollars(tmp_path, make_config):
+    _, float_dir = _run(make_config, tmp_path, "pandas", False)
+    dollars = pd.read_parquet(float_dir / "fact_tax_returns.parquet").sort_values("return_key")
+    float_summary = pd.read_parquet(float_dir / "summary_report.parquet").iloc[0]
+
+    for engine in ["pandas", "arrow"]:
+        config, curated = _run(make_config, tmp_path, engine, True)
+        cents = pd.read_parquet(curated / "fact_tax_returns.parquet").sort_values("return_key")
+        assert cents["return_key"].tolist() == dollars["return_key"].tolist()
+        for col in MONEY_COLUMNS:
+            assert str(cents[col].dtype) in ("int64", "Int64")
+            expected = np.round(pd.to_numeric(dollars[col]).to_numpy(dtype="float64") * 100)
+            np.testing.assert_array_equal(cents[col].to_numpy(dtype="float64"), expected)
+
+        summary = pd.read_parquet(curated / "summary_report.parquet").iloc[0]
+        assert summary["invalid_chargeable_income_count"] == float_summary["invalid_chargeable_income_count"]
+        assert summary["tax_paid_total"] == round(float_summary["tax_paid_total"], 2)
+        assert check_rollups(curated, Path(config.layers["datamart_dir"]), rollup_grains(config)) == []
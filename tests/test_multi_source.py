@@ -0,0 +1,101 @@
+import multiprocessing
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.bench.harness import DEFAULT_ERROR_RATES
+from src.bench.synthetic import SyntheticSpec, generate_tax_returns
+from src.locks import LockTimeout, file_lock, table_locks
+from src.multi_source import MultiSourceRunner, source_configs
+from src.transform.rollups import check_rollups, rollup_grains
+
+
+def _hold(path: str, ready, release) -> None:
+    with file_lock(Path(path)):
+        ready.set()
+        release.wait(10)
+
+
+def test_file_lock_excludes_other_processes(tmp_path):
+    lock = tmp_path / "locks" / "dim_taxpayer.lock"
+    ctx = multiprocessing.get_context("spawn")
+    ready, release = ctx.Event(), ctx.Event()
+    holder = ctx.Process(target=_hold, args=(str(lock), ready, release))
+    holder.start()
+    try:
+        assert ready.wait(30)
+        with pytest.raises(LockTimeout):
+            with file_lock(lock, timeout=0.2):
+                pass
+        # Other tables stay free while one is held.
+        with table_locks(lock.parent, ["dim_geo", "rollups"], timeout=0.2):
+            pass
+    finally:
+        release.set()
+        holder.join(10)
+    started = time.monotonic()
+    with file_lock(lock, timeout=5):
+        assert time.monotonic() - started < 5
+
+
+def _source(base, tmp_path: Path, name: str, seed: int):
+    config = replace(base, source_name=name, input_path=str(tmp_path / "input" / name), dedup={})
+    Path(config.input_path).mkdir(parents=True)
+    returns = generate_tax_returns(SyntheticSpec(rows=300, seed=seed, error_rates=DEFAULT_ERROR_RATES))
+    returns.to_csv(Path(config.input_path) / f"{name}.csv", index=False)
+    return config
+
+
+def test_sources_run_concurrently_with_their_own_metadata(tmp_path, make_config):
+    base = make_config()
+    base.incremental = {**base.incremental, "allow_backfill": True}
+    configs = [_source(base, tmp_path, "iras", 41), _source(base, tmp_path, "cpf", 42)]
+
+    with pytest.raises(ValueError, match="source_name"):
+        source_configs([configs[0], configs[0]])
+    resolved = source_configs(configs)
+    metadata = Path(base.output_dir) / "metadata" / "sources"
+    assert resolved[1].incremental["state_path"] == str(metadata / "cpf" / "state.json")
+    assert resolved[0].dedup["index_dir"] == str(metadata / "iras" / "dedup")
+
+    results = MultiSourceRunner(configs, workers=2).run()
+
+    assert [result["status"] for result in results] == ["succeeded", "succeeded"], results
+    for name in ["iras", "cpf"]:
+        assert (metadata / name / "state.json").exists()
+        ledger = pd.read_csv(metadata / name / "processed_files.csv")
+        assert ledger["file_name"].tolist() == [f"{name}.csv"]
+    curated = Path(base.layers["curated_dir"])
+    fact = pd.read_parquet(curated / "fact_tax_returns.parquet")
+    assert {run_id.rsplit("_", 1)[1] for run_id in fact["created_run_id"].astype(str)} == {"iras", "cpf"}
+    assert not check_rollups(curated, Path(base.layers["datamart_dir"]), rollup_grains(base))
+
+
+def test_each_source_keeps_its_own_datamart_and_quality_rows(tmp_path, make_config):
+    # The sources run on different engines and one after the other, so the second writer is known.
+    iras = _source(make_config(engine="pandas"), tmp_path, "iras", 43)
+    cpf = _source(make_config(engine="arrow"), tmp_path, "cpf", 44)
+    for config in [iras, cpf]:
+        config.incremental = {**config.incremental, "allow_backfill": True}
+    assert [result["status"] for result in MultiSourceRunner([iras, cpf], workers=1).run()] == ["succeeded"] * 2
+
+    datamart = Path(iras.layers["datamart_dir"]) / "datamart_tax_returns.parquet"
+    curated = Path(iras.layers["curated_dir"])
+    tables = [datamart] + [curated / f"{name}.parquet" for name in ["data_quality_results", "summary_report"]]
+    before = {path.stem: pd.read_parquet(path)["source_name"].value_counts().to_dict() for path in tables}
+    assert all(set(counts) == {"iras", "cpf"} for counts in before.values()), before
+    assert before["summary_report"] == {"iras": 1, "cpf": 1}
+
+    # A second iras run replaces only the iras rows.
+    generate_tax_returns(SyntheticSpec(rows=120, seed=45, error_rates=DEFAULT_ERROR_RATES)).to_csv(
+        Path(iras.input_path) / "iras_2.csv", index=False
+    )
+    assert MultiSourceRunner([iras], workers=1).run()[0]["status"] == "succeeded"
+    after = {path.stem: pd.read_parquet(path)["source_name"].value_counts().to_dict() for path in tables}
+    for name, counts in after.items():
+        assert counts["cpf"] == before[name]["cpf"], name
+    assert after["data_quality_results"]["iras"] == 120
+    assert after["summary_report"] == {"iras": 1, "cpf": 1}
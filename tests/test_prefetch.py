@@ -0,0 +1,44 @@
+import threading
+import time
+
+import pytest
+
+from src.pipeline.prefetch import Prefetcher
+
+
+def test_prefetch_keeps_order_and_bounds_read_ahead():
+    started = []
+    lock = threading.Lock()
+
+    def load(item):
+        with lock:
+            started.append(item)
+        time.sleep(0.01)
+        return item * 10
+
+    reader = Prefetcher(range(8), load, depth=2)
+    seen = []
+    for item, value in reader:
+        # At most `depth` loaded items are queued, plus one being loaded.
+        with lock:
+            assert len(started) - len(seen) <= 2 + 2
+        time.sleep(0.02)
+        seen.append((item, value))
+
+    assert seen == [(item, item * 10) for item in range(8)]
+    stats = reader.stats
+    assert stats["items"] == 8 and stats["hidden_s"] > 0
+    assert stats["wait_s"] < stats["load_s"]
+
+
+def test_prefetch_reraises_loader_errors_and_stops():
+    def load(item):
+        if item == 2:
+            raise OSError("disk gone")
+        return item
+
+    with pytest.raises(OSError, match="disk gone"):
+        list(Prefetcher(range(5), load, depth=1))
+
+    inline = Prefetcher(range(3), lambda item: item, depth=0)
+    assert list(inline) == [(0, 0), (1, 1), (2, 2)] and inline.stats["hidden_s"] == 0
@@ -0,0 +1,70 @@
+import pandas as pd
+
+from src.pipeline.base import Pipeline, PipelineContext, PipelineStage
+from src.utils.profiling import RunProfiler, span, write_run_metrics
+
+
+class _DoubleStage(PipelineStage):
+    name = "double"
+
+    def run(self, context, data=None):
+        frame = pd.DataFrame({"value": [1, 2, 3]}) if data is None else data
+        with span("double.concat"):
+            doubled = pd.concat([frame, frame], ignore_index=True)
+        context.artifacts["doubled"] = doubled
+        return doubled
+
+
+def test_pipeline_records_stage_span_and_artifact_metrics():
+    profiler = RunProfiler("run_test", trace_memory=True)
+    context = PipelineContext(config=None, profiler=profiler)
+    Pipeline([_DoubleStage(), _DoubleStage()]).run(context)
+
+    metrics = profiler.to_frame()
+    stages = metrics[metrics["kind"] == "stage"]
+    assert stages["rows_in"].isna().tolist() == [True, False]
+    assert stages["rows_in"].iloc[1] == 6
+    assert stages["rows_out"].tolist() == [6, 12]
+    assert (stages["tracemalloc_peak_mb"] > 0).all()
+
+    spans = metrics[metrics["kind"] == "span"]
+    assert spans["parent"].tolist() == ["double", "double"]
+
+    artifacts = metrics[metrics["kind"] == "artifact"]
+    assert artifacts["rows_out"].tolist() == [6, 12]
+
+
+def test_span_is_noop_without_active_profiler():
+    with span("unused") as record:
+        assert record is None
+
+
+def test_write_run_metrics_partitions_by_run_id(tmp_path):
+    profiler = RunProfiler("run_test")
+    with profiler.activate(), span("step"):
+        pass
+    path = write_run_metrics(profiler, tmp_path)
+
+    assert path == tmp_path / "run_id=run_test" / "run_metrics.parquet"
+    assert pd.read_parquet(path)["name"].tolist() == ["step"]
+
+
+class _FailingStage(PipelineStage):
+    name = "explode"
+
+    def run(self, context, data=None):
+        raise RuntimeError("bad batch")
+
+
+def test_failed_run_keeps_stage_metrics_and_status(tmp_path):
+    profiler = RunProfiler("run_failed")
+    context = PipelineContext(config=None, profiler=profiler)
+    try:
+        Pipeline([_DoubleStage(), _FailingStage()]).run(context)
+    except RuntimeError:
+        pass
+    path = write_run_metrics(profiler, tmp_path, status="failed")
+
+    metrics = pd.read_parquet(path)
+    assert metrics.loc[metrics["kind"] == "stage", "name"].tolist() == ["double", "explode"]
+    assert metrics["run_status"].eq("failed").all()
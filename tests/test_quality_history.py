@@ -0,0 +1,60 @@
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from src.bench.harness import DEFAULT_ERROR_RATES
+from src.bench.synthetic import SyntheticSpec, generate_tax_returns
+from src.main import build_pipeline
+from src.quality.history import DqHistory, sample_results
+
+
+def test_quality_history_appends_one_partition_per_run(tmp_path, make_config):
+    config = make_config()
+    config.input_path = str(tmp_path / "input")
+    config.incremental["allow_backfill"] = True
+    config.quality_history = {**config.quality_history, "results_sample_rate": 0.25}
+    Path(config.input_path).mkdir()
+    started = datetime(2026, 1, 5, 9, tzinfo=ZoneInfo("Asia/Singapore"))
+    # Run ids that do not sort by time: trends must follow the run timestamps.
+    for day, run_id in enumerate(["run_zeta", "run_alpha", "run_mid"]):
+        returns = generate_tax_returns(SyntheticSpec(rows=400, seed=50 + day, error_rates=DEFAULT_ERROR_RATES))
+        returns.to_csv(Path(config.input_path) / f"{run_id}.csv", index=False)
+        pipeline, context = build_pipeline(config)
+        context.artifacts["run_id"] = run_id
+        context.artifacts["run_timestamp"] = (started + timedelta(days=day)).isoformat()
+        pipeline.run(context)
+
+    history = DqHistory.from_config(config)
+    assert history.runs()["run_id"].tolist() == ["run_zeta", "run_alpha", "run_mid"]
+    latest = pd.read_parquet(Path(config.layers["curated_dir"]) / "agg_data_quality_metrics.parquet")
+
+    # Trends come from the metrics partitions alone.
+    shutil.rmtree(history.root / "results")
+    domains = history.trends(runs=2, kind="domain")
+    assert domains["run_id"].unique().tolist() == ["run_alpha", "run_mid"]
+    last = domains[domains["run_id"].eq("run_mid")].set_index("name")
+    assert last["passing_rows"].to_dict() == latest.set_index("domain")["passing_rows"].to_dict()
+    rules = history.trends(kind="rule", names=["rule_nric_format"])
+    assert len(rules) == 3 and rules["total_rows"].gt(0).all() and rules["score_pct"].lt(100).all()
+
+
+def test_result_sampling_keeps_failures_and_a_stable_share_of_passes():
+    results = pd.DataFrame(
+        {
+            "row_id": range(4000),
+            "rule_nric_format": [index % 10 != 0 for index in range(4000)],
+            "dq_validity_pass": True,
+            "created_run_id": "run_x",
+        }
+    )
+    sample = sample_results(results, rate=0.1)
+    failed = sample[~sample["rule_nric_format"]]
+    passed = sample[sample["rule_nric_format"]]
+    assert len(failed) == 400 and failed["sample_weight"].eq(1.0).all()
+    assert 250 < len(passed) < 470 and passed["sample_weight"].eq(10.0).all()
+    assert "created_run_id" not in sample.columns
+    pd.testing.assert_frame_equal(sample, sample_results(results, rate=0.1))
+    assert len(sample_results(results, rate=0.0, keep_failed=False)) == 0
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pandas as pd
+
+from src.bench.synthetic import SyntheticSpec, write_tax_returns_csv
+from src.main import build_pipeline
+from src.query import QueryEngine
+
+
+def _run(make_config, workdir: Path, name: str, seed: int):
+    config = make_config(workdir)
+    config.input_path = str(workdir / "input")
+    write_tax_returns_csv(SyntheticSpec(rows=300, seed=seed), workdir / "input" / name)
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+    return config
+
+
+def test_query_filters_match_pandas_and_cache_tracks_runs(tmp_path, make_config):
+    config = _run(make_config, tmp_path, "first.csv", 1)
+    engine = QueryEngine.from_config(config)
+    fact = pd.read_parquet(Path(config.layers["curated_dir"]) / "fact_tax_returns.parquet")
+
+    current = engine.query_pandas(
+        "fact_tax_returns",
+        columns=["return_key", "assessment_year"],
+        filters=[("assessment_year", ">=", 2022)],
+        current_only=True,
+    )
+    expected = fact[fact["is_current"] & (fact["assessment_year"] >= 2022)]
+    assert list(current.columns) == ["return_key", "assessment_year"]
+    assert sorted(current["return_key"]) == sorted(expected["return_key"])
+
+    moment = fact["effective_start"].min()
+    as_of = engine.query_pandas("fact_tax_returns", as_of=moment)
+    assert len(as_of) == int(((fact["effective_start"] <= moment) & (fact["effective_end"] > moment)).sum())
+
+    staging = engine.query("staging", columns=["ingest_date"])
+    assert staging.num_rows > 0
+    assert set(staging.column("ingest_date").to_pylist()) == {
+        path.name.split("=", 1)[1]
+        for path in (Path(config.layers["staging_dir"]) / config.source_name).glob("ingest_date=*")
+    }
+
+    engine.query("fact_tax_returns", current_only=True)
+    engine.query("fact_tax_returns", current_only=True)
+    assert engine.cache_info()["hits"] == 1
+
+    _run(make_config, tmp_path, "second.csv", 2)
+    refreshed = engine.query("fact_tax_returns", current_only=True)
+    assert engine.cache_info()["hits"] == 1
+    latest = pd.read_parquet(Path(config.layers["curated_dir"]) / "fact_tax_returns.parquet")
+    assert refreshed.num_rows == int(latest["is_current"].sum())
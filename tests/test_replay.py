@@ -0,0 +1,41 @@
+from pathlib import Path
+
+import pandas as pd
+
+from src.bench.synthetic import SyntheticSpec, write_tax_returns_csv
+from src.main import build_pipeline
+from src.replay import QuarantineReplay, quarantine_files
+
+
+def test_replay_releases_rows_that_pass_current_rules(tmp_path, make_config):
+    config = make_config()
+    config.input_path = str(tmp_path / "input")
+    spec = SyntheticSpec(
+        rows=300, seed=8, error_rates={"rule_chargeable_income": 0.1, "rule_postal_code": 0.05}
+    )
+    write_tax_returns_csv(spec, tmp_path / "input" / "batch.csv")
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+
+    curated = Path(config.layers["curated_dir"])
+    before = pd.read_parquet(curated / "fact_tax_returns.parquet")
+    replay = QuarantineReplay(config)
+    files = quarantine_files(replay.quarantine_root)
+    assert len(files) == 1
+    quarantined = pd.read_parquet(files[0])
+    income_only = quarantined["rule_postal_code"] & ~quarantined["rule_chargeable_income"]
+
+    dry = replay.run(dry_run=True)
+    assert dry["replayed"] == len(quarantined) and dry["released"] == 0
+
+    config.quality_tolerance = {**config.quality_tolerance, "income_diff": 2_000}
+    summary = replay.run()
+
+    assert summary["released"] == int(income_only.sum()) > 0
+    assert summary["failing_rules"]["rule_postal_code"] == len(quarantined) - summary["released"]
+    after = pd.read_parquet(curated / "fact_tax_returns.parquet")
+    assert len(after[after["is_current"]]) == len(before[before["is_current"]]) + summary["released"]
+
+    marked = pd.read_parquet(files[0])
+    assert marked["released_run_id"].notna().tolist() == income_only.tolist()
+    assert QuarantineReplay(config).run()["released"] == 0
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pandas as pd
+
+from src.bench.synthetic import SyntheticSpec, write_tax_returns_csv
+from src.main import build_pipeline
+from src.transform.rollups import COUNT_COLUMN, check_rollups, rollup_grains, rollup_path
+
+
+def _run(config) -> None:
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+
+
+def test_incremental_rollups_match_full_recompute(tmp_path, make_config):
+    config = make_config()
+    config.input_path = str(tmp_path / "input")
+    config.incremental["allow_backfill"] = True
+    curated, datamart = Path(config.layers["curated_dir"]), Path(config.layers["datamart_dir"])
+    grains = rollup_grains(config)
+
+    first = tmp_path / "input" / "first.csv"
+    write_tax_returns_csv(SyntheticSpec(rows=300, seed=3), first)
+    source = pd.read_csv(first, dtype=str)
+    _run(config)
+    assert check_rollups(curated, datamart, grains) == []
+
+    # Amend some returns and move other taxpayers to a new housing type and status.
+    changed = source.iloc[:40].copy()
+    changed.loc[changed.index[:20], "annual_income_sgd"] = "999999.0"
+    changed.loc[changed.index[:20], "filing_date"] = "2024-12-31"
+    changed.loc[changed.index[20:], "housing_type"] = "Landed Property"
+    changed.loc[changed.index[20:], "residential_status"] = "Non-Resident"
+    changed.to_csv(tmp_path / "input" / "second.csv", index=False)
+    before = pd.read_parquet(rollup_path(datamart, "region_year"))
+    _run(config)
+
+    assert check_rollups(curated, datamart, grains) == []
+    after = pd.read_parquet(rollup_path(datamart, "region_year"))
+    assert not after.equals(before)
+    facts = pd.read_parquet(curated / "fact_tax_returns.parquet")
+    assert after[COUNT_COLUMN].sum() == int(facts["is_current"].sum())
+
+
+def test_check_rollups_reports_drift(tmp_path, make_config):
+    config = make_config()
+    config.input_path = str(tmp_path / "input")
+    write_tax_returns_csv(SyntheticSpec(rows=200, seed=4), tmp_path / "input" / "batch.csv")
+    _run(config)
+    datamart = Path(config.layers["datamart_dir"])
+    path = rollup_path(datamart, "region_year")
+    rollup = pd.read_parquet(path)
+    rollup.loc[0, "tax_paid"] += 100
+    rollup.to_parquet(path, index=False)
+
+    problems = check_rollups(Path(config.layers["curated_dir"]), datamart, rollup_grains(config))
+
+    assert len(problems) == 1 and problems[0].startswith("region_year:")
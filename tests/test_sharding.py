@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from src.bench.harness import DEFAULT_ERROR_RATES
+from src.bench.synthetic import SyntheticSpec, generate_tax_returns, write_tax_returns_csv
+from src.main import build_pipeline
+from src.pipeline.base import PipelineContext
+from src.pipeline.sharding import ShardedValidateTransformStage, shard_assignments
+from src.pipeline.transform import TransformStage
+from src.pipeline.validate import ValidateStage
+
+CURATED_TABLES = ["dim_geo", "dim_taxpayer", "fact_tax_returns", "data_quality_results"]
+
+
+def test_shard_assignments_are_stable_and_keep_taxpayers_together():
+    nric = ["S1234567A", " S1234567A", "T7654321Z", None, "S1234567A "]
+    first = shard_assignments(pd.Series(nric), 4)
+    second = shard_assignments(pa.chunked_array([nric]), 4)
+
+    assert np.array_equal(first, second)
+    assert first[0] == first[1] == first[4]
+    assert ((first >= 0) & (first < 4)).all()
+
+
+def _run(make_config, tmp_path: Path, engine: str, shards: int) -> Path:
+    workdir = tmp_path / f"{engine}_{shards}"
+    config = make_config(workdir, engine)
+    config.execution["shards"] = shards
+    spec = SyntheticSpec(rows=400, seed=5, error_rates=DEFAULT_ERROR_RATES)
+    write_tax_returns_csv(spec, workdir / "input" / "synthetic_tax_returns.csv")
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+    return workdir / "outputs" / "curated"
+
+
+def test_sharded_run_matches_unsharded_run(tmp_path, make_config):
+    expected_dir = _run(make_config, tmp_path, "pandas", 1)
+    for engine, shards in [("pandas", 3), ("arrow", 2)]:
+        actual_dir = _run(make_config, tmp_path, engine, shards)
+        for table in CURATED_TABLES:
+            expected = pd.read_parquet(expected_dir / f"{table}.parquet")
+            actual = pd.read_parquet(actual_dir / f"{table}.parquet")
+            volatile = [
+                col for col in expected.columns if col.endswith(("_at", "run_id", "timestamp")) or "effective" in col
+            ]
+            pd.testing.assert_frame_equal(
+                actual.drop(columns=volatile), expected.drop(columns=volatile), check_dtype=False
+            )
+
+
+class _FailingShardValidateStage(ValidateStage):
+    """Fails on the shard holding shard 0's rows; the other shards succeed."""
+
+    def run(self, context, data=None):
+        if (shard_assignments(data["nric"], 3) == 0).all():
+            raise ValueError("shard 0 failed")
+        return super().run(context, data)
+
+
+def test_failed_shard_releases_every_shared_memory_block(make_config):
+    shm = Path("/dev/shm")
+    if not shm.is_dir():
+        pytest.skip("needs /dev/shm to list shared memory blocks")
+    config = make_config()
+    data = generate_tax_returns(SyntheticSpec(rows=300, seed=30))
+    data.columns = [col.replace("_sgd", "").replace("cpf_contributions", "cpf_contribution") for col in data.columns]
+    stage = ShardedValidateTransformStage(_FailingShardValidateStage(), TransformStage(), shards=3, workers=2)
+
+    before = set(shm.iterdir())
+    with pytest.raises(ValueError, match="shard 0 failed"):
+        stage.run(PipelineContext(config=config), data)
+    assert set(shm.iterdir()) == before
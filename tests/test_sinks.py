@@ -0,0 +1,88 @@
+import os
+from dataclasses import replace
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+import pytest
+
+from src.bench.harness import DEFAULT_ERROR_RATES
+from src.bench.synthetic import SyntheticSpec, generate_tax_returns
+from src.compact import ZoneCompactor
+from src.config import load_config
+from src.main import build_pipeline
+from src.query import QueryEngine
+from src.replay import QuarantineReplay
+from src.sinks import OutputSink
+
+
+def test_s3_sink_from_config_reuses_one_filesystem():
+    config = load_config(Path("configs/pipeline.yaml"))
+    config.sink = {"type": "s3", "uri": "s3://tax-lake/prod", "endpoint_override": "localhost:9000", "scheme": "http"}
+    first, second = OutputSink.from_config(config), OutputSink.from_config(config)
+    assert first.filesystem.type_name == "s3" and first.filesystem is second.filesystem
+    assert first.zone_root("raw", Path("outputs/raw")) == "tax-lake/prod/raw"
+    assert OutputSink.from_config(replace(config, sink={})).zone_root("raw", Path("outputs/raw")) == "outputs/raw"
+    with pytest.raises(ValueError, match="s3://"):
+        OutputSink.from_config(replace(config, sink={"type": "s3", "uri": "tax-lake"}))
+
+
+def test_object_store_sink_receives_zones_and_copies_the_archive(tmp_path, make_config, monkeypatch):
+    config = make_config()
+    config.input_path = str(tmp_path / "input")
+    Path(config.input_path).mkdir()
+    returns = generate_tax_returns(SyntheticSpec(rows=200, seed=48, error_rates=DEFAULT_ERROR_RATES))
+    returns.to_csv(Path(config.input_path) / "returns.csv", index=False)
+
+    # A directory tree behind the object-store code path stands in for the bucket.
+    bucket = tmp_path / "bucket"
+    bucket.mkdir()
+    sink = OutputSink(pafs.SubTreeFileSystem(str(bucket), pafs.LocalFileSystem()), "tax-lake")
+    monkeypatch.setattr(OutputSink, "from_config", classmethod(lambda cls, config: sink))
+    uploads = []
+    put_file = OutputSink.put_file
+    monkeypatch.setattr(OutputSink, "put_file", lambda self, *args: uploads.append(args) or put_file(self, *args))
+
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+
+    run_id = context.artifacts["run_id"]
+    lake = bucket / "tax-lake"
+    staging = next(lake.glob(f"staging/*/ingest_date=*/staging_{run_id}.parquet"))
+    assert pq.ParquetFile(staging).read().num_rows > 0
+    assert next(lake.glob(f"staging/quarantine/*/ingest_date=*/quarantine_breakdown_{run_id}.parquet"))
+    assert [path.name for path in lake.glob("*/*/*/*/*/*/returns.csv")] == ["returns.csv", "returns.csv"]
+    assert len(uploads) == 1  # landing only; the archive is a server-side copy
+    assert not (Path(config.input_path) / "returns.csv").exists()
+    assert not Path(config.layers["raw_dir"]).exists()
+    assert (Path(config.layers["curated_dir"]) / "fact_tax_returns.parquet").exists()
+
+    # Commands that scan the zones refuse an object-store sink instead of finding nothing.
+    config.sink = {"type": "s3", "uri": "s3://tax-lake"}
+    for command in (QuarantineReplay, ZoneCompactor):
+        with pytest.raises(ValueError, match="sink.type: s3"):
+            command(config)
+    engine = QueryEngine.from_config(config)
+    assert "fact_tax_returns" in engine.tables() and "staging" not in engine.tables()
+    with pytest.raises(ValueError, match="s3 sink"):
+        engine.query("staging")
+
+
+@pytest.mark.skipif(not os.environ.get("SINK_TEST_S3_URI"), reason="set SINK_TEST_S3_URI (and endpoint) to a MinIO bucket")
+def test_s3_sink_round_trip():
+    config = load_config(Path("configs/pipeline.yaml"))
+    config.sink = {
+        "type": "s3",
+        "uri": os.environ["SINK_TEST_S3_URI"],
+        "endpoint_override": os.environ.get("SINK_TEST_S3_ENDPOINT"),
+        "scheme": os.environ.get("SINK_TEST_S3_SCHEME"),
+    }
+    sink = OutputSink.from_config(config)
+    table = pa.table({"row_id": list(range(100_000)), "name": ["x" * 40] * 100_000})
+    path = sink.zone_root("raw", Path("unused")) + "/sink_test/roundtrip.parquet"
+    sink.write_table(table, path)
+    copy = path.replace("roundtrip", "roundtrip_copy")
+    sink.filesystem.copy_file(path, copy)
+    assert pq.read_table(copy, filesystem=sink.filesystem).equals(table)
+    sink.filesystem.delete_dir_contents(path.rsplit("/", 1)[0])
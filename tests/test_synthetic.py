@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.bench.harness import compare_to_baseline
+from src.bench.synthetic import (
+    POSTAL_SECTORS,
+    SyntheticSpec,
+    generate_tax_returns,
+    iter_tax_returns,
+    write_tax_returns_csv,
+)
+from src.main import build_pipeline
+from src.replay import quarantine_files
+from src.validation import rules
+
+
+def test_generator_is_deterministic():
+    spec = SyntheticSpec(rows=500, seed=7)
+    pd.testing.assert_frame_equal(generate_tax_returns(spec), generate_tax_returns(spec))
+
+
+def test_clean_rows_pass_every_rule_and_cover_history():
+    frame = generate_tax_returns(SyntheticSpec(rows=5_000, seed=1))
+
+    assert rules.rule_nric_format(frame, "nric").all()
+    assert rules.rule_postal_code(frame, "postal_code").all()
+    assert rules.rule_filing_date_after_assessment(frame, "filing_date", "assessment_year").all()
+    assert rules.rule_chargeable_income(
+        frame, "annual_income_sgd", "total_reliefs_sgd", "chargeable_income_sgd", 0.01
+    ).all()
+    assert rules.rule_cpf_residency(frame, "cpf_contributions_sgd", "residential_status").all()
+
+    assert not frame.duplicated(["nric", "assessment_year"]).any()
+    assert frame.groupby("nric")["assessment_year"].nunique().max() == 5
+    assert set(frame["postal_code"].str[:2].astype(int)) == set(POSTAL_SECTORS)
+
+
+def test_chunks_hold_whole_taxpayers_with_distinct_nrics():
+    spec = SyntheticSpec(rows=2_003, seed=11)
+    chunks = list(iter_tax_returns(spec, chunk_rows=502))
+
+    assert [len(chunk) for chunk in chunks] == [500, 500, 500, 500, 3]
+    frame = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(frame, generate_tax_returns(spec, chunk_rows=502))
+    assert frame.groupby("nric")["assessment_year"].nunique().max() == 5
+    assert frame["nric"].nunique() == 401
+    assert not chunks[0]["full_name"].equals(chunks[1]["full_name"])
+
+
+@pytest.mark.parametrize("engine", ["pandas", "arrow"])
+def test_clean_csv_round_trips_without_quarantine(make_config, engine):
+    config = make_config(engine=engine)
+    write_tax_returns_csv(SyntheticSpec(rows=600, seed=12), Path(config.input_path), chunk_rows=200)
+    source = pd.read_csv(config.input_path, dtype=str)
+    assert len(source) == 600 and source["postal_code"].str.startswith("0").any()
+
+    pipeline, context = build_pipeline(config)
+    pipeline.run(context)
+
+    quarantine = Path(config.layers["staging_dir"]) / "quarantine" / config.source_name
+    files = quarantine_files(quarantine)
+    assert files and sum(len(pd.read_parquet(path)) for path in files) == 0
+
+
+def test_error_rates_apply_per_rule():
+    frame = generate_tax_returns(
+        SyntheticSpec(rows=20_000, seed=3, error_rates={"rule_postal_code": 0.1})
+    )
+    invalid = ~rules.rule_postal_code(frame, "postal_code")
+
+    assert 0.08 < invalid.mean() < 0.12
+    assert rules.rule_nric_format(frame, "nric").all()
+
+
+def test_compare_to_baseline_flags_slowdowns():
+    baseline = {"10000": {"total_wall_s": 1.0, "peak_rss_mb": 100.0, "stages": {"validate": {"wall_s": 0.2}}}}
+    results = {"10000": {"total_wall_s": 1.1, "peak_rss_mb": 200.0, "stages": {"validate": {"wall_s": 0.5}}}}
+
+    regressions = compare_to_baseline(results, baseline, threshold=0.25)
+
+    assert len(regressions) == 2
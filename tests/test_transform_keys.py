@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from src.bench.harness import DEFAULT_ERROR_RATES
+from src.bench.synthetic import SyntheticSpec, generate_tax_returns
+from src.config import load_config
+from src.pipeline.base import PipelineContext
+from src.pipeline.transform import ArrowTransformStage, TransformStage
+from src.transform.dimensions import _stable_int_id, build_dim_taxpayer
+from src.transform.facts import _stable_return_key
+
+
+def test_keys_hashed_per_distinct_value_match_per_row_keys():
+    source = generate_tax_returns(SyntheticSpec(rows=500, seed=21, error_rates=DEFAULT_ERROR_RATES))
+    source.columns = [col.replace("_sgd", "").replace("cpf_contributions", "cpf_contribution") for col in source.columns]
+    source["nric"] = source["nric"].astype("string").str.strip()
+    source["postal_code"] = source["postal_code"].astype("string")
+    source["assessment_year"] = pd.to_numeric(source["assessment_year"], errors="coerce")
+
+    config = load_config(Path("configs/pipeline.yaml"))
+    outputs = {}
+    for name, stage, batch in [
+        ("pandas", TransformStage(), source),
+        ("arrow", ArrowTransformStage(), pa.Table.from_pandas(source, preserve_index=False)),
+    ]:
+        context = PipelineContext(config=config)
+        context.artifacts["valid"] = batch
+        stage.run(context, batch)
+        fact, dim = (context.artifacts[table] for table in ["fact_tax_returns", "dim_taxpayer"])
+        if isinstance(fact, pa.Table):
+            fact, dim = fact.to_pandas(), dim.to_pandas()
+        outputs[name] = fact.merge(dim[["taxpayer_id", "nric"]].drop_duplicates(), on="taxpayer_id")
+
+    for fact in outputs.values():
+        keyed = fact.dropna(subset=["nric", "assessment_year"])
+        pairs = zip(keyed["nric"], keyed["assessment_year"])
+        expected = [_stable_return_key(nric, str(int(year))) for nric, year in pairs]
+        assert len(keyed) and keyed["return_key"].map(int).tolist() == expected
+
+
+def test_taxpayer_ids_stay_uint64_when_every_key_fits_int64():
+    nrics = generate_tax_returns(SyntheticSpec(rows=50, seed=22))["nric"]
+    small = [nric for nric in nrics.unique() if _stable_int_id(nric, "NRIC") < 2**63]
+    dim_geo = pd.DataFrame({"geo_id": pd.Series(dtype="int64"), "postal_code": pd.Series(dtype="string")})
+
+    dim = build_dim_taxpayer(pd.DataFrame({"nric": small}), dim_geo)
+    assert len(dim) == len(small) and dim["taxpayer_id"].dtype == "uint64"
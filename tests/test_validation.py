@@ -1,6 +1,9 @@
 import pandas as pd
+import pyarrow as pa
 
-from src.validation import rules
+from src.utils.arrow import parse_timestamp
+from src.utils.dates import parse_dates, year_end
+from src.validation import rules, set_rules
 
 
 def test_rule_nric_format_valid():
@@ -39,3 +42,59 @@ def test_rule_cpf_residency():
     df = pd.DataFrame({"cpf": [100.0, 0.0, None], "residency": ["resident", "resident", "non-resident"]})
     result = rules.rule_cpf_residency(df, "cpf", "residency")
     assert result.tolist() == [True, False, True]
+
+
+def _cross_row_batch() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "nric": ["S1234567A", "S1234567A", "T7654321Z", "T7654321Z", "F1111111N", None, None],
+            "assessment_year": [2023, 2023, 2023, 2022, 2023, 2023, 2023],
+            "filing_date": pd.to_datetime(
+                ["2024-03-01", "2024-04-01", "2024-03-01", "2023-03-01", "2024-05-01", "2024-03-01", "2024-03-01"]
+            ),
+            "residential_status": ["Resident", "Non-Resident", "Resident", "Non-Resident", "Resident", None, "Resident"],
+        }
+    )
+
+
+def test_cross_row_rules_match_across_engines():
+    df = _cross_row_batch()
+    history = pd.DataFrame(
+        {
+            "nric": ["F1111111N", "T7654321Z"],
+            "assessment_year": [2023, 2023],
+            "filing_date": pd.to_datetime(["2024-01-15", "2024-03-01"]).tz_localize("Asia/Singapore"),
+        }
+    )
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    expected = {
+        "unique": [False, False, True, True, True, True, True],
+        "residency": [False, False, True, True, True, True, True],
+        "single": [False, False, True, True, False, True, True],
+    }
+    assert set_rules.rule_unique_return(df).tolist() == expected["unique"]
+    assert set_rules.rule_consistent_residency(df, "residential_status").tolist() == expected["residency"]
+    assert set_rules.rule_single_filing(df, "filing_date", history).tolist() == expected["single"]
+    assert set_rules.rule_unique_return_arrow(table).to_pylist() == expected["unique"]
+    residency = set_rules.rule_consistent_residency_arrow(table, "residential_status")
+    assert residency.to_pylist() == expected["residency"]
+    assert set_rules.rule_single_filing_arrow(table, "filing_date", history).to_pylist() == expected["single"]
+
+
+def test_parse_dates_uses_explicit_formats_once_per_value():
+    values = pd.Series([" 2024-03-01", "2024/03/01", "01/03/2024", "2024-02-30", "2024-3-1", None, "2024-03-01"])
+    parsed = parse_dates(values)
+    assert parsed.tolist()[:3] == [pd.Timestamp("2024-03-01")] * 3
+    assert parsed.iloc[[3, 5]].isna().all() and parsed.iloc[6] == pd.Timestamp("2024-03-01")
+    # Fields without zero padding parse too, in every layout.
+    assert parsed.iloc[4] == pd.Timestamp("2024-03-01")
+    unpadded = pd.Series(["2024/3/1", "1/3/2024", "2024-3-01", "2024-2-30"])
+    assert parse_dates(unpadded).tolist()[:3] == [pd.Timestamp("2024-03-01")] * 3
+    assert parse_timestamp(pa.chunked_array([pa.array(unpadded)])).to_pandas().tolist() == parse_dates(
+        unpadded
+    ).tolist()
+    assert parse_dates(parsed) is parsed
+    arrow = parse_timestamp(pa.chunked_array([pa.array(values)])).to_pandas()
+    assert arrow.isna().tolist() == parsed.isna().tolist()
+    assert year_end(pd.Series([2023, None])).tolist()[0] == pd.Timestamp("2023-12-31")
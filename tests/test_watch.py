@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.bench.synthetic import SyntheticSpec, write_tax_returns_csv
+from src.main import build_pipeline
+from src.watch import InotifyWatcher, PollingWatcher, WatchDaemon
+
+
+def test_polling_watcher_reports_stable_files_once(tmp_path):
+    watcher = PollingWatcher(tmp_path, interval=0)
+    (tmp_path / "a.csv").write_text("x\n")
+
+    assert watcher.poll(0) == []
+    assert watcher.poll(0) == [tmp_path / "a.csv"]
+    assert watcher.poll(0) == []
+
+    (tmp_path / "a.csv").write_text("x\ny\n")
+    watcher.poll(0)
+    assert watcher.poll(0) == [tmp_path / "a.csv"]
+
+
+@pytest.mark.skipif(not InotifyWatcher.available(), reason="inotify not available")
+def test_inotify_watcher_reports_closed_files(tmp_path):
+    watcher = InotifyWatcher(tmp_path)
+    try:
+        (tmp_path / "ignored.txt").write_text("x")
+        (tmp_path / "b.csv").write_text("x")
+        assert watcher.poll(1.0) == [tmp_path / "b.csv"]
+    finally:
+        watcher.close()
+
+
+def _config(make_config, workdir: Path):
+    config = make_config(workdir)
+    config.input_path = str(workdir / "input")
+    return config
+
+
+def _drop(workdir: Path, name: str, seed: int) -> None:
+    write_tax_returns_csv(SyntheticSpec(rows=300, seed=seed), workdir / "input" / name)
+
+
+def test_warm_batches_match_cold_runs(tmp_path, make_config):
+    warm_dir, cold_dir = tmp_path / "warm", tmp_path / "cold"
+    daemon = WatchDaemon(_config(make_config, warm_dir))
+    for name, seed in [("first.csv", 1), ("second.csv", 2)]:
+        _drop(warm_dir, name, seed)
+        assert daemon.run_batch()
+        _drop(cold_dir, name, seed)
+        pipeline, context = build_pipeline(_config(make_config, cold_dir))
+        pipeline.run(context)
+
+    assert daemon.state.hits > 0
+    assert daemon.pending_files() == []
+    for table in ["dim_geo", "dim_taxpayer", "fact_tax_returns"]:
+        warm = pd.read_parquet(warm_dir / "outputs" / "curated" / f"{table}.parquet")
+        cold = pd.read_parquet(cold_dir / "outputs" / "curated" / f"{table}.parquet")
+        volatile = [col for col in warm.columns if col.endswith(("_at", "run_id")) or "effective" in col]
+        pd.testing.assert_frame_equal(warm.drop(columns=volatile), cold.drop(columns=volatile))